@@ -16,11 +16,11 @@ app.autodiscover_tasks()
 app.conf.beat_schedule = {
     "send_appointment_reminder_notifications": {
         "task": "apps.routines.tasks.send_reminder_notification_for_appointments",
-        "schedule": crontab(minute="0"),  # In every hour.
+        "schedule": crontab(),  # In every minute, sends only due reminders.
     },
     "send_reminder_for_daily_questionnaire_notifications": {
         "task": "apps.routines.tasks.send_reminder_for_daily_questionnaire",
-        "schedule": crontab(minute="0", hour="15"),  # Everyday at 3pm.
+        "schedule": crontab(minute="*/15"),  # Every 15 minutes for users with 3pm local time.
     },
     "send_notification_about_monthly_statistics": {
         "task": "apps.routines.tasks.send_notification_about_monthly_statistics",
@@ -30,6 +30,18 @@ app.conf.beat_schedule = {
         "task": "apps.routines.tasks.update_sagging_parameter_for_face_scan_analytics",
         "schedule": crontab(),
     },
+    "deduplicate_fcm_devices": {
+        "task": "apps.utils.tasks.deduplicate_fcm_devices",
+        "schedule": crontab(minute="30", hour="2"),  # Everyday at 2:30am.
+    },
+    "prune_push_notification_deliveries": {
+        "task": "apps.utils.tasks.prune_push_notification_deliveries",
+        "schedule": crontab(minute="45", hour="2"),  # Everyday at 2:45am.
+    },
+    "evict_recognition_cache": {
+        "task": "apps.routines.tasks.evict_recognition_cache",
+        "schedule": crontab(minute="0", hour="3"),  # Everyday at 3am.
+    },
     "update_category": {
         "task": "apps.routines.tasks.update_category",
         "schedule": crontab(),
@@ -129,3 +129,22 @@ class LifeStyleCategories(str, ChoicesEnum):
     SLEEP = "SLEEP"
     STRESS = "STRESS"
     EXERCISE = "EXERCISE"
+
+
+# Postgres text search configurations of article languages, other languages are searched without stemming
+SEARCH_CONFIGS = {
+    "da": "danish",
+    "de": "german",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "it": "italian",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ru": "russian",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+DEFAULT_SEARCH_CONFIG = "simple"
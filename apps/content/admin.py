@@ -12,6 +12,7 @@ from apps.content.models import (
     SubCategory,
     SubCategoryTranslation,
     UserArticle,
+    UserReadingProgress,
 )
 
 
@@ -76,3 +77,12 @@ class ArticleUserAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(UserReadingProgress)
+class UserReadingProgressAdmin(admin.ModelAdmin):
+    list_display = ["user", "articles_count", "read_articles_count", "updated_at"]
+    search_fields = ["user__email"]
+
+    def has_change_permission(self, request, obj=None):
+        return False
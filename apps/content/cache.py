@@ -0,0 +1,160 @@
+from functools import partial, wraps
+import hashlib
+import json
+import logging
+import time
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from redis.exceptions import ConnectionError
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.utils.helpers import get_redis_client
+
+LOGGER = logging.getLogger("app")
+
+CONTENT_VERSION_KEY = "content:version"
+CONTENT_MODIFIED_AT_KEY = "content:modified_at"
+# after the timeout only the content version is used for the user's content
+USER_CONTENT_MODIFIED_AT_TTL = 30 * 24 * 60 * 60
+
+
+def get_language_code(request) -> str:
+    return request.user.language.code if request.user.is_authenticated else settings.DEFAULT_LANGUAGE
+
+
+def cache_content_response(func: Callable) -> Callable:
+    """
+    Caches data of successful responses of a viewset action in redis per language, host and full path. The cached
+    responses are versioned by a single redis counter, which is incremented after the content is changed (see
+    `invalidate_content_cache`). Only actions whose responses don't depend on the user (except the language) should be
+    cached. Without redis the responses are not cached.
+    """
+
+    @wraps(func)
+    def wrapper(view, request, *args, **kwargs):
+        try:
+            with get_redis_client() as redis:
+                if not redis:
+                    return func(view, request, *args, **kwargs)
+                version = int(redis.get(CONTENT_VERSION_KEY) or 0)
+                key = f"content:{version}:{get_language_code(request)}:{request.get_host()}:{request.get_full_path()}"
+                if (cached_data := redis.get(key)) is not None:
+                    return Response(json.loads(cached_data))
+
+                response = func(view, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    redis.setex(key, settings.REDIS_CACHE_DEFAULT_TTL, json.dumps(response.data))
+                return response
+        except ConnectionError:
+            LOGGER.exception("Failed to connect to Redis to retrieve cached content.")
+            return func(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def conditional_content_response(func: Callable = None, per_user: bool = False):
+    """
+    Sets ETag and Last-Modified headers of successful responses of a viewset action and returns 304 Not Modified
+    without running the action if the client already has the current response. The validators are derived from
+    the content version (see `invalidate_content_cache`) and the user's language. With `per_user` they also depend on
+    the user, the last change of the user's articles (see `mark_user_content_modified`) and the current hour, because
+    locks of periods are time based. Without redis the headers are not set.
+
+    Usage examples:
+        @conditional_content_response
+        def list(self, request, *args, **kwargs):
+            return super().list(request, *args, **kwargs)
+
+        @conditional_content_response(per_user=True)
+        def retrieve(self, request, *args, **kwargs):
+            return super().retrieve(request, *args, **kwargs)
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            try:
+                validators = _get_content_validators(request, per_user)
+            except ConnectionError:
+                LOGGER.exception("Failed to connect to Redis to retrieve content version.")
+                validators = None
+            if validators is None:
+                return func(view, request, *args, **kwargs)
+
+            etag, last_modified = validators
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = func(view, request, *args, **kwargs)
+            if response.status_code in [status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED]:
+                response["ETag"] = etag
+                response["Last-Modified"] = http_date(last_modified)
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    if callable(func):
+        return decorator(func)
+
+    return decorator
+
+
+def _get_content_validators(request, per_user: bool) -> Optional[tuple[str, int]]:
+    """Returns ETag and Last-Modified timestamp of the content for the request"""
+    with get_redis_client() as redis:
+        if not redis:
+            return None
+        keys = [CONTENT_VERSION_KEY, CONTENT_MODIFIED_AT_KEY]
+        if per_user:
+            keys.append(_get_user_content_modified_at_key(request.user.id))
+        version, *modified_at_values = redis.mget(keys)
+
+    last_modified = max([int(float(value)) for value in modified_at_values if value is not None], default=0)
+    fingerprint = [int(version or 0), get_language_code(request)]
+    if per_user:
+        current_hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        last_modified = max(last_modified, int(current_hour.timestamp()))
+        fingerprint += [request.user.id, current_hour.isoformat()]
+    etag = quote_etag(hashlib.sha1(repr(fingerprint).encode()).hexdigest())  # noqa: S303
+    return etag, last_modified
+
+
+def invalidate_content_cache(sender, instance, **kwargs):
+    """Drops all cached content responses after the current transaction is committed"""
+    transaction.on_commit(_increment_content_version)
+
+
+def mark_user_content_modified(user_id: int) -> None:
+    """Changes validators of the user's content responses after the current transaction is committed"""
+    transaction.on_commit(partial(_set_user_content_modified_at, user_id))
+
+
+def _increment_content_version() -> None:
+    try:
+        with get_redis_client() as redis:
+            if redis:
+                with redis.pipeline() as pipeline:
+                    pipeline.incr(CONTENT_VERSION_KEY)
+                    pipeline.set(CONTENT_MODIFIED_AT_KEY, time.time())
+                    pipeline.execute()
+    except ConnectionError:
+        LOGGER.exception("Failed to connect to Redis to invalidate cached content.")
+
+
+def _set_user_content_modified_at(user_id: int) -> None:
+    try:
+        with get_redis_client() as redis:
+            if redis:
+                redis.set(_get_user_content_modified_at_key(user_id), time.time(), ex=USER_CONTENT_MODIFIED_AT_TTL)
+    except ConnectionError:
+        LOGGER.exception("Failed to connect to Redis to invalidate cached user content.")
+
+
+def _get_user_content_modified_at_key(user_id: int) -> str:
+    return f"content:user_modified_at:{user_id}"
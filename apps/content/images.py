@@ -0,0 +1,87 @@
+from io import BytesIO
+import logging
+import os
+
+from django.apps import apps as django_apps
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.fields.files import ImageFieldFile
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from apps.celery import app
+from apps.content.cache import invalidate_content_cache
+
+LOGGER = logging.getLogger("app")
+
+# widths of derivatives in pixels, images are never upscaled
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 1080]
+# formats of derivatives, formats not supported by the installed Pillow are skipped
+IMAGE_DERIVATIVE_FORMATS = ["avif", "webp"]
+IMAGE_DERIVATIVE_QUALITY = 80
+
+
+def get_supported_derivative_formats() -> list[str]:
+    return [image_format for image_format in IMAGE_DERIVATIVE_FORMATS if features.check(image_format)]
+
+
+def get_stale_image_fields(instance: Model) -> list[str]:
+    """Returns names of image fields of the instance whose derivatives are missing or were made from another file"""
+    return [
+        field_name
+        for field_name in instance.IMAGE_DERIVATIVE_FIELDS
+        if getattr(instance, field_name).name != instance.image_derivatives.get(field_name, {}).get("source", "")
+    ]
+
+
+def schedule_image_derivatives(sender, instance, **kwargs):
+    """Generates derivatives of new or changed images after the current transaction is committed"""
+    if field_names := get_stale_image_fields(instance):
+        label = instance._meta.label
+        transaction.on_commit(lambda: generate_image_derivatives.delay(label, instance.pk, field_names))
+
+
+@app.task
+def generate_image_derivatives(model_label: str, pk: int, field_names: list[str]):
+    """
+    Generates resized derivatives of the image fields in all supported formats and stores them next to the originals.
+    Names of the derivatives are saved to `image_derivatives` of the instance without firing `post_save`.
+    """
+    model = django_apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if not instance:
+        return
+    image_derivatives = dict(instance.image_derivatives)
+    for field_name in field_names:
+        field_file = getattr(instance, field_name)
+        if not field_file:
+            image_derivatives.pop(field_name, None)
+            continue
+        try:
+            image_derivatives[field_name] = {"source": field_file.name, **create_image_derivatives(field_file)}
+        except (OSError, UnidentifiedImageError):
+            LOGGER.exception("Failed to generate derivatives of [%s] of %s [%s].", field_name, model_label, pk)
+    model.objects.filter(pk=pk).update(image_derivatives=image_derivatives)
+    invalidate_content_cache(model, instance)
+
+
+def create_image_derivatives(field_file: ImageFieldFile) -> dict[str, dict[str, str]]:
+    """Stores derivatives of the image and returns their names by format and width, i.e. `{"webp": {"320": name}}`"""
+    storage = field_file.storage
+    with storage.open(field_file.name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    root, _extension = os.path.splitext(field_file.name)
+    widths = [width for width in IMAGE_DERIVATIVE_WIDTHS if width < image.width] or [image.width]
+    derivatives: dict[str, dict[str, str]] = {}
+    for width in widths:
+        resized_image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+        for image_format in get_supported_derivative_formats():
+            content = BytesIO()
+            resized_image.save(content, format=image_format, quality=IMAGE_DERIVATIVE_QUALITY)
+            name = f"{root}_{width}w.{image_format}"
+            # derivatives are always regenerated from the current original
+            storage.delete(name)
+            derivatives.setdefault(image_format, {})[str(width)] = storage.save(name, ContentFile(content.getvalue()))
+    return derivatives
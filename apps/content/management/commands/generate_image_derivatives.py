@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.content.images import generate_image_derivatives, get_stale_image_fields
+from apps.content.models import Article, Category, Period, SubCategory
+
+
+class Command(BaseCommand):
+    help = "Schedules generation of missing or outdated content image derivatives."  # noqa: A003
+
+    def handle(self, *args, **options):
+        scheduled = 0
+        for model in [Article, Category, Period, SubCategory]:
+            for instance in model.objects.iterator():
+                if field_names := get_stale_image_fields(instance):
+                    generate_image_derivatives.delay(model._meta.label, instance.pk, field_names)
+                    scheduled += 1
+        self.stdout.write(self.style.SUCCESS(f"Scheduled derivatives of {scheduled} objects."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.content.models import Article
+from apps.content.videos import is_video_stream_stale, package_article_video
+
+
+class Command(BaseCommand):
+    help = "Schedules HLS packaging of missing or outdated article video streams."  # noqa: A003
+
+    def handle(self, *args, **options):
+        scheduled = 0
+        for article in Article.objects.exclude(video="", video_stream={}).iterator():
+            if is_video_stream_stale(article):
+                package_article_video.delay(article.id)
+                scheduled += 1
+        self.stdout.write(self.style.SUCCESS(f"Scheduled packaging of {scheduled} videos."))
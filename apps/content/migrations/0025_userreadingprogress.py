@@ -0,0 +1,59 @@
+# Generated by Django 3.2.15 on 2026-10-19 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def fill_user_reading_progress(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    UserReadingProgress = apps.get_model("content", "UserReadingProgress")
+    program_articles = Q(user_articles__article__category__name__in=["CORE_PROGRAM", "INITIAL"])
+    users = User.objects.annotate(
+        articles_count=Count("user_articles", filter=program_articles & Q(user_articles__article__is_published=True)),
+        read_articles_count=Count("user_articles", filter=program_articles & Q(user_articles__is_read=True)),
+    ).values_list("id", "articles_count", "read_articles_count")
+    UserReadingProgress.objects.bulk_create(
+        [
+            UserReadingProgress(user_id=user_id, articles_count=articles_count, read_articles_count=read_count)
+            for user_id, articles_count, read_count in users.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("content", "0024_subcategory_parent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserReadingProgress",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "articles_count",
+                    models.PositiveIntegerField(default=0, help_text="Number of assigned published articles."),
+                ),
+                ("read_articles_count", models.PositiveIntegerField(default=0, help_text="Number of read articles.")),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reading_progress",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "User reading progress",
+            },
+        ),
+        migrations.RunPython(fill_user_reading_progress, migrations.RunPython.noop),
+    ]
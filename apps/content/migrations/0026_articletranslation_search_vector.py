@@ -0,0 +1,36 @@
+# Generated by Django 3.2.15 on 2026-10-19 15:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.content.search import update_article_search_vectors
+
+
+def fill_article_search_vectors(apps, schema_editor):
+    ArticleTranslation = apps.get_model("content", "ArticleTranslation")
+    update_article_search_vectors(ArticleTranslation.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0025_userreadingprogress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="articletranslation",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, help_text="Maintained on save.", null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="articletranslation",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="article_translation_search"
+            ),
+        ),
+        migrations.RunPython(fill_article_search_vectors, migrations.RunPython.noop),
+    ]
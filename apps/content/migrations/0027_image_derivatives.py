@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-19 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0026_articletranslation_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="image_derivatives",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, help_text="Resized images by field, format and width."
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="image_derivatives",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, help_text="Resized images by field, format and width."
+            ),
+        ),
+        migrations.AddField(
+            model_name="period",
+            name="image_derivatives",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, help_text="Resized images by field, format and width."
+            ),
+        ),
+        migrations.AddField(
+            model_name="subcategory",
+            name="image_derivatives",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, help_text="Resized images by field, format and width."
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0027_image_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="video_stream",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, help_text="HLS master playlist and poster of the video."
+            ),
+        ),
+    ]
@@ -3,6 +3,8 @@ import datetime
 from ckeditor.fields import RichTextField
 from ckeditor_uploader.fields import RichTextUploadingField
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.db import models
@@ -32,6 +34,26 @@ class UserArticle(BaseModel):
         constraints = [models.UniqueConstraint(fields=["article", "user"], name="One user per article")]
 
 
+class UserReadingProgress(BaseModel):
+    """
+    Denormalized counters of user's core program and initial articles, maintained whenever the user articles are
+    created, read or removed (see `apps.content.progress`).
+    """
+
+    user = models.OneToOneField(User, related_name="reading_progress", on_delete=models.CASCADE)
+    articles_count = models.PositiveIntegerField(default=0, help_text="Number of assigned published articles.")
+    read_articles_count = models.PositiveIntegerField(default=0, help_text="Number of read articles.")
+
+    class Meta:
+        verbose_name_plural = "User reading progress"
+
+    @property
+    def percent_of_read_articles(self) -> int:
+        if not self.read_articles_count or not self.articles_count:
+            return 0
+        return round(self.read_articles_count / self.articles_count * 100)
+
+
 class Article(BaseModel):
     name = models.CharField(help_text="Technical name.", unique=True, max_length=255)
     content_type = models.CharField(max_length=10, choices=ArticleType.get_choices())
@@ -44,6 +66,9 @@ class Article(BaseModel):
         validators=[FileExtensionValidator(["mp4"]), validate_size],
     )
     video_url = models.URLField(blank=True, default="")
+    video_stream = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="HLS master playlist and poster of the video."
+    )
     category = models.ForeignKey("Category", related_name="articles", on_delete=models.PROTECT)
     subcategory = models.ForeignKey(
         "SubCategory",
@@ -67,6 +92,11 @@ class Article(BaseModel):
     lifestyle_category = models.CharField(
         max_length=10, choices=LifeStyleCategories.get_choices(), blank=True, default=""
     )
+    image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Resized images by field, format and width."
+    )
+
+    IMAGE_DERIVATIVE_FIELDS = ["thumbnail", "article_image"]
 
     class Meta:
         ordering = ["ordering"]
@@ -151,9 +181,14 @@ class ArticleTranslation(BaseTranslationModel):
     sub_headline = RichTextField(blank=True)
     main_text = RichTextUploadingField(blank=True)
     description = models.CharField(max_length=255)
+    search_vector = SearchVectorField(null=True, editable=False, help_text="Maintained on save.")
 
     class Meta(BaseTranslationModel.Meta):
         constraints = [models.UniqueConstraint(fields=["language", "article"], name="One language per article")]
+        indexes = [
+            *BaseTranslationModel.Meta.indexes,
+            GinIndex(fields=["search_vector"], name="article_translation_search"),
+        ]
 
 
 class ContentRule(BaseModel):
@@ -215,6 +250,11 @@ class ContentRule(BaseModel):
 class Category(BaseModel):
     name = models.CharField(max_length=30)
     image = models.ImageField(upload_to="category_images")
+    image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Resized images by field, format and width."
+    )
+
+    IMAGE_DERIVATIVE_FIELDS = ["image"]
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -240,6 +280,11 @@ class SubCategory(BaseModel):
     parent = models.ForeignKey("SubCategory", related_name="subCategories", null=True, blank=True, default="", on_delete=models.CASCADE)
     name = models.CharField(max_length=30)
     image = models.ImageField(upload_to="subcategory_images")
+    image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Resized images by field, format and width."
+    )
+
+    IMAGE_DERIVATIVE_FIELDS = ["image"]
 
     class Meta:
         verbose_name_plural = "Subcategories"
@@ -269,6 +314,11 @@ class Period(BaseModel):
         unique=True,
     )
     ordering = models.PositiveIntegerField()
+    image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Resized images by field, format and width."
+    )
+
+    IMAGE_DERIVATIVE_FIELDS = ["image", "period_number_image"]
 
     def is_locked_old(self, user: User) -> bool:
         if not user.is_questionnaire_finished:
@@ -0,0 +1,70 @@
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import Count, Q, QuerySet
+
+from apps.content import CategoryName
+from apps.content.cache import mark_user_content_modified
+from apps.content.models import Article, UserArticle, UserReadingProgress
+from apps.users.models import User
+
+PROGRESS_CATEGORY_NAMES = [CategoryName.CORE_PROGRAM.value, CategoryName.INITIAL.value]
+
+
+def refresh_reading_progress(users: QuerySet) -> int:
+    """
+    Recounts `UserReadingProgress` counters of the users selected by `users` queryset with one
+    INSERT ... SELECT ... ON CONFLICT statement. It has to be called after user articles of the users are created, read
+    or removed without saving the models (bulk or raw queries). Returns number of refreshed users.
+    """
+    program_articles = Q(user_articles__article__category__name__in=PROGRESS_CATEGORY_NAMES)
+    counters = (
+        users.annotate(
+            articles_count=Count(
+                "user_articles", filter=program_articles & Q(user_articles__article__is_published=True)
+            ),
+            read_articles_count=Count("user_articles", filter=program_articles & Q(user_articles__is_read=True)),
+        )
+        .order_by()
+        .values("id", "articles_count", "read_articles_count")
+    )
+    counters_sql, params = counters.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(UserReadingProgress._meta.db_table)} "
+            "(created_at, updated_at, user_id, articles_count, read_articles_count) "
+            "SELECT now(), now(), counters.user_id, counters.articles_count, counters.read_articles_count "
+            f"FROM ({counters_sql}) AS counters(user_id, articles_count, read_articles_count) "
+            "ON CONFLICT (user_id) DO UPDATE SET updated_at = now(), "
+            "articles_count = EXCLUDED.articles_count, read_articles_count = EXCLUDED.read_articles_count",
+            params,
+        )
+        return cursor.rowcount
+
+
+def refresh_user_reading_progress(user_id: int) -> None:
+    refresh_reading_progress(User.objects.filter(id=user_id))
+    mark_user_content_modified(user_id)
+
+
+def mark_user_articles_as_read(user_id: int, article_ids: Iterable[int]) -> int:
+    """
+    Marks published articles as read by the user with one upsert, missing user articles are created. Time of reading
+    of already read articles is kept. Returns number of marked articles.
+    """
+    articles = Article.objects.filter(id__in=article_ids, is_published=True).order_by().values("id")
+    articles_sql, params = articles.query.sql_with_params()
+    user_articles_table = connection.ops.quote_name(UserArticle._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {user_articles_table} AS user_article "
+            "(created_at, updated_at, article_id, user_id, is_read, read_at) "
+            "SELECT now(), now(), read_articles.id, %s, true, now() "
+            f"FROM ({articles_sql}) AS read_articles(id) "
+            "ON CONFLICT (article_id, user_id) DO UPDATE SET updated_at = now(), is_read = true, "
+            "read_at = COALESCE(user_article.read_at, EXCLUDED.read_at)",
+            [user_id, *params],
+        )
+        marked_count = cursor.rowcount
+    refresh_user_reading_progress(user_id)
+    return marked_count
@@ -0,0 +1,174 @@
+import json
+import logging
+from typing import Iterable, NamedTuple, Optional, Union
+
+from django.db import transaction
+from django.db.models import Q
+from redis import StrictRedis
+from redis.exceptions import ConnectionError
+
+from apps.content import ComparisonOperator
+from apps.content.models import ContentRule
+from apps.questionnaire.models import UserQuestionnaire
+from apps.utils.helpers import get_redis_client
+
+LOGGER = logging.getLogger("app")
+
+COMPILED_RULES_REDIS_TTL = 24 * 60 * 60
+COMPILED_RULES_VERSION_KEY = "content_rules:version"
+
+COMPARISON_LOOKUPS = {
+    ComparisonOperator.IS_EQUAL_TO.value: "exact",
+    ComparisonOperator.IS_LESS_THAN.value: "lt",
+    ComparisonOperator.IS_GREATER_THAN.value: "gt",
+}
+
+RuleValue = Union[str, bool]
+
+
+class CompiledArticleRules(NamedTuple):
+    """
+    Article rules compiled into groups of conditions per user questionnaire field. Conditions for the same field are
+    combined with OR and the groups of different fields with AND. An article without rules matches every questionnaire.
+    """
+
+    article_id: int
+    # ((field name, ((lookup, value), ...)), ...)
+    groups: tuple[tuple[str, tuple[tuple[str, RuleValue], ...]], ...]
+
+    @classmethod
+    def compile(cls, article_id: int, rules: Iterable[ContentRule]) -> "CompiledArticleRules":
+        conditions_by_field: dict[str, list[tuple[str, RuleValue]]] = {}
+        for rule in sorted(rules, key=lambda rule: rule.user_questionnaire_variable):
+            field = UserQuestionnaire._meta.get_field(rule.user_questionnaire_variable.lower())
+            conditions_by_field.setdefault(field.name, []).append(
+                (COMPARISON_LOOKUPS[rule.comparison_operator], field.to_python(rule.value))
+            )
+        return cls(article_id, tuple((name, tuple(conditions)) for name, conditions in conditions_by_field.items()))
+
+    @classmethod
+    def from_json(cls, value: Union[str, bytes]) -> "CompiledArticleRules":
+        article_id, groups = json.loads(value)
+        return cls(article_id, tuple((name, tuple(map(tuple, conditions))) for name, conditions in groups))
+
+    def to_json(self) -> str:
+        return json.dumps([self.article_id, self.groups])
+
+    def as_q(self) -> Q:
+        """Returns `UserQuestionnaire` filter for bulk rebuilds"""
+        query = Q()
+        for name, conditions in self.groups:
+            group_query = Q()
+            for lookup, value in conditions:
+                group_query |= Q(**{f"{name}__{lookup}": value})
+            query &= group_query
+        return query
+
+    def matches(self, questionnaire: UserQuestionnaire) -> bool:
+        """Evaluates the rules against one questionnaire in memory"""
+        return all(
+            any(_compare(getattr(questionnaire, name), lookup, value) for lookup, value in conditions)
+            for name, conditions in self.groups
+        )
+
+
+def _compare(answer: Optional[RuleValue], lookup: str, value: RuleValue) -> bool:
+    if answer is None:
+        # the same as NULL in SQL comparison
+        return False
+    if lookup == "exact":
+        return answer == value
+    if lookup == "lt":
+        return answer < value
+    return answer > value
+
+
+class CompiledRulesCache:
+    """
+    In-process cache of compiled article rules backed by Redis. All entries are versioned by a single Redis counter,
+    which is incremented after any rule is changed, so every process drops its stale entries on the next lookup.
+    Without Redis the version can't be checked, so the rules are compiled from the database on every lookup.
+    """
+
+    def __init__(self) -> None:
+        self.version: Optional[int] = None
+        self.rules: dict[int, CompiledArticleRules] = {}
+
+    def get_many(self, article_ids: Iterable[int]) -> dict[int, CompiledArticleRules]:
+        article_ids = set(article_ids)
+        try:
+            with get_redis_client() as redis:
+                return self._get_many(article_ids, redis)
+        except ConnectionError:
+            LOGGER.exception("Failed to connect to Redis to retrieve compiled content rules.")
+            return self._get_many(article_ids, None)
+
+    def get(self, article_id: int) -> CompiledArticleRules:
+        return self.get_many([article_id])[article_id]
+
+    def invalidate(self, article_id: int) -> None:
+        self.rules.pop(article_id, None)
+        try:
+            with get_redis_client() as redis:
+                if redis:
+                    redis.delete(self._get_key(article_id))
+        except ConnectionError:
+            LOGGER.exception("Failed to connect to Redis to invalidate compiled content rules.")
+        # rules could be cached again by other processes before the transaction is committed
+        transaction.on_commit(self._increment_version)
+
+    def _get_many(self, article_ids: set[int], redis: Optional[StrictRedis]) -> dict[int, CompiledArticleRules]:
+        if not redis:
+            # the in-process entries may have been changed by other processes
+            self.version = None
+            self.rules = {}
+            return self._compile(article_ids)
+
+        version = int(redis.get(COMPILED_RULES_VERSION_KEY) or 0)
+        if version != self.version:
+            self.version = version
+            self.rules = {}
+
+        missing_ids = [article_id for article_id in article_ids if article_id not in self.rules]
+        if missing_ids:
+            for value in redis.mget([self._get_key(article_id) for article_id in missing_ids]):
+                if value is not None:
+                    compiled_rules = CompiledArticleRules.from_json(value)
+                    self.rules[compiled_rules.article_id] = compiled_rules
+            missing_ids = [article_id for article_id in missing_ids if article_id not in self.rules]
+
+        if missing_ids:
+            compiled = self._compile(missing_ids)
+            self.rules.update(compiled)
+            with redis.pipeline() as pipeline:
+                for compiled_rules in compiled.values():
+                    pipeline.setex(
+                        self._get_key(compiled_rules.article_id), COMPILED_RULES_REDIS_TTL, compiled_rules.to_json()
+                    )
+                pipeline.execute()
+
+        return {article_id: self.rules[article_id] for article_id in article_ids}
+
+    @staticmethod
+    def _compile(article_ids: Iterable[int]) -> dict[int, CompiledArticleRules]:
+        rules_by_article: dict[int, list[ContentRule]] = {article_id: [] for article_id in article_ids}
+        for rule in ContentRule.objects.filter(article_id__in=rules_by_article):
+            rules_by_article[rule.article_id].append(rule)
+        return {
+            article_id: CompiledArticleRules.compile(article_id, rules)
+            for article_id, rules in rules_by_article.items()
+        }
+
+    def _get_key(self, article_id: int) -> str:
+        return f"content_rules:{self.version or 0}:{article_id}"
+
+    def _increment_version(self) -> None:
+        try:
+            with get_redis_client() as redis:
+                if redis:
+                    redis.incr(COMPILED_RULES_VERSION_KEY)
+        except ConnectionError:
+            LOGGER.exception("Failed to connect to Redis to invalidate compiled content rules.")
+
+
+COMPILED_RULES_CACHE = CompiledRulesCache()
@@ -0,0 +1,32 @@
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import QuerySet
+
+from apps.content import DEFAULT_SEARCH_CONFIG, SEARCH_CONFIGS
+
+
+def get_search_config(language_code: str) -> str:
+    return SEARCH_CONFIGS.get(language_code, DEFAULT_SEARCH_CONFIG)
+
+
+def get_article_search_vector(language_code: str) -> SearchVector:
+    """Returns weighted search vector of an article translation, title matches are ranked the highest"""
+    config = get_search_config(language_code)
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("headline", weight="B", config=config)
+        + SearchVector("description", weight="C", config=config)
+        + SearchVector("main_text", weight="D", config=config)
+    )
+
+
+def get_article_search_query(text: str, language_code: str) -> SearchQuery:
+    return SearchQuery(text, config=get_search_config(language_code), search_type="websearch")
+
+
+def update_article_search_vectors(translations: QuerySet) -> None:
+    """Stores search vectors of article translations with one UPDATE per language"""
+    language_codes = translations.order_by().values_list("language_id", flat=True).distinct()
+    for language_code in list(language_codes):
+        translations.filter(language_id=language_code).update(
+            search_vector=get_article_search_vector(language_code)
+        )
@@ -3,7 +3,33 @@ from rest_framework import serializers
 from apps.content.models import Article, Category, Period, SubCategory
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ImageSrcsetMixin:
+    """Builds urls of resized images of an image field by format and width, i.e. `{"webp": {"320": "https://..."}}`"""
+
+    def get_image_field_srcset(self, obj, field_name: str) -> dict:
+        request = self.context.get("request")
+        derivatives = obj.image_derivatives.get(field_name, {})
+        # derivatives of the previous image are not used
+        if not request or derivatives.get("source") != getattr(obj, field_name).name:
+            return {}
+        domain = request.get_host()
+        storage = obj._meta.get_field(field_name).storage
+        return {
+            image_format: {width: f"https://{domain}{storage.url(name)}" for width, name in names.items()}
+            for image_format, names in derivatives.items()
+            if image_format != "source"
+        }
+
+
+class ArticleIdsSerializer(serializers.Serializer):
+    article_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+
+
+class ArticleSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, help_text="Search text, i.e. `vitamin -oil`")
+
+
+class ArticleSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     subtitle = serializers.SerializerMethodField()
     headline = serializers.SerializerMethodField()
@@ -12,7 +38,11 @@ class ArticleSerializer(serializers.ModelSerializer):
     description = serializers.SerializerMethodField()
     is_read = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     article_image = serializers.SerializerMethodField()
+    article_image_srcset = serializers.SerializerMethodField()
+    video_manifest = serializers.SerializerMethodField()
+    video_poster = serializers.SerializerMethodField()
 
     def get_title(self, obj):
         if getattr(obj, "user_translations", None):
@@ -62,6 +92,25 @@ class ArticleSerializer(serializers.ModelSerializer):
                 return url
         return None
 
+    def get_thumbnail_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "thumbnail")
+
+    def get_article_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "article_image")
+
+    def get_video_manifest(self, obj):
+        return self._get_video_stream_url(obj, "manifest")
+
+    def get_video_poster(self, obj):
+        return self._get_video_stream_url(obj, "poster")
+
+    def _get_video_stream_url(self, obj, name: str):
+        request = self.context.get("request")
+        # the stream of the previous video is not used
+        if not request or not obj.video or obj.video_stream.get("source") != obj.video.name:
+            return None
+        return f"https://{request.get_host()}{obj.video.storage.url(obj.video_stream[name])}"
+
     def get_is_read(self, obj):
         return obj.user_article[0].is_read if obj.user_article else False
 
@@ -80,8 +129,12 @@ class ArticleSerializer(serializers.ModelSerializer):
             "is_read",
             "content_type",
             "thumbnail",
+            "thumbnail_srcset",
             "article_image",
+            "article_image_srcset",
             "video",
+            "video_manifest",
+            "video_poster",
             "video_url",
             "category",
             "subcategory",
@@ -92,9 +145,10 @@ class ArticleSerializer(serializers.ModelSerializer):
         ]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     def get_title(self, obj):
         if getattr(obj, "user_translations", None):
@@ -106,16 +160,20 @@ class CategorySerializer(serializers.ModelSerializer):
             return obj.user_translations[0].description
         return ""
 
+    def get_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "image")
+
     class Meta:
         model = Category
-        fields = "__all__"
+        exclude = ["image_derivatives"]
 
 
-class CategoryDetailSerializer(serializers.ModelSerializer):
+class CategoryDetailSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
     subcategories = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     def get_title(self, obj):
         if getattr(obj, "user_translations", None):
             return obj.user_translations[0].title
@@ -132,20 +190,23 @@ class CategoryDetailSerializer(serializers.ModelSerializer):
                 url = f'https://{domain}{obj.image.url}'
                 return url
         return None
+    def get_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "image")
     def get_subcategories(self, obj):
         subcategories = obj.subcategories.all()
         return SubCategorySerializer(subcategories, many=True, context=self.context).data
     class Meta:
         model = Category
-        fields = ['id', 'name', 'image', 'title', 'description', 'subcategories']
+        fields = ['id', 'name', 'image', 'image_srcset', 'title', 'description', 'subcategories']
 
 
-class SubCategorySerializer(serializers.ModelSerializer):
+class SubCategorySerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
     subcategories_count = serializers.SerializerMethodField()
     articles_count = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     def get_title(self, obj):
         if getattr(obj, "user_translations", None):
@@ -166,22 +227,41 @@ class SubCategorySerializer(serializers.ModelSerializer):
                 return url
         return None
 
+    def get_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "image")
+
     def get_subcategories_count(self, obj):
+        if hasattr(obj, "children_count"):
+            return obj.children_count
         return obj.subCategories.count()
 
     def get_articles_count(self, obj):
+        if hasattr(obj, "published_articles_count"):
+            return obj.published_articles_count
         return obj.articles.filter(is_published=True).count()
 
     class Meta:
         model = SubCategory
-        fields = ['id', 'category', 'parent', 'name', 'image', 'title', 'description', 'subcategories_count', 'articles_count']
+        fields = [
+            'id',
+            'category',
+            'parent',
+            'name',
+            'image',
+            'image_srcset',
+            'title',
+            'description',
+            'subcategories_count',
+            'articles_count',
+        ]
 
-class SubCategoryDetailSerializer(serializers.ModelSerializer):
+class SubCategoryDetailSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
     subCategories = serializers.SerializerMethodField()
     articles = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     def get_title(self, obj):
         if getattr(obj, "user_translations", None):
@@ -202,25 +282,42 @@ class SubCategoryDetailSerializer(serializers.ModelSerializer):
                 return url
         return None
 
+    def get_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "image")
+
     def get_subCategories(self, obj):
         children = obj.subCategories.all()
         serializer = SubCategorySerializer(children, many=True, context=self.context)
         return serializer.data
 
     def get_articles(self, obj):
-        articles = obj.articles.filter(is_published=True)
+        # only published articles are prefetched
+        articles = obj.articles.all()
         return ArticleSerializer(articles, many=True, context=self.context).data
 
     class Meta:
         model = SubCategory
-        fields = ['id', 'category', 'parent', 'name', 'image', 'title', 'description', 'subCategories', 'articles']
+        fields = [
+            'id',
+            'category',
+            'parent',
+            'name',
+            'image',
+            'image_srcset',
+            'title',
+            'description',
+            'subCategories',
+            'articles',
+        ]
 
 
-class PeriodSerializer(serializers.ModelSerializer):
+class PeriodSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     subtitle = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
     is_locked = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    period_number_image_srcset = serializers.SerializerMethodField()
     articles = ArticleSerializer(source="user_articles", many=True)
 
     def get_title(self, obj):
@@ -242,9 +339,15 @@ class PeriodSerializer(serializers.ModelSerializer):
         intro_user_article = self.context["intro_user_article"]
         return obj.is_locked(intro_user_article)
 
+    def get_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "image")
+
+    def get_period_number_image_srcset(self, obj):
+        return self.get_image_field_srcset(obj, "period_number_image")
+
     class Meta:
         model = Period
-        exclude = ("unlocks_after_week",)
+        exclude = ("unlocks_after_week", "image_derivatives")
 
 
 class PeriodSerializerOld(PeriodSerializer):
@@ -253,4 +356,4 @@ class PeriodSerializerOld(PeriodSerializer):
 
     class Meta:
         model = Period
-        exclude = ("unlocks_after_week",)
+        exclude = ("unlocks_after_week", "image_derivatives")
@@ -1,25 +1,93 @@
-from typing import Union
+from contextlib import contextmanager
+import logging
+from typing import Iterator
 
-from django.db.models import Q
+from django.db import connection
+from django.db.models import Exists, Max, Min, OuterRef, QuerySet
 from django.db.models.signals import post_delete, post_init, post_save
+from redis.exceptions import ConnectionError
 
 from apps.celery import app
-from apps.content import ComparisonOperator, CategoryName
-from apps.content.models import Article, ContentRule, UserArticle
+from apps.content import CategoryName
+from apps.content.cache import invalidate_content_cache
+from apps.content.models import (
+    Article,
+    ArticleTranslation,
+    Category,
+    CategoryTranslation,
+    ContentRule,
+    Period,
+    PeriodTranslation,
+    SubCategory,
+    SubCategoryTranslation,
+    UserArticle,
+)
+from apps.content.images import schedule_image_derivatives
+from apps.content.progress import PROGRESS_CATEGORY_NAMES, refresh_reading_progress, refresh_user_reading_progress
+from apps.content.rules import COMPILED_RULES_CACHE
+from apps.content.search import get_article_search_vector
+from apps.content.videos import schedule_video_packaging
+from apps.home.models import AboutAndNoticeSection, AboutAndNoticeSectionTranslation
 from apps.questionnaire.models import UserQuestionnaire
 from apps.users.models import User
+from apps.utils.helpers import get_redis_client
+
+LOGGER = logging.getLogger("app")
+
+# relations are rebuilt in ranges of user ids, so a single statement never touches all users
+USER_ARTICLE_REBUILD_CHUNK_SIZE = 50000
+# all rebuild triggers of an article within the delay are collapsed into a single rebuild
+USER_ARTICLE_REBUILD_DELAY = 10
+# the pending rebuild is forgotten after the timeout in case the scheduled task is lost
+USER_ARTICLE_REBUILD_PENDING_TIMEOUT = 10 * 60
+# the lock is released after the timeout in case the worker running the rebuild is killed
+USER_ARTICLE_REBUILD_LOCK_TIMEOUT = 60 * 60
 
 
-def _construct_next_query(rule: ContentRule, user_questionnaire_value: Union[str, bool]) -> Q:
-    if rule.comparison_operator == ComparisonOperator.IS_EQUAL_TO.value:
-        query = Q(**{rule.user_questionnaire_variable.lower(): user_questionnaire_value})
+def schedule_user_article_relationship_rebuild(article_id: int) -> None:
+    """
+    Schedules `create_user_article_relationship` task for the article after `USER_ARTICLE_REBUILD_DELAY` seconds,
+    unless a rebuild of the article is already pending. Without redis the task is scheduled immediately.
+    """
+    try:
+        with get_redis_client() as redis:
+            if redis and not redis.set(
+                _get_rebuild_pending_key(article_id), 1, nx=True, ex=USER_ARTICLE_REBUILD_PENDING_TIMEOUT
+            ):
+                return
+            countdown = USER_ARTICLE_REBUILD_DELAY if redis else None
+    except ConnectionError:
+        LOGGER.exception("Failed to connect to Redis to debounce user article relationship rebuild.")
+        countdown = None
+    create_user_article_relationship.apply_async((article_id,), countdown=countdown)
+
+
+@contextmanager
+def _lock_user_article_relationship_rebuild(article_id: int) -> Iterator[bool]:
+    """
+    Clears the pending rebuild of the article and yields True if the rebuild lock was acquired, False if the article is
+    being rebuilt by another worker. Without redis the rebuild is not locked.
+    """
+    with get_redis_client() as redis:
+        lock = None
+        is_acquired = True
+        if redis:
+            try:
+                redis.delete(_get_rebuild_pending_key(article_id))
+                lock = redis.lock(f"content:user_articles_rebuild_lock:{article_id}", USER_ARTICLE_REBUILD_LOCK_TIMEOUT)
+                is_acquired = lock.acquire(blocking=False)
+            except ConnectionError:
+                LOGGER.exception("Failed to connect to Redis to lock user article relationship rebuild.")
+                lock = None
+        try:
+            yield is_acquired
+        finally:
+            if lock and is_acquired:
+                lock.release()
 
-    if rule.comparison_operator == ComparisonOperator.IS_LESS_THAN.value:
-        query = Q(**{f"{rule.user_questionnaire_variable.lower()}__lt": user_questionnaire_value})
 
-    if rule.comparison_operator == ComparisonOperator.IS_GREATER_THAN.value:
-        query = Q(**{f"{rule.user_questionnaire_variable.lower()}__gt": user_questionnaire_value})
-    return query
+def _get_rebuild_pending_key(article_id: int) -> str:
+    return f"content:user_articles_rebuild_pending:{article_id}"
 
 
 @app.task
@@ -29,51 +97,90 @@ def create_user_article_relationship(article_id: int):
     filters the user questionnaires whose users should be connected to article through the intermediary UserArticle
     model.
 
-    The rule queryset is ordered by user questionnaire variables used in rules.
-    The queries for two or more rules using the same user questionnaire variable are combined with an OR.
-
-    When the rule user questionnaire variable changes, the previously combined query is applied using filter.
-    Then the next query for another user questionnaire variable in line starts being combined.
-
-    Following the above logic, the queries for the rules with the same variables are combined with OR. When the field
-    changes, the next query will be applied with an AND.
-    """
-    filtered_questionnaires = UserQuestionnaire.objects.all()
-    query = Q()
-
-    # The used_user_questionnaire_variable below is used in the loop to check whether a specific rule has the same
-    # field name as the previous one
-    used_user_questionnaire_variable = None
-    article = Article.objects.get(id=article_id)
-    for rule in article.rules.order_by("user_questionnaire_variable"):
-        # Here we loop though the rules ordered by field name. We combine queries from several rules with the same
-        # field name with "OR" and once the field name changes, we apply the query.
-        # Hence the example final queryset will be retrieved like this:
-        # UserQuestionnaire.objects.filter(query1).filter(query2).filter(query3).filter(query4)...
-        # and each time a new filter() is applied it results in and AND operation (with OR inside the particular query,
-        # if there is more than one rule for same field name).
-
-        next_query = _construct_next_query(rule, rule.value)
-        if not used_user_questionnaire_variable or used_user_questionnaire_variable == rule.user_questionnaire_variable:
-            query = query | next_query
-        else:
-            filtered_questionnaires = filtered_questionnaires.filter(query)
-            query = next_query
-        used_user_questionnaire_variable = rule.user_questionnaire_variable
+    The rules are compiled (and cached) by `COMPILED_RULES_CACHE`: the queries for two or more rules using the same
+    user questionnaire variable are combined with an OR, and the queries for different variables with an AND.
+
+    The task should be scheduled with `schedule_user_article_relationship_rebuild`. Relations of the same article are
+    never rebuilt concurrently, if the article is already being rebuilt, the task is scheduled again.
+    """
+    with _lock_user_article_relationship_rebuild(article_id) as is_locked:
+        if not is_locked:
+            LOGGER.info("Relations of article [%s] are already being rebuilt, rescheduling.", article_id)
+            schedule_user_article_relationship_rebuild(article_id)
+            return
+        article = Article.objects.filter(id=article_id).first()
+        if article:
+            _rebuild_user_article_relationship(article)
+
+
+def _rebuild_user_article_relationship(article: Article) -> None:
+    filtered_questionnaires = UserQuestionnaire.objects.filter(COMPILED_RULES_CACHE.get(article.id).as_q())
+
+    # The relations are rebuilt inside Postgres without loading user ids, one range of user ids at a time
+    for start_user_id, end_user_id in _get_user_id_ranges():
+        questionnaires = filtered_questionnaires.filter(user_id__gte=start_user_id, user_id__lt=end_user_id)
+
+        # The below deletion is needed in case a new rule is added to the existing article.
+        # In that case the related user set for the article will be recalculated, and some of the
+        # intermediary connections (UserArticle instances) should be removed,
+        # otherwise the article will be shown to the wrong users.
+        removed_user_ids = delete_user_articles(
+            UserArticle.objects.filter(article=article, user_id__gte=start_user_id, user_id__lt=end_user_id).filter(
+                ~Exists(questionnaires.filter(user_id=OuterRef("user_id")))
+            )
+        )
+        added_user_ids = insert_user_articles(article.id, questionnaires.values("user_id"))
+        # only the users whose relations were changed are recounted
+        if changed_user_ids := removed_user_ids + added_user_ids:
+            refresh_reading_progress(User.objects.filter(id__in=changed_user_ids))
+
+
+def insert_user_articles(article_id: int, user_ids: QuerySet) -> list[int]:
+    """
+    Creates relations between the article and users selected by `user_ids` queryset (a single column of user ids)
+    with one INSERT ... SELECT statement. Existing relations are kept. Returns ids of users with created relations.
+    """
+    user_ids_sql, params = user_ids.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(UserArticle._meta.db_table)} "
+            "(created_at, updated_at, article_id, user_id, is_read) "
+            f"SELECT now(), now(), %s, eligible_users.user_id, false FROM ({user_ids_sql}) AS eligible_users(user_id) "
+            "ON CONFLICT (article_id, user_id) DO NOTHING RETURNING user_id",
+            [article_id, *params],
+        )
+        return [user_id for (user_id,) in cursor.fetchall()]
 
-    # The line below applies the last constructed query in the loop (doesn't matter if it is formed from
-    # one or more rules), because, the loop is always one step behind the query - it is applying the query
-    # constructed in previous loop, therefore missing the last query
-    user_ids = filtered_questionnaires.filter(query).select_related("user").values_list("user", flat=True)
 
-    # The below deletion is needed in case a new rule is added to the existing article.
-    # In that case the related user set for the article will be recalculated, and some of the
-    # intermediary connections (UserArticle instances) should be removed,
-    # otherwise the article will be shown to the wrong users.
-    UserArticle.objects.filter(article=article).exclude(user__in=user_ids).delete()
+def delete_user_articles(user_articles: QuerySet) -> list[int]:
+    """
+    Deletes user articles selected by `user_articles` queryset with one DELETE statement without sending signals.
+    Returns ids of users of the deleted relations.
+    """
+    user_article_ids_sql, params = user_articles.order_by().values("id").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(UserArticle._meta.db_table)} "
+            f"WHERE id IN ({user_article_ids_sql}) RETURNING user_id",
+            params,
+        )
+        return [user_id for (user_id,) in cursor.fetchall()]
 
-    user_article_objects = [UserArticle(article=article, user_id=user_id) for user_id in user_ids]  # type: ignore
-    UserArticle.objects.bulk_create(user_article_objects, ignore_conflicts=True)
+
+@app.task
+def refresh_reading_progress_of_all_users():
+    """Recounts reading progress of all users, one range of user ids at a time"""
+    for start_user_id, end_user_id in _get_user_id_ranges():
+        refresh_reading_progress(User.objects.filter(id__gte=start_user_id, id__lt=end_user_id))
+
+
+def _get_user_id_ranges() -> Iterator[tuple[int, int]]:
+    chunk_size = USER_ARTICLE_REBUILD_CHUNK_SIZE
+    user_id_range = User.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+    if user_id_range["min_id"] is None:
+        return
+    for start_user_id in range(user_id_range["min_id"], user_id_range["max_id"] + 1, chunk_size):
+        yield start_user_id, start_user_id + chunk_size
 
 
 def create_user_article_relationship_when_rule_is_saved_or_deleted(sender, instance, **kwargs):
@@ -81,9 +188,10 @@ def create_user_article_relationship_when_rule_is_saved_or_deleted(sender, insta
     Every time a rule is created or updated we need to recalculate the set of article users and create
     corresponding relations or delete unnecessary ones
     """
+    COMPILED_RULES_CACHE.invalidate(instance.article_id)
     article = instance.article
     if article.is_published:
-        create_user_article_relationship.delay(article.id)
+        schedule_user_article_relationship_rebuild(article.id)
 
 
 def create_user_article_relationship_when_article_is_created_or_updated(sender, instance, created, **kwargs):
@@ -93,19 +201,34 @@ def create_user_article_relationship_when_article_is_created_or_updated(sender,
 
     When a core program article is updated, user article relationships for the
     article are reassessed only if the article's `is_published` state changed and changed to True.
+    When it is unpublished, the relations are kept, but the reading progress of all users is recounted.
     """
     if (
         instance.category.name == CategoryName.CORE_PROGRAM.value
         or instance.category.name == CategoryName.INITIAL.value
     ):
         if created and instance.is_published:
-            user_article_objects = [UserArticle(article=instance, user=user) for user in User.objects.all()]
-            UserArticle.objects.bulk_create(user_article_objects, ignore_conflicts=True)
+            for start_user_id, end_user_id in _get_user_id_ranges():
+                users = User.objects.filter(id__gte=start_user_id, id__lt=end_user_id)
+                if added_user_ids := insert_user_articles(instance.id, users.values("id")):
+                    refresh_reading_progress(User.objects.filter(id__in=added_user_ids))
         elif instance.is_published and instance.is_published != instance.previous_is_published_state:
-            create_user_article_relationship.delay(instance.id)
+            schedule_user_article_relationship_rebuild(instance.id)
+        elif not created and instance.is_published != instance.previous_is_published_state:
+            refresh_reading_progress_of_all_users.delay()
         instance.previous_is_published_state = instance.is_published
 
 
+def refresh_reading_progress_when_article_is_deleted(sender, instance, **kwargs):
+    if instance.category.name in PROGRESS_CATEGORY_NAMES:
+        refresh_reading_progress_of_all_users.delay()
+
+
+def refresh_reading_progress_when_user_article_is_saved(sender, instance, **kwargs):
+    """Bulk changes of user articles refresh the reading progress explicitly"""
+    refresh_user_reading_progress(instance.user_id)
+
+
 def create_user_article_relationships_when_user_questionnaire_is_saved(sender, instance, **kwargs):
     create_user_article_relationships_when_user_questionnaire_is_saved_task.delay(user_id=instance.user_id)
 
@@ -116,23 +239,44 @@ def create_user_article_relationships_when_user_questionnaire_is_saved_task(
 ):
     """
     Every time user's questionnaire is created or updated, we need to reassess all core program's
-    user article (published) relations to include this user, but only for the articles that have rules.
+    user article (published) relations of this user.
 
-    For all the articles with no rules we just create a user article relationship for the user whose
-    questionnaire is being saved
+    Compiled rules of every article are evaluated in memory against the saved questionnaire only, relations of the
+    articles which match are created and the rest are deleted. Articles with no rules match every questionnaire.
     """
-    all_published_articles = Article.objects.filter(
+    questionnaire = UserQuestionnaire.objects.filter(user_id=user_id).first()
+    if not questionnaire:
+        return
+    all_published_article_ids = Article.objects.filter(
         category__name=CategoryName.CORE_PROGRAM.value, is_published=True
-    ).prefetch_related("rules")
-    for article in all_published_articles:
-        if article.rules.all():
-            create_user_article_relationship.delay(article.id)
+    ).values_list("id", flat=True)
+    matching_article_ids = []
+    not_matching_article_ids = []
+    for article_id, compiled_rules in COMPILED_RULES_CACHE.get_many(all_published_article_ids).items():
+        if compiled_rules.matches(questionnaire):
+            matching_article_ids.append(article_id)
         else:
-            UserArticle.objects.get_or_create(article=article, user_id=user_id)
+            not_matching_article_ids.append(article_id)
+
+    UserArticle.objects.filter(user_id=user_id, article_id__in=not_matching_article_ids).delete()
+    UserArticle.objects.bulk_create(
+        [UserArticle(article_id=article_id, user_id=user_id) for article_id in matching_article_ids],
+        ignore_conflicts=True,
+    )
+    refresh_user_reading_progress(user_id)
+
+
+def update_article_translation_search_vector(sender, instance, **kwargs):
+    ArticleTranslation.objects.filter(id=instance.id).update(
+        search_vector=get_article_search_vector(instance.language_id)
+    )
 
 
 post_init.connect(Article.remember_is_published_state, sender=Article)
 post_save.connect(create_user_article_relationship_when_article_is_created_or_updated, sender=Article)
+post_delete.connect(refresh_reading_progress_when_article_is_deleted, sender=Article)
+post_save.connect(refresh_reading_progress_when_user_article_is_saved, sender=UserArticle)
+post_save.connect(update_article_translation_search_vector, sender=ArticleTranslation)
 
 post_save.connect(create_user_article_relationship_when_rule_is_saved_or_deleted, sender=ContentRule)
 post_delete.connect(create_user_article_relationship_when_rule_is_saved_or_deleted, sender=ContentRule)
@@ -141,3 +285,26 @@ post_save.connect(
     create_user_article_relationships_when_user_questionnaire_is_saved,
     sender=UserQuestionnaire,
 )
+
+# cached content responses are invalidated when any content they are built from changes
+for content_model in [
+    AboutAndNoticeSection,
+    AboutAndNoticeSectionTranslation,
+    Article,
+    ArticleTranslation,
+    Category,
+    CategoryTranslation,
+    # rules change the articles assigned to users
+    ContentRule,
+    Period,
+    PeriodTranslation,
+    SubCategory,
+    SubCategoryTranslation,
+]:
+    post_save.connect(invalidate_content_cache, sender=content_model)
+    post_delete.connect(invalidate_content_cache, sender=content_model)
+
+for image_model in [Article, Category, Period, SubCategory]:
+    post_save.connect(schedule_image_derivatives, sender=image_model)
+
+post_save.connect(schedule_video_packaging, sender=Article)
@@ -1,13 +1,22 @@
 import datetime
+import io
+import json
+from unittest.mock import patch
 
 from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_bakery.baker import make
 from parameterized import parameterized
+from PIL import Image
 from rest_framework import status
 
 from apps.content import CategoryName, LifeStyleCategories, SubCategoryName
+from apps.content.images import generate_image_derivatives
+from apps.content.videos import VIDEO_PACKAGING_RETRY_DELAY, package_article_video
 from apps.content.models import (
     Article,
     ArticleTranslation,
@@ -18,6 +27,7 @@ from apps.content.models import (
     SubCategory,
     SubCategoryTranslation,
     UserArticle,
+    UserReadingProgress,
 )
 from apps.utils.tests_utils import BaseTestCase
 
@@ -326,6 +336,141 @@ class ContentTests(BaseTestCase):
         self.assertEqual(response.json()["results"][1]["name"], snacks_subcategory.name)
         self.assertIn(snacks_subcategory.image.url, response.json()["results"][1]["image"])
 
+    def test_category_detail_subcategory_counts_are_annotated(self):
+        url = reverse("categories-detail", kwargs={"pk": str(self.category.id)})
+        with CaptureQueriesContext(connection) as queries:
+            self.get(url)
+        for _ in range(3):
+            subcategory = make(SubCategory, category=self.category, parent=None)
+            make(SubCategory, category=self.category, parent=subcategory)
+            make(Article, category=self.category, subcategory=subcategory, is_published=True, _quantity=2)
+            make(Article, category=self.category, subcategory=subcategory, is_published=False)
+
+        # the number of queries doesn't depend on the number of subcategories
+        with self.assertNumQueries(len(queries)):
+            response = self.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        parents = [item for item in response.json()["subcategories"] if item["parent"] is None]
+        self.assertEqual(len(parents), 3)
+        for item in parents:
+            self.assertEqual(item["subcategories_count"], 1)
+            self.assertEqual(item["articles_count"], 2)
+
+    @patch("apps.content.cache.get_redis_client")
+    def test_categories_list_is_cached_until_content_changes(self, get_redis_client_mock):
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.get.return_value = None
+        redis.mget.return_value = [None, None]
+        url = reverse("categories-list")
+
+        response = self.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        key, _ttl, data = redis.setex.call_args.args
+        self.assertTrue(key.startswith(f"content:0:{self.language.code}:"))
+        self.assertEqual(json.loads(data), response.json())
+
+        redis.get.side_effect = [b"0", data]
+        self.assertEqual(self.get(url).json(), response.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make(CategoryTranslation, language=self.language, category=self.initial_category)
+        redis.incr.assert_called_with("content:version")
+
+    @patch("apps.content.cache.get_redis_client")
+    def test_unchanged_content_is_not_modified(self, get_redis_client_mock):
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.get.return_value = None
+        redis.mget.return_value = [b"3", b"1700000000.5"]
+        url = reverse("categories-list")
+
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Last-Modified"], "Tue, 14 Nov 2023 22:13:20 GMT")
+
+        response = self.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        redis.mget.return_value = [b"4", b"1700000100.5"]
+        response = self.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @patch("apps.content.cache.get_redis_client")
+    def test_periods_are_not_modified_until_user_articles_change(self, get_redis_client_mock):
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.mget.return_value = [b"3", b"1700000000.5", None]
+        url = reverse("periods-list")
+
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(reverse("articles-mark-as-read", kwargs={"pk": self.article_1.id}))
+        user_key, _modified_at = redis.set.call_args.args
+        self.assertEqual(user_key, f"content:user_modified_at:{self.user.id}")
+
+    @patch(
+        "apps.content.videos.create_video_stream",
+        return_value={"manifest": "videos/video_hls/master.m3u8", "poster": "videos/video_hls/poster.jpg"},
+    )
+    def test_packaged_video_stream_is_exposed_on_article(self, create_video_stream_mock):
+        url = reverse("articles-detail", kwargs={"pk": self.article_1.id})
+        self.assertIsNone(self.get(url).json()["video_manifest"])
+
+        package_article_video(self.article_1.id)
+        package_article_video(self.article_1.id)
+
+        create_video_stream_mock.assert_called_once()
+        self.article_1.refresh_from_db()
+        self.assertEqual(self.article_1.video_stream["source"], self.article_1.video.name)
+        response = self.get(url).json()
+        storage = self.article_1.video.storage
+        self.assertTrue(response["video_manifest"].endswith(storage.url("videos/video_hls/master.m3u8")))
+        self.assertTrue(response["video_poster"].endswith(storage.url("videos/video_hls/poster.jpg")))
+
+    @patch("apps.content.videos.shutil.which", return_value=None)
+    def test_video_is_not_packaged_without_ffmpeg(self, _which_mock):
+        package_article_video(self.article_1.id)
+        self.article_1.refresh_from_db()
+        self.assertEqual(self.article_1.video_stream, {})
+
+    @patch("apps.content.videos.create_video_stream")
+    @patch("apps.content.videos.package_article_video.apply_async")
+    @patch("apps.content.videos.get_redis_client")
+    def test_video_being_packaged_is_packaged_later(
+        self, get_redis_client_mock, apply_async_mock, create_video_stream_mock
+    ):
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.lock.return_value.acquire.return_value = False
+
+        package_article_video(self.article_1.id)
+
+        create_video_stream_mock.assert_not_called()
+        apply_async_mock.assert_called_once_with((self.article_1.id,), countdown=VIDEO_PACKAGING_RETRY_DELAY)
+        redis.lock.return_value.release.assert_not_called()
+
+    @patch("apps.content.images.get_supported_derivative_formats", return_value=["webp"])
+    def test_image_derivatives_are_exposed_as_srcset(self, _get_supported_derivative_formats_mock):
+        file_obj = io.BytesIO()
+        Image.new("RGB", size=(800, 400), color=(255, 0, 0)).save(file_obj, "png")
+        file_obj.seek(0)
+        self.category.image.save("category.png", File(file_obj), save=True)
+
+        generate_image_derivatives(self.category._meta.label, self.category.id, ["image"])
+
+        self.category.refresh_from_db()
+        derivatives = self.category.image_derivatives["image"]
+        self.assertEqual(derivatives["source"], self.category.image.name)
+        self.assertEqual(list(derivatives["webp"]), ["320", "640"])
+        with Image.open(self.category.image.storage.open(derivatives["webp"]["320"])) as derivative:
+            self.assertEqual((derivative.format, derivative.size), ("WEBP", (320, 160)))
+
+        response = self.get(reverse("categories-detail", kwargs={"pk": str(self.category.id)}))
+        srcset = response.json()["image_srcset"]
+        self.assertEqual(list(srcset["webp"]), ["320", "640"])
+        self.assertTrue(srcset["webp"]["640"].endswith(self.category.image.storage.url(derivatives["webp"]["640"])))
+
     def test_subcategories_detail(self):
         nutrition_subcategory = make(SubCategory, name=SubCategoryName.RECIPE_NUTRITION.value)
         nutrition_subcategory_translation = make(
@@ -682,6 +827,60 @@ class ContentTests(BaseTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json()["percent_of_read_articles"], 33)
 
+    def test_batch_mark_articles_as_read(self):
+        unpublished_article = make(Article, category=self.category, is_published=False)
+        UserArticle.objects.filter(article=self.article_2, user=self.user).delete()
+
+        url = reverse("articles-batch-mark-as-read")
+        data = {"article_ids": [self.article_1.id, self.article_2.id, unpublished_article.id]}
+        response = self.post(url, data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCountEqual(
+            UserArticle.objects.filter(user=self.user, is_read=True, read_at__isnull=False).values_list(
+                "article_id", flat=True
+            ),
+            [self.article_1.id, self.article_2.id],
+        )
+        reading_progress = UserReadingProgress.objects.get(user=self.user)
+        self.assertEqual(reading_progress.articles_count, 3)
+        self.assertEqual(reading_progress.read_articles_count, 2)
+        self.assertEqual(self.get(reverse("articles-progress")).json()["percent_of_read_articles"], 67)
+
+    def test_reading_progress_counters_follow_article_publishing(self):
+        reading_progress = UserReadingProgress.objects.get(user=self.user)
+        self.assertEqual(reading_progress.articles_count, 3)
+        self.assertEqual(reading_progress.read_articles_count, 0)
+
+        self.article_2.is_published = False
+        self.article_2.save()
+
+        reading_progress.refresh_from_db()
+        self.assertEqual(reading_progress.articles_count, 2)
+
+    def test_search_articles(self):
+        skin_school_category = make(Category, name=CategoryName.SKIN_SCHOOL.value)
+        skin_school_article = make(Article, category=skin_school_category, is_published=True)
+        make(ArticleTranslation, article=skin_school_article, language=self.language, title="Vitamins for the skin")
+        self.article_translation_2.title = "Sleep well"
+        self.article_translation_2.main_text = "<p>Vitamin intake matters</p>"
+        self.article_translation_2.save()
+        unassigned_article = make(Article, category=self.category, is_published=True)
+        UserArticle.objects.filter(article=unassigned_article, user=self.user).delete()
+        make(ArticleTranslation, article=unassigned_article, language=self.language, title="Vitamin serums")
+
+        response = self.get(reverse("articles-search"), {"q": "vitamin"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # title matches are ranked higher than main text matches
+        self.assertEqual(
+            [article["id"] for article in response.json()["results"]], [skin_school_article.id, self.article_2.id]
+        )
+
+    def test_search_articles_without_text_fails(self):
+        response = self.get(reverse("articles-search"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_creating_article_with_period_and_a_category_other_than_core_program_fails(
         self,
     ):
@@ -1,10 +1,16 @@
+from unittest.mock import MagicMock, patch
+
 from django.core.exceptions import ValidationError
+from django.test import override_settings
 from django.urls import reverse
 from model_bakery.baker import make
 from rest_framework import status
 
 from apps.content import CategoryName, ComparisonOperator, UserQuestionnaireVariable
-from apps.content.models import Article, Category, ContentRule, UserArticle
+from apps.content.models import Article, Category, ContentRule, UserArticle, UserReadingProgress
+from apps.content.progress import refresh_reading_progress
+from apps.content.rules import COMPILED_RULES_CACHE, CompiledArticleRules
+from apps.content.signals import create_user_article_relationship
 from apps.questionnaire import (
     Age,
     ContraceptivePill,
@@ -403,6 +409,77 @@ class ContentRuleTests(BaseTestCase):
         self.assertIn(self.user, self.article.users.all())
         self.assertIn(self.user_4, self.article.users.all())
 
+    @patch("apps.content.signals.USER_ARTICLE_REBUILD_CHUNK_SIZE", 1)
+    def test_article_relations_are_rebuilt_in_user_id_ranges(self):
+        make(
+            ContentRule,
+            article=self.article,
+            user_questionnaire_variable=UserQuestionnaireVariable.GENDER.value,
+            comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+            value=Gender.DIVERSE.value,
+        )
+        self.assertCountEqual(self.article.users.all(), [self.user, self.user_2])
+
+        new_article = make(Article, category=self.category, is_published=True)
+        self.assertCountEqual(new_article.users.all(), User.objects.all())
+
+    def test_article_rebuild_recounts_reading_progress_of_changed_users_only(self):
+        self.assertEqual(UserReadingProgress.objects.get(user=self.user_4).articles_count, 1)
+        with patch(
+            "apps.content.signals.refresh_reading_progress", wraps=refresh_reading_progress
+        ) as refresh_reading_progress_mock:
+            make(
+                ContentRule,
+                article=self.article,
+                user_questionnaire_variable=UserQuestionnaireVariable.GENDER.value,
+                comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+                value=Gender.DIVERSE.value,
+            )
+
+        refresh_reading_progress_mock.assert_called_once()
+        self.assertCountEqual(refresh_reading_progress_mock.call_args.args[0], [self.user_3, self.user_4])
+        self.assertEqual(UserReadingProgress.objects.get(user=self.user_4).articles_count, 0)
+        self.assertEqual(UserReadingProgress.objects.get(user=self.user).articles_count, 1)
+
+    @patch("apps.content.signals.create_user_article_relationship.apply_async")
+    @patch("apps.content.signals.get_redis_client")
+    def test_rule_changes_within_delay_are_collapsed_into_one_rebuild(self, get_redis_client_mock, apply_async_mock):
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.set.side_effect = [True, False]
+        for gender in [Gender.MALE.value, Gender.FEMALE.value]:
+            make(
+                ContentRule,
+                article=self.article,
+                user_questionnaire_variable=UserQuestionnaireVariable.GENDER.value,
+                comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+                value=gender,
+            )
+
+        apply_async_mock.assert_called_once_with((self.article.id,), countdown=10)
+
+    @patch("apps.content.signals.create_user_article_relationship.apply_async")
+    @patch("apps.content.signals.get_redis_client")
+    def test_article_being_rebuilt_is_rescheduled(self, get_redis_client_mock, apply_async_mock):
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.lock.return_value = MagicMock(**{"acquire.return_value": False})
+        ContentRule.objects.bulk_create(
+            [
+                ContentRule(
+                    article=self.article,
+                    user_questionnaire_variable=UserQuestionnaireVariable.GENDER.value,
+                    comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+                    value=Gender.MALE.value,
+                )
+            ]
+        )
+        user_articles_count = UserArticle.objects.filter(article=self.article).count()
+
+        create_user_article_relationship(self.article.id)
+
+        self.assertEqual(UserArticle.objects.filter(article=self.article).count(), user_articles_count)
+        apply_async_mock.assert_called_once_with((self.article.id,), countdown=10)
+        redis.lock.return_value.release.assert_not_called()
+
     def test_create_published_core_program_article_makes_it_available_for_all_users(
         self,
     ):
@@ -511,6 +588,88 @@ class ContentRuleTests(BaseTestCase):
         self.assertIn(self.user_2, self.article.users.all())
         self.assertIn(user_5, self.article.users.all())
 
+    def test_updating_user_questionnaire_reevaluates_only_its_user_relations(self):
+        make(
+            ContentRule,
+            article=self.article,
+            user_questionnaire_variable=UserQuestionnaireVariable.AGE.value,
+            comparison_operator=ComparisonOperator.IS_LESS_THAN.value,
+            value=Age.AGE_32_36.value,
+        )
+        make(
+            ContentRule,
+            article=self.article,
+            user_questionnaire_variable=UserQuestionnaireVariable.MENSTRUATING_PERSON.value,
+            comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+            value=True,
+        )
+        self.assertCountEqual(self.article.users.all(), [self.user_4])
+
+        self.user_questionnaire_3.menstruating_person = True
+        self.user_questionnaire_3.save()
+        self.assertCountEqual(self.article.users.all(), [self.user_3, self.user_4])
+
+        self.user_questionnaire_4.age = Age.AGE_61_PLUS.value
+        self.user_questionnaire_4.save()
+        self.assertCountEqual(self.article.users.all(), [self.user_3])
+
+    def test_compiled_rules_as_sql_and_python_predicate(self):
+        rules = [
+            ContentRule(
+                user_questionnaire_variable=UserQuestionnaireVariable.GENDER.value,
+                comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+                value=Gender.DIVERSE.value,
+            ),
+            ContentRule(
+                user_questionnaire_variable=UserQuestionnaireVariable.GENDER.value,
+                comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+                value=Gender.MALE.value,
+            ),
+            ContentRule(
+                user_questionnaire_variable=UserQuestionnaireVariable.MENSTRUATING_PERSON.value,
+                comparison_operator=ComparisonOperator.IS_EQUAL_TO.value,
+                value="False",
+            ),
+        ]
+        compiled_rules = CompiledArticleRules.compile(self.article.id, rules)
+        self.assertEqual(CompiledArticleRules.from_json(compiled_rules.to_json()), compiled_rules)
+
+        expected_questionnaires = [self.user_questionnaire_1, self.user_questionnaire_3]
+        self.assertCountEqual(UserQuestionnaire.objects.filter(compiled_rules.as_q()), expected_questionnaires)
+        matching_questionnaires = [
+            questionnaire for questionnaire in UserQuestionnaire.objects.all() if compiled_rules.matches(questionnaire)
+        ]
+        self.assertCountEqual(matching_questionnaires, expected_questionnaires)
+
+    def test_compiled_rules_are_invalidated_when_rules_change(self):
+        self.assertEqual(COMPILED_RULES_CACHE.get(self.article.id).groups, ())
+        rule = make(
+            ContentRule,
+            article=self.article,
+            user_questionnaire_variable=UserQuestionnaireVariable.AGE.value,
+            comparison_operator=ComparisonOperator.IS_LESS_THAN.value,
+            value=Age.AGE_17_21.value,
+        )
+        self.assertEqual(COMPILED_RULES_CACHE.get(self.article.id).groups, (("age", (("lt", Age.AGE_17_21.value),)),))
+        rule.delete()
+        self.assertEqual(COMPILED_RULES_CACHE.get(self.article.id).groups, ())
+
+    @override_settings(REDIS_URL="")
+    def test_compiled_rules_changed_by_another_process_are_seen_without_redis(self):
+        self.assertEqual(COMPILED_RULES_CACHE.get(self.article.id).groups, ())
+        # `bulk_create` doesn't send signals, like a rule changed by another process
+        ContentRule.objects.bulk_create(
+            [
+                ContentRule(
+                    article=self.article,
+                    user_questionnaire_variable=UserQuestionnaireVariable.AGE.value,
+                    comparison_operator=ComparisonOperator.IS_LESS_THAN.value,
+                    value=Age.AGE_17_21.value,
+                )
+            ]
+        )
+        self.assertEqual(COMPILED_RULES_CACHE.get(self.article.id).groups, (("age", (("lt", Age.AGE_17_21.value),)),))
+
     def test_creating_rule_for_article_with_category_other_than_core_program_fails(
         self,
     ):
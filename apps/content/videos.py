@@ -0,0 +1,209 @@
+from contextlib import contextmanager
+import json
+import logging
+import os
+import shutil
+import subprocess  # noqa: S404
+import tempfile
+from typing import Iterator
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.core.files import File
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from redis.exceptions import ConnectionError
+
+from apps.celery import app
+from apps.content.cache import invalidate_content_cache
+from apps.content.models import Article
+from apps.utils.helpers import get_redis_client
+
+LOGGER = logging.getLogger("app")
+
+# (height in pixels, video bitrate in kbps) of renditions, videos are never upscaled
+HLS_RENDITIONS = [(360, 800), (720, 2800), (1080, 5000)]
+HLS_AUDIO_BITRATE = 128
+HLS_SEGMENT_SECONDS = 6
+HLS_MASTER_PLAYLIST_NAME = "master.m3u8"
+HLS_POSTER_NAME = "poster.jpg"
+FFMPEG_TIMEOUT = 60 * 60
+# packaging of a long video is stopped, so it can't hold a worker indefinitely
+VIDEO_PACKAGING_SOFT_TIME_LIMIT = 2 * 60 * 60
+# the lock is released after the timeout in case the worker packaging the video is killed
+VIDEO_PACKAGING_LOCK_TIMEOUT = VIDEO_PACKAGING_SOFT_TIME_LIMIT + 10 * 60
+# packaging of an article being packaged by another worker is retried after the delay
+VIDEO_PACKAGING_RETRY_DELAY = 5 * 60
+
+
+def is_video_stream_stale(article: Article) -> bool:
+    """Checks whether the stream of the article is missing or was packaged from another video"""
+    return article.video.name != article.video_stream.get("source", "")
+
+
+def schedule_video_packaging(sender, instance, **kwargs):
+    """Packages new or changed videos after the current transaction is committed"""
+    if is_video_stream_stale(instance):
+        transaction.on_commit(lambda: package_article_video.delay(instance.pk))
+
+
+@app.task(soft_time_limit=VIDEO_PACKAGING_SOFT_TIME_LIMIT, time_limit=VIDEO_PACKAGING_LOCK_TIMEOUT)
+def package_article_video(article_id: int):
+    """
+    Packages the video of the article into HLS renditions and saves names of the master playlist and the poster to
+    `video_stream` of the article without firing `post_save`. The stream of a removed video is dropped. Videos of
+    the same article are never packaged concurrently, since the runs would write to the same files.
+    """
+    with _lock_video_packaging(article_id) as is_acquired:
+        if not is_acquired:
+            package_article_video.apply_async((article_id,), countdown=VIDEO_PACKAGING_RETRY_DELAY)
+            return
+        article = Article.objects.filter(id=article_id).first()
+        if not article or not is_video_stream_stale(article):
+            return
+        video_stream = {}
+        if article.video:
+            try:
+                video_stream = {"source": article.video.name, **create_video_stream(article.video)}
+            except (OSError, subprocess.SubprocessError, ValueError, SoftTimeLimitExceeded):
+                LOGGER.exception("Failed to package video of article [%s].", article_id)
+                return
+        # the video may have been changed while it was packaged, its packaging is scheduled by `post_save`
+        if Article.objects.filter(id=article_id, video=article.video.name).update(video_stream=video_stream):
+            invalidate_content_cache(Article, article)
+
+
+@contextmanager
+def _lock_video_packaging(article_id: int) -> Iterator[bool]:
+    """
+    Yields True if the packaging lock of the article was acquired, False if the video of the article is being packaged
+    by another worker. Without redis the packaging is not locked.
+    """
+    with get_redis_client() as redis:
+        lock = None
+        is_acquired = True
+        if redis:
+            try:
+                lock = redis.lock(f"content:video_packaging_lock:{article_id}", VIDEO_PACKAGING_LOCK_TIMEOUT)
+                is_acquired = lock.acquire(blocking=False)
+            except ConnectionError:
+                LOGGER.exception("Failed to connect to Redis to lock video packaging.")
+                lock = None
+        try:
+            yield is_acquired
+        finally:
+            if lock and is_acquired:
+                lock.release()
+
+
+def create_video_stream(field_file: FieldFile) -> dict[str, str]:
+    """
+    Transcodes the video with ffmpeg into HLS renditions with segments aligned across renditions, stores them with
+    a poster next to the original and returns names of the master playlist and the poster, i.e.
+    `{"manifest": "videos/intro_hls/master.m3u8", "poster": "videos/intro_hls/poster.jpg"}`.
+    """
+    # ffmpeg is an optional system dependency of the workers
+    if missing_tools := [tool for tool in ["ffmpeg", "ffprobe"] if not shutil.which(tool)]:
+        raise OSError(f"{', '.join(missing_tools)} not installed")
+    storage = field_file.storage
+    root, extension = os.path.splitext(field_file.name)
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, f"source{extension}")
+        with storage.open(field_file.name) as file, open(source_path, "wb") as source:
+            shutil.copyfileobj(file, source)
+        output_directory = os.path.join(directory, "hls")
+        os.mkdir(output_directory)
+
+        width, height = _get_video_size(source_path)
+        renditions = [rendition for rendition in HLS_RENDITIONS if rendition[0] <= height] or [HLS_RENDITIONS[0]]
+        stream_infos = []
+        for rendition_height, bitrate in renditions:
+            rendition_height = min(rendition_height, height)
+            _transcode_rendition(source_path, output_directory, rendition_height, bitrate)
+            # widths of h264 videos have to be even
+            rendition_width = round(width * rendition_height / height / 2) * 2
+            stream_infos.append(
+                f"#EXT-X-STREAM-INF:BANDWIDTH={(bitrate + HLS_AUDIO_BITRATE) * 1000},"
+                f"RESOLUTION={rendition_width}x{rendition_height}\n{rendition_height}p.m3u8"
+            )
+        _run_ffmpeg(
+            ["-i", source_path, "-vf", f"thumbnail,scale=-2:{min(height, 720)}", "-frames:v", "1"],
+            os.path.join(output_directory, HLS_POSTER_NAME),
+        )
+        with open(os.path.join(output_directory, HLS_MASTER_PLAYLIST_NAME), "w") as master_playlist:
+            master_playlist.write("\n".join(["#EXTM3U", "#EXT-X-VERSION:3", *stream_infos, ""]))
+
+        # playlists refer to the segments by relative names, so the stored names must not be changed by the storage
+        stored_names = {}
+        file_names = sorted(os.listdir(output_directory), key=lambda name: name == HLS_MASTER_PLAYLIST_NAME)
+        for file_name in file_names:
+            name = f"{root}_hls/{file_name}"
+            storage.delete(name)
+            with open(os.path.join(output_directory, file_name), "rb") as file:
+                stored_names[file_name] = storage.save(name, File(file))
+    return {"manifest": stored_names[HLS_MASTER_PLAYLIST_NAME], "poster": stored_names[HLS_POSTER_NAME]}
+
+
+def _get_video_size(path: str) -> tuple[int, int]:
+    result = subprocess.run(  # noqa: S603, S607
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height", "-of", "json"]
+        + [path],
+        capture_output=True,
+        check=True,
+        timeout=FFMPEG_TIMEOUT,
+    )
+    streams = json.loads(result.stdout)["streams"]
+    if not streams:
+        raise ValueError("The file has no video stream")
+    return streams[0]["width"], streams[0]["height"]
+
+
+def _transcode_rendition(source_path: str, output_directory: str, height: int, bitrate: int) -> None:
+    _run_ffmpeg(
+        [
+            "-i",
+            source_path,
+            "-map",
+            "0:v:0",
+            "-map",
+            "0:a:0?",
+            "-vf",
+            f"scale=-2:{height}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-b:v",
+            f"{bitrate}k",
+            "-maxrate",
+            f"{round(bitrate * 1.07)}k",
+            "-bufsize",
+            f"{bitrate * 2}k",
+            # keyframes at the segment boundaries let players switch renditions between segments
+            "-force_key_frames",
+            f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+            "-c:a",
+            "aac",
+            "-b:a",
+            f"{HLS_AUDIO_BITRATE}k",
+            "-ac",
+            "2",
+            "-f",
+            "hls",
+            "-hls_time",
+            str(HLS_SEGMENT_SECONDS),
+            "-hls_playlist_type",
+            "vod",
+            "-hls_segment_filename",
+            os.path.join(output_directory, f"{height}p_%03d.ts"),
+        ],
+        os.path.join(output_directory, f"{height}p.m3u8"),
+    )
+
+
+def _run_ffmpeg(arguments: list[str], output_path: str) -> None:
+    subprocess.run(  # noqa: S603, S607
+        ["ffmpeg", "-y", "-v", "error", *arguments, output_path],
+        capture_output=True,
+        check=True,
+        timeout=FFMPEG_TIMEOUT,
+    )
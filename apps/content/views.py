@@ -1,14 +1,18 @@
-import datetime
-
 from django.conf import settings
-from django.db.models import Prefetch, QuerySet
+from django.contrib.postgres.search import SearchRank
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Prefetch, Q, QuerySet
+from django.db.models.functions import Cast
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from apps.content import CategoryName
+from apps.content.cache import cache_content_response, conditional_content_response
 from apps.content.filters import ArticleFilter
+from apps.content.progress import PROGRESS_CATEGORY_NAMES, mark_user_articles_as_read
+from apps.content.search import get_article_search_query
 from apps.content.models import (
     Article,
     ArticleTranslation,
@@ -19,8 +23,11 @@ from apps.content.models import (
     SubCategory,
     SubCategoryTranslation,
     UserArticle,
+    UserReadingProgress,
 )
 from apps.content.serializers import (
+    ArticleIdsSerializer,
+    ArticleSearchSerializer,
     ArticleSerializer,
     CategorySerializer,
     PeriodSerializer,
@@ -30,6 +37,20 @@ from apps.content.serializers import (
     CategoryDetailSerializer
 )
 from apps.users.models import User
+from apps.utils.pagination import SearchRankCursorPagination
+
+
+def get_subcategory_queryset(language_code: str) -> QuerySet:
+    """Returns subcategories with translations of the language and counts of their children and published articles"""
+    translations = Prefetch(
+        lookup="translations",
+        queryset=SubCategoryTranslation.objects.filter(language=language_code),
+        to_attr="user_translations",
+    )
+    return SubCategory.objects.annotate(
+        children_count=Count("subCategories", distinct=True),
+        published_articles_count=Count("articles", filter=Q(articles__is_published=True), distinct=True),
+    ).prefetch_related(translations).order_by("id")
 
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -46,15 +67,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
             queryset=CategoryTranslation.objects.filter(language=language_code),
             to_attr="user_translations",
         )
-        subcategory_translations = Prefetch(
-            lookup="translations",
-            queryset=SubCategoryTranslation.objects.filter(language=language_code),
-            to_attr="user_translations",
-        )
-        subcategories = Prefetch(
-            "subcategories",
-            queryset=SubCategory.objects.prefetch_related(subcategory_translations)
-        )
+        subcategories = Prefetch("subcategories", queryset=get_subcategory_queryset(language_code))
         queryset = Category.objects.prefetch_related(
             category_translations,
             subcategories,
@@ -66,6 +79,16 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         context['request'] = self.request
         return context
 
+    @conditional_content_response
+    @cache_content_response
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return super().list(request, *args, **kwargs)
+
+    @conditional_content_response
+    @cache_content_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     def get_serializer_class(self):
@@ -77,16 +100,7 @@ class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         language_code = user.language.code if user.is_authenticated else settings.DEFAULT_LANGUAGE
 
-        subcategory_translations = Prefetch(
-            lookup="translations",
-            queryset=SubCategoryTranslation.objects.filter(language=language_code),
-            to_attr="user_translations",
-        )
-
-        nested_subcategories = Prefetch(
-            "subCategories",
-            queryset=SubCategory.objects.prefetch_related(subcategory_translations)
-        )
+        nested_subcategories = Prefetch("subCategories", queryset=get_subcategory_queryset(language_code))
 
         article_qs = Article.objects.filter(is_published=True)
 
@@ -111,8 +125,7 @@ class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
             queryset=article_qs
         )
 
-        queryset = SubCategory.objects.prefetch_related(
-            subcategory_translations,
+        queryset = get_subcategory_queryset(language_code).prefetch_related(
             nested_subcategories,
             articles,
         )
@@ -124,6 +137,16 @@ class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         context['request'] = self.request
         return context
 
+    @conditional_content_response
+    @cache_content_response
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        # subcategories list doesn't contain user articles, so it is the same for all users with the same language
+        return super().list(request, *args, **kwargs)
+
+    @conditional_content_response(per_user=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ArticleSerializer
     filter_backends = [DjangoFilterBackend]
@@ -151,35 +174,49 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=["post"], url_path="mark-as-read", url_name="mark-as-read")
     def mark_as_read(self, request, pk=None):
         article = self.get_object()
-        user_article, _created = UserArticle.objects.get_or_create(article=article, user=request.user)
-        user_article.is_read = True
-        user_article.read_at = datetime.datetime.now(datetime.timezone.utc)
-        user_article.save(update_fields=["is_read", "read_at"])
+        mark_user_articles_as_read(request.user.id, [article.id])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(request=ArticleIdsSerializer, responses={status.HTTP_204_NO_CONTENT: None})
+    @action(detail=False, methods=["post"], url_path="mark-as-read", url_name="batch-mark-as-read")
+    def batch_mark_as_read(self, request):
+        serializer = ArticleIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        mark_user_articles_as_read(request.user.id, serializer.validated_data["article_ids"])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=["get"], url_name="progress")
     def progress(self, request):
-        all_published_user_articles = UserArticle.objects.filter(
-            user=request.user,
-            article__category__name__in=[
-                CategoryName.CORE_PROGRAM.value,
-                CategoryName.INITIAL.value,
-            ],
-            article__is_published=True,
-        ).count()
-        read_user_articles = UserArticle.objects.filter(
-            user=request.user,
-            article__category__name__in=[
-                CategoryName.CORE_PROGRAM.value,
-                CategoryName.INITIAL.value,
-            ],
-            is_read=True,
-        ).count()
-        data = {"percent_of_read_articles": 0}
-        if read_user_articles:
-            read_article_percentage = round(read_user_articles / all_published_user_articles * 100)
-            data = {"percent_of_read_articles": read_article_percentage}
-        return Response(data)
+        reading_progress = UserReadingProgress.objects.filter(user=request.user).first()
+        percent_of_read_articles = reading_progress.percent_of_read_articles if reading_progress else 0
+        return Response({"percent_of_read_articles": percent_of_read_articles})
+
+    @extend_schema(parameters=[ArticleSearchSerializer])
+    @action(detail=False, methods=["get"], url_name="search", pagination_class=SearchRankCursorPagination)
+    def search(self, request):
+        """
+        Full-text search in the article translations of the user's language, ranked by relevance. Program articles are
+        found only if they are assigned to the user.
+        """
+        params = ArticleSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        user = request.user
+        language_code = user.language.code if user.is_authenticated else settings.DEFAULT_LANGUAGE
+        query = get_article_search_query(params.validated_data["q"], language_code)
+
+        articles = (
+            self.get_article_queryset(
+                user, is_published=True, translations__language=language_code, translations__search_vector=query
+            )
+            .annotate(
+                rank=Cast(SearchRank(F("translations__search_vector"), query), output_field=FloatField()),
+                is_assigned=Exists(UserArticle.objects.filter(article_id=OuterRef("id"), user=user)),
+            )
+            .filter(Q(is_assigned=True) | ~Q(category__name__in=PROGRESS_CATEGORY_NAMES))
+        )
+        page = self.paginate_queryset(articles)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=["get"], url_path="lifestyle-articles")
     def lifestyle_articles(self, request):
@@ -216,6 +253,14 @@ class PeriodViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = Period.objects.prefetch_related(translations, articles)
         return queryset
 
+    @conditional_content_response(per_user=True)
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return super().list(request, *args, **kwargs)
+
+    @conditional_content_response(per_user=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class PeriodViewSetOld(PeriodViewSet):
     """We need to support olf flow, because apps before v2.3.0 expected different is_locked flow,
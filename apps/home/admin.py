@@ -19,6 +19,7 @@ from apps.home.models import (
     AboutAndNoticeSectionTranslation,
     NotificationTemplate,
     NotificationTemplateTranslation,
+    PushNotificationDelivery,
     FaceScanCommentTemplate,
     FaceScanCommentTemplateTranslation,
     PredictionTemplate,
@@ -258,6 +259,14 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
     inlines = [NotificationTemplateTranslationInline]
 
 
+@admin.register(PushNotificationDelivery)
+class PushNotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("campaign", "device", "is_successful", "error_code", "created_at")
+    list_filter = ("is_successful", "error_code")
+    search_fields = ("campaign", "device__registration_id")
+    raw_id_fields = ("device",)
+
+
 class FaceScanCommentTemplateTranslationInline(admin.TabularInline):
     model = FaceScanCommentTemplateTranslation
     extra = 0
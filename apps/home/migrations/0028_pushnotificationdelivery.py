@@ -0,0 +1,48 @@
+# Generated by Django 3.2.15 on 2026-10-19 13:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fcm_django", "0001_initial"),
+        ("home", "0027_globalvariables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushNotificationDelivery",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("campaign", models.CharField(max_length=100)),
+                ("is_successful", models.BooleanField()),
+                ("error_code", models.CharField(blank=True, default="", max_length=100)),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="push_notification_deliveries",
+                        to="fcm_django.fcmdevice",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="pushnotificationdelivery",
+            constraint=models.UniqueConstraint(
+                fields=("campaign", "device"), name="One delivery per campaign per device"
+            ),
+        ),
+    ]
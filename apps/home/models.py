@@ -306,6 +306,27 @@ class NotificationTemplateTranslation(BaseModel):
         return f"{self.title} {self.language}"
 
 
+class PushNotificationDelivery(BaseModel):
+    """Ledger of push notifications sent to devices, a campaign is delivered to a device at most once"""
+
+    campaign = models.CharField(max_length=100)
+    device = models.ForeignKey(
+        "fcm_django.FCMDevice",
+        related_name="push_notification_deliveries",
+        on_delete=models.CASCADE,
+    )
+    is_successful = models.BooleanField()
+    error_code = models.CharField(max_length=100, blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["campaign", "device"], name="One delivery per campaign per device")
+        ]
+
+    def __str__(self):
+        return f"{self.campaign} to device {self.device_id}"
+
+
 class FaceScanCommentTemplate(BaseModel):
     name = models.CharField(max_length=100, unique=True)
 
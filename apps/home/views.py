@@ -13,6 +13,7 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.content.cache import conditional_content_response
 from apps.home.models import (
     AboutAndNoticeSection,
     AboutAndNoticeSectionTranslation,
@@ -47,6 +48,14 @@ class AboutViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = AboutAndNoticeSection.objects.prefetch_related(translations).filter(id__in=latest_versions_ids)
         return queryset
 
+    @conditional_content_response
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return super().list(request, *args, **kwargs)
+
+    @conditional_content_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=["post"], serializer_class=UserAboutSerializer)
     def accept_about(self, request: Request) -> Response:
         serializer = self.get_serializer(data=request.data, many=True)
@@ -92,6 +101,8 @@ class CustomFCMDeviceViewSet(FCMDeviceViewSet):
         serializer.is_valid(raise_exception=True)
         if is_update:
             self.perform_update(serializer)
+            # collapsing duplicates of the device, which would receive the same notifications again
+            self.queryset.filter(registration_id=instance.registration_id).exclude(pk=instance.pk).delete()
             return Response(serializer.data)
         else:
             self.perform_create(serializer)
@@ -64,6 +64,18 @@ class ProductType(str, ChoicesEnum):
     TREATMENT = "TREATMENT"
 
 
+class RecognitionStatus(str, ChoicesEnum):
+    PENDING = "PENDING"
+    OCR_DONE = "OCR_DONE"
+    PARSED = "PARSED"
+    FAILED = "FAILED"
+
+
+class RecognitionCacheKind(str, ChoicesEnum):
+    OCR = "OCR"
+    PARSE = "PARSE"
+
+
 class ExerciseHours(str, ChoicesEnum):
     TWO_PLUS = "TWO_PLUS"
     TWO_HOURS = "TWO_HOURS"
@@ -92,6 +104,10 @@ PUSH_NOTIFICATION_TYPE_TO_CLICK_ACTION_LINK = {
 # https://xd.adobe.com/view/d87117ca-cdc4-4b8b-bd53-7a206a39eca8-8d22/
 # Please update points if it is changed in the reference. And if any field is renamed or removed from the
 # `DailyQuestionnaire` then please update this POINTS table accordingly.
+# Please increase `POINTS_VERSION` whenever the POINTS table changes and recompute the historical statistics with
+# `manage.py recompute_daily_statistics --outdated`.
+
+POINTS_VERSION = 1
 
 POINTS: Dict[str, Dict[Union[str, int], int]] = {
     "skin_feel": {
@@ -159,6 +175,14 @@ POINTS: Dict[str, Dict[Union[str, int], int]] = {
 }
 
 
+# `DailyQuestionnaire` attributes which are counted for each section of the `DailyStatistics`
+DAILY_STATISTICS_SECTIONS: Dict[str, list[str]] = {
+    "skin_care": ["skin_feel", "feeling_today"],
+    "well_being": ["stress_levels", "exercise_hours", "hours_of_sleep", "sleep_quality"],
+    "nutrition": ["diet_today", "water", "life_happened"],
+}
+
+
 class RoutinePoints(int, ChoicesEnum):
     AM_ROUTINE_POINT = 25
     PM_ROUTINE_POINT = 25
@@ -286,6 +310,10 @@ class HealthCareEventTypes(str, ChoicesEnum):
     MENSTRUATION = "MENSTRUATION"
 
 
+# appointment reminders are sent 24 hours and 1 hour before the appointment, only the first upcoming one is scheduled
+APPOINTMENT_REMINDER_HOURS_BEFORE = [24, 1]
+
+
 class MedicationTypes(str, ChoicesEnum):
     PILL = "PILL"
     SKIN = "SKIN"
@@ -305,6 +333,13 @@ class PurchaseStatus(str, ChoicesEnum):
     EXPIRED = "EXPIRED"
 
 
+class ReminderCampaign(str, ChoicesEnum):
+    APPOINTMENT = "APPOINTMENT"
+    FACE_SCAN = "FACE_SCAN"
+    DAILY_QUESTIONNAIRE = "DAILY_QUESTIONNAIRE"
+    MONTHLY_STATISTICS = "MONTHLY_STATISTICS"
+
+
 class AppStores(str, ChoicesEnum):
     APP_STORE = "APP_STORE"
     PLAY_STORE = "PLAY_STORE"
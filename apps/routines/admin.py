@@ -31,6 +31,7 @@ from apps.routines.models import (
     ScrapedProduct,
     UserScrapedProduct,
     Recommendation,
+    RecognitionCacheEntry,
 )
 from apps.routines.resources import DailyQuestionnaireResource, FaceScanResource
 from apps.routines.tasks import send_reminder_notification_for_appointments
@@ -125,6 +126,7 @@ class DailyStatisticsAdmin(admin.ModelAdmin):
         "well_being",
         "nutrition",
         "routine_count_status",
+        "points_version",
         "date",
     ]
     search_fields = ["user__email", "date"]
@@ -233,6 +235,13 @@ class ProductAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(RecognitionCacheEntry)
+class RecognitionCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "key", "last_used_at", "created_at"]
+    list_filter = ["kind"]
+    search_fields = ["key"]
+
+
 @admin.register(ScrapedProduct)
 class ScrapedProductAdmin(admin.ModelAdmin):
     list_display = [
@@ -319,6 +328,7 @@ class HealthCareEventAdmin(admin.ModelAdmin):
         "start_date",
         "duration",
         "time",
+        "remind_at",
         "created_at",
     ]
     read_only_fields = list_display
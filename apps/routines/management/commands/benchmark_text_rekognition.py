@@ -0,0 +1,63 @@
+import io
+import time
+
+import boto3
+from django.core.management.base import BaseCommand
+
+from apps.text_rekognition.script import MAX_PARALLEL_DETECTIONS, TextRekognition
+
+
+class StubRekognitionClient:
+    """Rekognition client which simulates latency of DetectText requests without calling AWS"""
+
+    def __init__(self, latency: float, detections_count: int) -> None:
+        self.latency = latency
+        self.detections = [{"DetectedText": f"word{index}"} for index in range(detections_count)]
+
+    def detect_text(self, Image: dict) -> dict:  # noqa: N803
+        time.sleep(self.latency)
+        return {"TextDetections": self.detections}
+
+
+class Command(BaseCommand):
+    help = "Compares sequential and concurrent OCR of product images against a stub of Rekognition."  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=24, help="number of images")
+        parser.add_argument("--latency-ms", type=int, default=300, help="simulated latency of one request")
+        parser.add_argument("--detections", type=int, default=50, help="number of detected words per image")
+        parser.add_argument("--workers", type=int, default=MAX_PARALLEL_DETECTIONS)
+
+    def handle(self, *args, **options):
+        images_count = options["images"]
+
+        # boto3 clients are created locally, without requests to AWS
+        started_at = time.monotonic()
+        for _ in range(images_count):
+            boto3.client(
+                "rekognition", aws_access_key_id="stub", aws_secret_access_key="stub", region_name="eu-central-1"
+            )
+        client_per_call_elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            f"Client per call: {client_per_call_elapsed:.3f}s of client creation for {images_count} images."
+        )
+
+        stub_client = StubRekognitionClient(options["latency_ms"] / 1000, options["detections"])
+        stubbed_rekognition = type("StubbedTextRekognition", (TextRekognition,), {"_client": stub_client})
+
+        images = [io.BytesIO(b"image") for _ in range(images_count)]
+        started_at = time.monotonic()
+        sequential_texts = [stubbed_rekognition.run_bytes(image) for image in images]
+        sequential_elapsed = time.monotonic() - started_at
+        self.stdout.write(f"Sequential: {sequential_elapsed:.3f}s.")
+
+        images = [io.BytesIO(b"image") for _ in range(images_count)]
+        started_at = time.monotonic()
+        concurrent_texts = stubbed_rekognition.run_many(images, max_workers=options["workers"])
+        concurrent_elapsed = time.monotonic() - started_at
+        self.stdout.write(f"Concurrent with {options['workers']} workers: {concurrent_elapsed:.3f}s.")
+
+        if concurrent_texts != sequential_texts:
+            self.stderr.write("Concurrent results differ from sequential ones.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {sequential_elapsed / concurrent_elapsed:.1f}x."))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.routines.matching import MatchingResult, ScrapedProductTokenIndex, match_daily_products
+
+
+class Command(BaseCommand):
+    help = "Connects unmatched daily products to scraped products by similarity of their names."  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--after-id", type=int, default=0, help="resume after the daily product with the id")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started_at = time.monotonic()
+        index = ScrapedProductTokenIndex.build()
+        self.stdout.write(
+            f"Indexed {len(index.titles)} scraped products by {len(index.postings)} words "
+            f"in {time.monotonic() - started_at:.1f}s."
+        )
+
+        started_at = time.monotonic()
+
+        def report_progress(processed: int, total: int, last_id: int, result: MatchingResult) -> None:
+            elapsed = time.monotonic() - started_at
+            self.stdout.write(
+                f"Processed {processed}/{total} products ({processed / elapsed:.0f}/s), {result.matched} matched, "
+                f"{result.failed} failed, {result.reset} reset. Resume with --after-id {last_id}."
+            )
+
+        result = match_daily_products(
+            after_id=options["after_id"],
+            chunk_size=options["chunk_size"],
+            index=index,
+            progress_callback=report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Matched {result.matched} daily products."))
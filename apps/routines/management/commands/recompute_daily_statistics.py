@@ -0,0 +1,41 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.routines.scoring import ScoringEngine, recompute_daily_statistics
+
+
+class Command(BaseCommand):
+    help = "Recomputes daily statistics points with the current POINTS table."  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", dest="user_ids", type=int, action="append", help="user id, can be repeated")
+        parser.add_argument("--start-date", type=datetime.date.fromisoformat, help="i.e. 2022-06-01")
+        parser.add_argument("--end-date", type=datetime.date.fromisoformat, help="i.e. 2022-06-30")
+        parser.add_argument(
+            "--outdated",
+            action="store_true",
+            help="recompute only statistics calculated with an older POINTS version",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        engine = ScoringEngine()
+        started_at = time.monotonic()
+
+        def report_progress(processed: int, total: int) -> None:
+            elapsed = time.monotonic() - started_at
+            self.stdout.write(f"Processed {processed}/{total} statistics ({processed / elapsed:.0f}/s).")
+
+        self.stdout.write(f"Recomputing daily statistics with POINTS version {engine.version}.")
+        updated = recompute_daily_statistics(
+            user_ids=options["user_ids"],
+            start_date=options["start_date"],
+            end_date=options["end_date"],
+            outdated_only=options["outdated"],
+            chunk_size=options["chunk_size"],
+            engine=engine,
+            progress_callback=report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} daily statistics."))
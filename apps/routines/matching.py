@@ -0,0 +1,163 @@
+from collections import Counter
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.routines.models import DailyProduct, ScrapedProduct, get_title_tokens
+
+# the same threshold as `DailyProduct.get_product_with_biggest_jaccard_distance`
+MIN_TITLE_SIMILARITY = 0.4
+# daily products are reset after so many runs without a match
+MAX_CONNECT_SCRAPPED_FAILS = 5
+# the cached index is rebuilt after the timeout even if no scraped product was added or removed
+SCRAPED_PRODUCT_INDEX_TTL = 10 * 60
+
+
+class MatchingResult(NamedTuple):
+    matched: int = 0
+    failed: int = 0
+    reset: int = 0
+
+    def __add__(self, other: "MatchingResult") -> "MatchingResult":
+        return MatchingResult(*(value + other_value for value, other_value in zip(self, other)))
+
+
+def jaccard_similarity(tokens_1: Iterable[str], tokens_2: Iterable[str]) -> float:
+    """Jaccard index of the token multisets, the same as `textdistance.jaccard` of the token lists"""
+    counter_1, counter_2 = Counter(tokens_1), Counter(tokens_2)
+    union = sum((counter_1 | counter_2).values())
+    if not union:
+        return 1
+    return sum((counter_1 & counter_2).values()) / union
+
+
+class ScrapedProductTokenIndex:
+    """
+    In-memory inverted index of scraped product titles by their words (see `get_title_tokens`). Candidates of a title
+    are looked up by its first word like in `DailyProduct.get_similar_scrapped_product_by_title` and only they are
+    ranked by Jaccard similarity.
+    """
+
+    _current: Optional["ScrapedProductTokenIndex"] = None
+    _lock = threading.Lock()
+
+    def __init__(self, fingerprint: tuple = ()) -> None:
+        self.fingerprint = fingerprint
+        self.built_at = time.monotonic()
+        self.postings: dict[str, list[int]] = {}
+        self.titles: dict[int, list[str]] = {}
+
+    @classmethod
+    def build(cls) -> "ScrapedProductTokenIndex":
+        index = cls(cls._get_fingerprint())
+        titles = ScrapedProduct.objects.annotate(title_tokens=get_title_tokens()).order_by("id")
+        for product_id, tokens in titles.values_list("id", "title_tokens").iterator(chunk_size=10000):
+            index.add(product_id, tokens)
+        return index
+
+    @classmethod
+    def get_current(cls) -> "ScrapedProductTokenIndex":
+        """Returns the process-wide index, which is rebuilt after scraped products are added or removed"""
+        with cls._lock:
+            index = cls._current
+            if (
+                index is None
+                or time.monotonic() - index.built_at > SCRAPED_PRODUCT_INDEX_TTL
+                or index.fingerprint != cls._get_fingerprint()
+            ):
+                index = cls._current = cls.build()
+            return index
+
+    @staticmethod
+    def _get_fingerprint() -> tuple:
+        return tuple(ScrapedProduct.objects.aggregate(count=Count("id"), max_id=Max("id")).values())
+
+    def add(self, product_id: int, tokens: list[str]) -> None:
+        self.titles[product_id] = tokens
+        for token in set(tokens):
+            self.postings.setdefault(token, []).append(product_id)
+
+    def match(self, tokens: list[str]) -> Optional[int]:
+        """Returns id of the most similar scraped product, products added earlier win ties"""
+        best_id, best_similarity = None, MIN_TITLE_SIMILARITY
+        for candidate_id in self.postings.get(tokens[0], []) if tokens else []:
+            similarity = jaccard_similarity(self.titles[candidate_id], tokens)
+            if similarity > best_similarity or (best_id is None and similarity == best_similarity):
+                best_id, best_similarity = candidate_id, similarity
+        return best_id
+
+
+def get_unmatched_daily_products():
+    return DailyProduct.objects.filter(product_info=None).exclude(name="")
+
+
+def match_daily_products_chunk(products: list[DailyProduct], index: ScrapedProductTokenIndex) -> MatchingResult:
+    """
+    Connects the daily products to the most similar scraped products by their names. Products without a match are
+    counted in `connect_scrapped_fail` and their names are reset after `MAX_CONNECT_SCRAPPED_FAILS` runs, so they
+    are recognized again. Changes are written with `bulk_update` without calling `save`, products which were matched
+    or changed since they were loaded are skipped.
+    """
+    now = timezone.now()
+    loaded_values = {product.id: (product.name, product.connect_scrapped_fail) for product in products}
+    matched, failed, reset = [], [], []
+    for product in products:
+        product.updated_at = now
+        if scraped_product_id := index.match(DailyProduct.lens_title_to_tokens_list(product.name)):
+            product.product_info_id = scraped_product_id
+            matched.append(product)
+        elif product.connect_scrapped_fail >= MAX_CONNECT_SCRAPPED_FAILS:
+            product.name = ""
+            product.connect_scrapped_fail = 0
+            product.image_parse_fail = 0
+            reset.append(product)
+        else:
+            product.connect_scrapped_fail += 1
+            failed.append(product)
+
+    with transaction.atomic():
+        current_rows = (
+            DailyProduct.objects.select_for_update()
+            .filter(id__in=loaded_values, product_info=None)
+            .values_list("id", "name", "connect_scrapped_fail")
+        )
+        current_values = {product_id: (name, fails_count) for product_id, name, fails_count in current_rows}
+        matched, failed, reset = (
+            [product for product in changed if current_values.get(product.id) == loaded_values[product.id]]
+            for changed in (matched, failed, reset)
+        )
+        DailyProduct.objects.bulk_update(matched, ["product_info", "updated_at"])
+        DailyProduct.objects.bulk_update(failed, ["connect_scrapped_fail", "updated_at"])
+        DailyProduct.objects.bulk_update(reset, ["name", "connect_scrapped_fail", "image_parse_fail", "updated_at"])
+    return MatchingResult(len(matched), len(failed), len(reset))
+
+
+def match_daily_products(
+    after_id: int = 0,
+    chunk_size: int = 5000,
+    index: Optional[ScrapedProductTokenIndex] = None,
+    progress_callback: Optional[Callable[[int, int, int, MatchingResult], None]] = None,
+) -> MatchingResult:
+    """
+    Matches unmatched daily products with id greater than `after_id` in chunks ordered by id. The id of the last
+    processed product is passed to `progress_callback` with counters, so an interrupted run can be resumed from it.
+    """
+    index = index or ScrapedProductTokenIndex.build()
+    products = get_unmatched_daily_products().filter(id__gt=after_id)
+    total = products.count()
+    processed = 0
+    result = MatchingResult()
+    last_id = after_id
+    # `image` is read by `DailyProduct.__init__`
+    only_fields = ["id", "image", "name", "connect_scrapped_fail", "image_parse_fail", "product_info", "updated_at"]
+    while chunk := list(products.filter(id__gt=last_id).order_by("id").only(*only_fields)[:chunk_size]):
+        result += match_daily_products_chunk(chunk, index)
+        processed += len(chunk)
+        last_id = chunk[-1].id
+        if progress_callback:
+            progress_callback(processed, total, last_id, result)
+    return result
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.15 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routines", "0058_remove_dailyproduct_one group per type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailystatistics",
+            name="points_version",
+            field=models.PositiveSmallIntegerField(
+                default=0, help_text="version of the points table used for the calculation"
+            ),
+        ),
+    ]
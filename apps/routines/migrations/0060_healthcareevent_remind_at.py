@@ -0,0 +1,45 @@
+# Generated by Django 3.2.15 on 2026-10-19 12:40
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from apps.routines import APPOINTMENT_REMINDER_HOURS_BEFORE, HealthCareEventTypes
+
+
+def schedule_upcoming_appointment_reminders(apps, schema_editor):
+    HealthCareEvent = apps.get_model("routines", "HealthCareEvent")
+    current_time = timezone.now()
+    events = HealthCareEvent.objects.filter(
+        event_type=HealthCareEventTypes.APPOINTMENT,
+        remind_me=True,
+        is_reminder_sent=False,
+        time__isnull=False,
+        start_date__gte=current_time.date(),
+    )
+    scheduled_events = []
+    for event in events.iterator():
+        event_at = datetime.datetime.combine(event.start_date, event.time, tzinfo=datetime.timezone.utc)
+        for hours_before in APPOINTMENT_REMINDER_HOURS_BEFORE:
+            if (remind_at := event_at - datetime.timedelta(hours=hours_before)) >= current_time:
+                event.remind_at = remind_at
+                scheduled_events.append(event)
+                break
+    HealthCareEvent.objects.bulk_update(scheduled_events, ["remind_at"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routines", "0059_dailystatistics_points_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="healthcareevent",
+            name="remind_at",
+            field=models.DateTimeField(blank=True, db_index=True, help_text="next scheduled reminder", null=True),
+        ),
+        migrations.RunPython(schedule_upcoming_appointment_reminders, migrations.RunPython.noop),
+    ]
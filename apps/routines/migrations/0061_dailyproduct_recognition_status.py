@@ -0,0 +1,24 @@
+# Generated by Django 3.2.15 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routines", "0060_healthcareevent_remind_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailyproduct",
+            name="recognition_status",
+            field=models.CharField(
+                blank=True,
+                choices=[("PENDING", "PENDING"), ("OCR_DONE", "OCR_DONE"), ("PARSED", "PARSED"), ("FAILED", "FAILED")],
+                default="",
+                help_text="Status of the recognition of the product on the image.",
+                max_length=8,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-19 18:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routines", "0061_dailyproduct_recognition_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecognitionCacheEntry",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("kind", models.CharField(choices=[("OCR", "OCR"), ("PARSE", "PARSE")], max_length=5)),
+                ("key", models.CharField(max_length=64)),
+                ("value", models.JSONField(blank=True, null=True)),
+                ("last_used_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="recognitioncacheentry",
+            constraint=models.UniqueConstraint(fields=("kind", "key"), name="unique_recognition_cache_key"),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-19 18:45
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routines", "0062_recognitioncacheentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="scrapedproduct",
+            index=django.contrib.postgres.indexes.GinIndex(
+                models.Func(
+                    django.db.models.functions.text.Lower("title"),
+                    models.Value(" "),
+                    function="regexp_split_to_array",
+                    output_field=django.contrib.postgres.fields.ArrayField(
+                        base_field=models.TextField(), size=None
+                    ),
+                ),
+                name="scraped_product_title_tokens",
+            ),
+        ),
+    ]
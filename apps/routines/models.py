@@ -1,12 +1,14 @@
 import datetime
 import logging
+from typing import Optional
 
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import JSONField, Q, QuerySet, F, Value, TextField  # type: ignore
+from django.db import models, transaction
+from django.db.models import JSONField, Q, QuerySet, Value, TextField  # type: ignore
 from django.db.models.expressions import Func
 from django.db.models.functions import Lower
 from django.utils import timezone
@@ -14,7 +16,6 @@ from django.utils.text import slugify
 from import_export.resources import ModelResource
 import textdistance
 
-from apps.chat_gpt.interfaces import ChatGptRekognitionInterface
 from apps.home.models import FaceScanCommentTemplate, SiteConfiguration
 from apps.monetization.helpers import (
     get_play_store_response,
@@ -24,6 +25,7 @@ from apps.monetization.helpers import (
 )
 from apps.monetization.models import StoreProduct
 from apps.routines import (
+    APPOINTMENT_REMINDER_HOURS_BEFORE,
     DietBalance,
     ExerciseHours,
     FeelingToday,
@@ -41,9 +43,10 @@ from apps.routines import (
     PurchaseStatus,
     AppStores,
     ProductType,
+    RecognitionCacheKind,
+    RecognitionStatus,
     RecommendationCategory,
 )
-from apps.text_rekognition.script import TextRekognition
 from apps.users.models import User
 from apps.utils.error_codes import Errors
 from apps.utils.models import BaseModel, UUIDBaseModel
@@ -191,6 +194,14 @@ class DailyProductGroup(BaseModel):
         ).exists()
 
 
+def get_title_tokens() -> Func:
+    """
+    Returns array of lowercase words of the title split by spaces. Scraped products are filtered with the expression on
+    `title`, so lookups use the GIN index of the same expression.
+    """
+    return Func(Lower("title"), Value(" "), function="regexp_split_to_array", output_field=ArrayField(TextField()))
+
+
 class ScrapedProduct(models.Model):
     brand = models.CharField(blank=True, max_length=255)
     title = models.CharField(max_length=255, unique=True)
@@ -209,6 +220,9 @@ class ScrapedProduct(models.Model):
     positive_effects = models.CharField(blank=True, max_length=255)
     type = models.CharField(max_length=11, choices=ProductType.get_choices(), blank=True)  # noqa: A003, VNE003
 
+    class Meta:
+        indexes = [GinIndex(get_title_tokens(), name="scraped_product_title_tokens")]
+
     def __str__(self):
         return self.title
 
@@ -234,6 +248,13 @@ class DailyProduct(BaseModel):
     easy_to_use_score = models.IntegerField(null=True, blank=True)
     cost_score = models.IntegerField(null=True, blank=True, default=0)
     parsed_by_chat_gpt_data = JSONField(null=True, blank=True)
+    recognition_status = models.CharField(
+        max_length=8,
+        choices=RecognitionStatus.get_choices(),
+        blank=True,
+        default="",
+        help_text="Status of the recognition of the product on the image.",
+    )
 
     CLEARABLE_FIELDS = ["brand", "ingredients", "size"]
     CLEARABLE_FOREIGN_KEYS = ["product_info"]
@@ -246,52 +267,38 @@ class DailyProduct(BaseModel):
         self._original_image = self.image
 
     def save(self, *args: list, **kwargs: dict) -> None:  # type: ignore[override]
-        if self.image != self._original_image:
+        image_changed = self.image != self._original_image
+        if image_changed:
             for field in self.CLEARABLE_FIELDS:
                 setattr(self, field, "")
-                self.product_info = None
-            super().save(*args, **kwargs)  # type: ignore[arg-type]
-            self.name = self.save_name_from_parsed_image()
+            self.product_info = None
+            self.name = ""
+            self.parsed_by_chat_gpt_data = None
+            self.recognition_status = ""
+        is_recognition_needed = bool(self.image) and (image_changed or self._state.adding)
+        if is_recognition_needed:
+            self.recognition_status = RecognitionStatus.PENDING
         super().save(*args, **kwargs)  # type: ignore[arg-type]
+        self._original_image = self.image
+        if is_recognition_needed:
+            self.schedule_recognition([self])
 
-    # def create
-
-    def save_name_from_parsed_image(self):
-        try:
-            img_file = self.image
-        except ValueError:
-            self.add_image_parse_fail_count()
-            return ""
-        result = TextRekognition.run_bytes(img_file)
-        if result == "":
-            self.add_image_parse_fail_count()
-            self.image = None
-        else:
-            self.remove_image_parse_fail_count()
-            self.parsed_by_chat_gpt_data = ChatGptRekognitionInterface.parse_rekognition_text(result)
-            if self.parsed_by_chat_gpt_data:
-                self.brand = self.parsed_by_chat_gpt_data.get("brand")
-        return result
-
-    def add_image_parse_fail_count(self):
-        self.image_parse_fail += 1
+    @staticmethod
+    def schedule_recognition(products: list["DailyProduct"]) -> None:
+        """Recognizes the products on their images with a Celery pipeline after the current transaction is committed"""
+        from apps.routines.tasks import recognize_daily_products_text
 
-    def remove_image_parse_fail_count(self):
-        self.image_parse_fail = 0
+        images = [(product.id, product.image.name) for product in products if product.image]
+        if images:
+            transaction.on_commit(lambda: recognize_daily_products_text.delay(images))
 
     def get_similar_scrapped_product_by_title(self, lens_title):
-        formatted_title = Func(
-            F("lower_title"),
-            Value(" "),
-            function="regexp_split_to_array",
-            output=ArrayField(TextField()),
-        )
         tokens_list = self.lens_title_to_tokens_list(lens_title)
-        scrapped_products = (
-            ScrapedProduct.objects.annotate(lower_title=Lower("title"))
-            .annotate(formatted_title=formatted_title)
-            .filter(formatted_title__contains=tokens_list[0])
-            .values("id", "brand", "title", "ingredients", "formatted_title")
+        # only titles containing the first word are ranked, they are found with the GIN index of title tokens
+        scrapped_products = list(
+            ScrapedProduct.objects.annotate(formatted_title=get_title_tokens())
+            .filter(formatted_title__contains=tokens_list[:1])
+            .values("id", "formatted_title")
         )
         if not scrapped_products:
             return None
@@ -363,6 +370,24 @@ class DailyProduct(BaseModel):
         return set(cls.objects.values_list(field, flat=True))
 
 
+class RecognitionCacheEntry(BaseModel):
+    """
+    Cached result of the product recognition, keyed by SHA-256 of the image content for OCR text and of the normalized
+    OCR text for the parsed data (see `apps.routines.recognition`). Least recently used entries are evicted.
+    """
+
+    kind = models.CharField(max_length=5, choices=RecognitionCacheKind.get_choices())
+    key = models.CharField(max_length=64)
+    value = JSONField(null=True, blank=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["kind", "key"], name="unique_recognition_cache_key")]
+
+    def __str__(self):
+        return f"{self.kind} {self.key}"
+
+
 class DailyProductTemplate(BaseModel):
     name = models.CharField(max_length=255)
     brand = models.CharField(max_length=255)
@@ -492,6 +517,10 @@ class DailyStatistics(BaseModel):
     )
     routine_count_status = models.CharField(max_length=30, choices=DailyRoutineCountStatus.get_choices())
     date = models.DateField(help_text="date for the statistics")
+    points_version = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="version of the points table used for the calculation",
+    )
 
     def __str__(self):
         return f"{self.user} daily statistics for {self.date}"
@@ -588,6 +617,25 @@ class HealthCareEvent(BaseModel):
     remind_me = models.BooleanField(default=True)
     is_reminder_sent = models.BooleanField(default=False)
     reminder_sent_at = models.DateTimeField(help_text="reminder sent at", null=True, blank=True)
+    remind_at = models.DateTimeField(help_text="next scheduled reminder", null=True, blank=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.remind_at = self.get_remind_at(timezone.now())
+        super().save(*args, **kwargs)
+
+    def get_remind_at(self, since: datetime.datetime) -> Optional[datetime.datetime]:
+        """Returns the first reminder time not earlier than `since` or None if there is no upcoming reminder"""
+        if not self.remind_me or self.is_reminder_sent or self.event_type != HealthCareEventTypes.APPOINTMENT:
+            return None
+        start_date = self._meta.get_field("start_date").to_python(self.start_date)
+        time = self._meta.get_field("time").to_python(self.time)
+        if not start_date or not time:
+            return None
+        event_at = datetime.datetime.combine(start_date, time, tzinfo=datetime.timezone.utc)
+        for hours_before in APPOINTMENT_REMINDER_HOURS_BEFORE:
+            if (remind_at := event_at - datetime.timedelta(hours=hours_before)) >= since:
+                return remind_at
+        return None
 
     def _check_appointment_already_exists_on_same_datetime(self) -> None:
         filters = Q(
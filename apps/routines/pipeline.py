@@ -0,0 +1,89 @@
+import datetime
+import logging
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Iterator, Optional
+
+from django.db import transaction
+
+from apps.routines.models import DailyQuestionnaire, Routine
+from apps.routines.scoring import update_daily_statistics
+
+LOGGER = logging.getLogger("app")
+
+_pending = threading.local()
+
+
+def mark_daily_questionnaire_changed(questionnaire: DailyQuestionnaire) -> None:
+    """
+    Registers a "user changed on date" event for derived data (`DailyStatistics` and predictions). Without an active
+    `coalesce_derived_data_updates` block the derived data is recalculated immediately.
+    """
+    if not _register_event(questionnaire.user_id, questionnaire.created_at.date()):
+        update_daily_statistics(questionnaire)
+
+
+def mark_routine_created(routine: Routine) -> bool:
+    """
+    Registers the day of the created routine inside an active `coalesce_derived_data_updates` block. Returns False
+    without the block, the caller then updates the derived data itself.
+    """
+    return _register_event(routine.user_id, routine.created_at.date())
+
+
+@contextmanager
+def coalesce_derived_data_updates() -> Iterator[None]:
+    """
+    Collects derived data events inside the block and deduplicates them per user and date. After the current
+    transaction is committed the derived data is recalculated once per user and date by the `recalculate_derived_data`
+    celery task, out of the request. Nested blocks are merged into the outermost one.
+
+    Usage example:
+        with coalesce_derived_data_updates(), transaction.atomic():
+            routine.save()
+            questionnaire.save()
+    """
+    if _get_pending_events() is not None:
+        yield
+        return
+
+    _pending.events = set()
+    try:
+        yield
+        events = _pending.events
+    finally:
+        _pending.events = None
+
+    if events:
+        from apps.routines.tasks import recalculate_derived_data
+
+        user_days = [[user_id, date.isoformat()] for user_id, date in sorted(events)]
+        transaction.on_commit(partial(recalculate_derived_data.delay, user_days))
+
+
+def get_latest_daily_questionnaire(user_id: int, date: datetime.date) -> Optional[DailyQuestionnaire]:
+    return (
+        DailyQuestionnaire.objects.filter(user_id=user_id, created_at__date=date)
+        .select_related("user")
+        .order_by("-updated_at")
+        .first()
+    )
+
+
+def process_derived_data_events(questionnaires: list[DailyQuestionnaire]) -> None:
+    for questionnaire in questionnaires:
+        update_daily_statistics(questionnaire)
+    LOGGER.debug("Recalculated derived data for [%s] user days.", len(questionnaires))
+
+
+def _register_event(user_id: int, date: datetime.date) -> bool:
+    events = _get_pending_events()
+    if events is None:
+        return False
+    events.add((user_id, date))
+    return True
+
+
+def _get_pending_events() -> Optional[set[tuple[int, datetime.date]]]:
+    return getattr(_pending, "events", None)
@@ -1,5 +1,5 @@
 import datetime
-from typing import Optional, List
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
 
 from apps.routines import (
     PredictionTypes,
@@ -134,327 +134,189 @@ def get_menstruation_phase_prediction(days_since_last_period: int, cycle_duratio
     return phase_prediction
 
 
-def get_other_predictions(instance: DailyStatistics, last_two_prediction_types: List) -> list[str]:  # noqa: CFQ001,C901
+class StreakPredictionRule(NamedTuple):
+    """Declarative rule for predictions based on the same answer group repeated in consecutive `DailyQuestionnaire`s.
+
+    `answer_groups` maps a prediction type to the answers which belong to it. A prediction type is selected when the
+    last `streak_length` answers for `attribute` all belong to its group. `category` is used to skip the rule if one
+    of the last predictions already belongs to it.
+    """
+
+    attribute: str
+    answer_groups: dict[str, Iterable[Union[str, int]]]
+    category: list[str]
+    streak_length: int = 3
+
+
+# According to business logic we need to consider 3 consecutive answers for these predictions. The order of the rules
+# is the order of the selected prediction types.
+OTHER_PREDICTION_RULES = [
+    # Skin today: 1. Bad or Mehhh, 2. Well, 3. Love it
+    StreakPredictionRule(
+        attribute="feeling_today",
+        answer_groups={
+            PredictionTypes.SKIN_TODAY_BAD_OR_MEHHH: [FeelingToday.BAD, FeelingToday.MEHHH],
+            PredictionTypes.SKIN_TODAY_WELL: [FeelingToday.WELL],
+            PredictionTypes.SKIN_TODAY_LOVE_IT: [FeelingToday.LOVE_IT],
+        },
+        category=PredictionCategories.SKIN_TODAY_TYPES,
+    ),
+    # Skin feeling: 1. Sensitive, 2. Greasy, 3. Normal, 4. Dehydrated
+    StreakPredictionRule(
+        attribute="skin_feel",
+        answer_groups={
+            PredictionTypes.SKIN_FEELING_SENSITIVE: [SkinFeel.SENSITIVE],
+            PredictionTypes.SKIN_FEELING_GREASY: [SkinFeel.GREASY],
+            PredictionTypes.SKIN_FEELING_NORMAL: [SkinFeel.NORMAL],
+            PredictionTypes.SKIN_FEELING_DEHYDRATED: [SkinFeel.DEHYDRATED],
+        },
+        category=PredictionCategories.SKIN_FEELING_TYPES,
+    ),
+    # Sleep hours: 1. less than 7, 2. equal or greater than 7
+    StreakPredictionRule(
+        attribute="hours_of_sleep",
+        answer_groups={
+            PredictionTypes.SLEEP_HOURS_LESS_THAN_SEVEN: range(0, 7),
+            PredictionTypes.SLEEP_HOURS_GREATER_EQUAL_SEVEN: range(7, 15),
+        },
+        category=PredictionCategories.SLEEP_HOURS_TYPES,
+    ),
+    # Sleep quality: 1. Bad or Mehhh, 2. Well or Love it
+    StreakPredictionRule(
+        attribute="sleep_quality",
+        answer_groups={
+            PredictionTypes.SLEEP_QUALITY_BAD_OR_MEHHH: [SleepQuality.BAD, SleepQuality.MEHHH],
+            PredictionTypes.SLEEP_QUALITY_WELL_OR_LOVE_IT: [SleepQuality.WELL, SleepQuality.LOVE_IT],
+        },
+        category=PredictionCategories.SLEEP_QUALITY_TYPES,
+    ),
+    # Exercise: 1. Bad, 2. Good, 3. Perfect
+    StreakPredictionRule(
+        attribute="exercise_hours",
+        answer_groups={
+            PredictionTypes.EXERCISE_HOURS_BAD: [ExerciseHours.ZERO],
+            PredictionTypes.EXERCISE_HOURS_GOOD: [
+                ExerciseHours.TWENTY_MIN,
+                ExerciseHours.THIRTY_MIN,
+                ExerciseHours.FORTY_FIVE_MIN,
+            ],
+            PredictionTypes.EXERCISE_HOURS_PERFECT: [
+                ExerciseHours.ONE_HOUR,
+                ExerciseHours.ONE_AND_A_HALF_HOURS,
+                ExerciseHours.TWO_HOURS,
+                ExerciseHours.TWO_PLUS,
+            ],
+        },
+        category=PredictionCategories.EXERCISE_HOURS_TYPES,
+    ),
+    # Stress: 1. Extreme, 2. Moderate, 3. Relaxed
+    StreakPredictionRule(
+        attribute="stress_levels",
+        answer_groups={
+            PredictionTypes.STRESS_EXTREME: [StressLevel.EXTREME],
+            PredictionTypes.STRESS_MODERATE: [StressLevel.MODERATE],
+            PredictionTypes.STRESS_RELAXED: [StressLevel.RELAXED],
+        },
+        category=PredictionCategories.STRESS_TYPES,
+    ),
+    # Diet: 1. Unbalanced or Mildly balanced, 2. Balanced
+    StreakPredictionRule(
+        attribute="diet_today",
+        answer_groups={
+            PredictionTypes.DIET_UNBALANCED_or_MILDLY_BALANCED: [DietBalance.UNBALANCED, DietBalance.MILDLY_BALANCED],
+            PredictionTypes.DIET_BALANCED: [DietBalance.BALANCED],
+        },
+        category=PredictionCategories.DIET_TYPES,
+    ),
+    # Water intake: 1. 0 or 1 litre, 2. 2 or 3 litre
+    StreakPredictionRule(
+        attribute="water",
+        answer_groups={
+            PredictionTypes.WATER_INTAKE_ZERO_OR_ONE: range(0, 2),
+            PredictionTypes.WATER_INTAKE_TWO_OR_THREE: range(2, 4),
+        },
+        category=PredictionCategories.WATER_INTAKE_TYPES,
+    ),
+    # Life happened: 1. Alcohol or coffee or junk food and sweets
+    StreakPredictionRule(
+        attribute="life_happened",
+        answer_groups={
+            PredictionTypes.LIFE_HAPPENED_COFFEE_OR_ALCOHOL_OR_JUNK_FOOD: [
+                LifeHappened.COFFEE,
+                LifeHappened.ALCOHOL,
+                LifeHappened.JUNK_FOOD_AND_SWEETS,
+            ],
+        },
+        category=PredictionCategories.LIFE_HAPPENED_TYPES,
+    ),
+]
+
+
+class CompiledStreakPredictionRules:
+    """Streak prediction rules compiled into lookup tables, so that every rule is evaluated in a single pass over the
+    answer matrix (one row per `DailyQuestionnaire`, one column per rule attribute)."""
+
+    def __init__(self, rules: list[StreakPredictionRule]) -> None:
+        self.rules = rules
+        self.attributes = [rule.attribute for rule in rules]
+        self.streak_lengths = [rule.streak_length for rule in rules]
+        self.max_streak_length = max(self.streak_lengths, default=0)
+        # Answer to prediction type lookup per column of the answer matrix
+        self.lookups: list[dict[Union[str, int], str]] = [
+            {answer: prediction_type for prediction_type, answers in rule.answer_groups.items() for answer in answers}
+            for rule in rules
+        ]
+        # Prediction type to rule column lookup, used to skip rules of recently shown prediction categories
+        self.columns_by_prediction_type = {
+            prediction_type: column for column, rule in enumerate(rules) for prediction_type in rule.category
+        }
+
+    def evaluate(self, answer_matrix: Sequence[Sequence], excluded_prediction_types: Iterable[str] = ()) -> list[str]:
+        """Returns prediction types of all the rules whose latest answers are in the same answer group.
+
+        `answer_matrix` rows must be ordered from the latest to the oldest answers.
+        """
+        excluded_columns = {
+            self.columns_by_prediction_type[prediction_type]
+            for prediction_type in excluded_prediction_types
+            if prediction_type in self.columns_by_prediction_type
+        }
+        candidates: list[Optional[str]] = [None] * len(self.rules)
+        matching = [column not in excluded_columns for column in range(len(self.rules))]
+
+        for row, answers in enumerate(answer_matrix[: self.max_streak_length]):
+            for column, streak_length in enumerate(self.streak_lengths):
+                if not matching[column] or row >= streak_length:
+                    continue
+                prediction_type = self._lookup(column, answers[column])
+                if prediction_type is None or (row and prediction_type != candidates[column]):
+                    matching[column] = False
+                else:
+                    candidates[column] = prediction_type
+
+        return [
+            candidates[column]  # type: ignore
+            for column, streak_length in enumerate(self.streak_lengths)
+            if matching[column] and len(answer_matrix) >= streak_length
+        ]
+
+    def _lookup(self, column: int, answer: Union[str, int, list]) -> Optional[str]:
+        if isinstance(answer, list):
+            # Some attrs could contain list of items, the first item from any answer group decides the group
+            return next((self.lookups[column][item] for item in answer if item in self.lookups[column]), None)
+        return self.lookups[column].get(answer)
+
+
+COMPILED_OTHER_PREDICTION_RULES = CompiledStreakPredictionRules(OTHER_PREDICTION_RULES)
+
+
+def get_other_predictions(instance: DailyStatistics, last_two_prediction_types: List) -> list[str]:
     """According to business logic we need to consider 3 consecutive answers for these predictions from the
     `DailyQuestionnaire`. If we get same type of answers for 3 consecutive daily questionnaires and last prediction
     was not the same as currently selected one, only then we'll consider creating a prediction for that.
     """
-
-    total_considerable_consecutive_answers = 3
-    last_considerable_daily_questions = instance.user.daily_questionnaires.all().values_list(
-        "feeling_today",
-        "skin_feel",
-        "hours_of_sleep",
-        "sleep_quality",
-        "exercise_hours",
-        "stress_levels",
-        "diet_today",
-        "water",
-        "life_happened",
-    )[:total_considerable_consecutive_answers]
-    selected_predictions_types = []
-
-    # Calculate skin today prediction: 3 answers in a row
-    if not any(
-        prediction_type in PredictionCategories.SKIN_TODAY_TYPES for prediction_type in last_two_prediction_types
-    ):
-        skin_today_answers = [answers[0] for answers in last_considerable_daily_questions]
-        if skin_today_prediction_type := get_skin_today_prediction(
-            skin_today_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(skin_today_prediction_type)
-
-    # Calculate skin feeling prediction : 3 answers in a row
-    if not any(
-        prediction_type in PredictionCategories.SKIN_FEELING_TYPES for prediction_type in last_two_prediction_types
-    ):
-        skin_feeling_answers = [answers[1] for answers in last_considerable_daily_questions]
-        if skin_feeling_prediction_type := get_skin_feeling_prediction(
-            skin_feeling_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(skin_feeling_prediction_type)
-
-    # Calculate sleep hour prediction: 3 answers in a row (1. less than 7, 2. equal or greater than 7)
-    if not any(
-        prediction_type in PredictionCategories.SLEEP_HOURS_TYPES for prediction_type in last_two_prediction_types
-    ):
-        sleep_hours_answers = [answers[2] for answers in last_considerable_daily_questions]
-        if sleep_hour_prediction_type := get_sleep_hour_prediction(
-            sleep_hours_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(sleep_hour_prediction_type)
-
-    # Calculate sleep quality prediction: 3 answers in a row (1. BAD or MEH 2. Well or Love it)
-    if not any(
-        prediction_type in PredictionCategories.SLEEP_QUALITY_TYPES for prediction_type in last_two_prediction_types
-    ):
-        sleep_quality_answers = [answers[3] for answers in last_considerable_daily_questions]
-        if sleep_quality_prediction_type := get_sleep_quality_prediction(
-            sleep_quality_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(sleep_quality_prediction_type)
-
-    # Calculate exercise prediction: 3 answers in a row (1. Bad, 2. Good 3. Perfect)
-    if not any(
-        prediction_type in PredictionCategories.EXERCISE_HOURS_TYPES for prediction_type in last_two_prediction_types
-    ):
-        exercise_hours_answers = [answers[4] for answers in last_considerable_daily_questions]
-        if exercise_hours_prediction_type := get_exercise_hours_prediction(
-            exercise_hours_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(exercise_hours_prediction_type)
-
-    # Calculate stress prediction: 3 answers in a row (1. Extreme, 2. Moderate, 3. Relaxed)
-    if not any(prediction_type in PredictionCategories.STRESS_TYPES for prediction_type in last_two_prediction_types):
-        stress_level_answers = [answers[5] for answers in last_considerable_daily_questions]
-        if stress_level_prediction_type := get_stress_level_prediction(
-            stress_level_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(stress_level_prediction_type)
-
-    # Calculate diet prediction: 3 answers in a row (1. Balanced 2. Unbalanced or Mildly balanced)
-    if not any(prediction_type in PredictionCategories.DIET_TYPES for prediction_type in last_two_prediction_types):
-        diet_answers = [answers[6] for answers in last_considerable_daily_questions]
-        if diet_prediction_type := get_diet_prediction(diet_answers, total_considerable_consecutive_answers):
-            selected_predictions_types.append(diet_prediction_type)
-
-    # Calculate water intake prediction: 3 answers in a row (1. 0 or 1 litre, 2. 2 or 3 litre)
-    if not any(
-        prediction_type in PredictionCategories.WATER_INTAKE_TYPES for prediction_type in last_two_prediction_types
-    ):
-        water_intake_answers = [answers[7] for answers in last_considerable_daily_questions]
-        if water_intake_prediction_type := get_water_intake_prediction(
-            water_intake_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(water_intake_prediction_type)
-
-    # Calculate life happened prediction: 3 answers in a row (1. Alcohol or coffee or junk food and sweets)
-    if not any(
-        prediction_type in PredictionCategories.LIFE_HAPPENED_TYPES for prediction_type in last_two_prediction_types
-    ):
-        life_happened_answers = [answers[8] for answers in last_considerable_daily_questions]
-        if life_happened_prediction_type := get_life_happened_prediction(
-            life_happened_answers, total_considerable_consecutive_answers
-        ):
-            selected_predictions_types.append(life_happened_prediction_type)
-    return selected_predictions_types
-
-
-def get_skin_today_prediction(  # noqa: C901
-    skin_today_answers: list[str], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns skin today prediction from `DailyQuestionnaire`"""
-    skin_today_prediction_type = None
-    bad_or_mehhh_count = 0
-    well_count = 0
-    love_it_count = 0
-    for feeling in skin_today_answers:
-        if feeling in [FeelingToday.BAD, FeelingToday.MEHHH]:
-            bad_or_mehhh_count += 1
-        elif feeling == FeelingToday.WELL:
-            well_count += 1
-        elif feeling == FeelingToday.LOVE_IT:
-            love_it_count += 1
-
-    if bad_or_mehhh_count == total_considerable_consecutive_answers:
-        skin_today_prediction_type = PredictionTypes.SKIN_TODAY_BAD_OR_MEHHH
-    if well_count == total_considerable_consecutive_answers:
-        skin_today_prediction_type = PredictionTypes.SKIN_TODAY_WELL
-    if love_it_count == total_considerable_consecutive_answers:
-        skin_today_prediction_type = PredictionTypes.SKIN_TODAY_LOVE_IT
-    return skin_today_prediction_type
-
-
-def get_skin_feeling_prediction(  # noqa: C901
-    skin_feeling_answers: list[str], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns skin feel prediction from `DailyQuestionnaire`"""
-    skin_feeling_prediction_type = None
-    sensitive_count = 0
-    greasy_count = 0
-    normal_count = 0
-    dehydrated_count = 0
-
-    for feeling in skin_feeling_answers:
-        if feeling == SkinFeel.SENSITIVE:
-            sensitive_count += 1
-        elif feeling == SkinFeel.GREASY:
-            greasy_count += 1
-        elif feeling == SkinFeel.DEHYDRATED:
-            dehydrated_count += 1
-        elif feeling == SkinFeel.NORMAL:
-            normal_count += 1
-
-    if sensitive_count == total_considerable_consecutive_answers:
-        skin_feeling_prediction_type = PredictionTypes.SKIN_FEELING_SENSITIVE
-    if greasy_count == total_considerable_consecutive_answers:
-        skin_feeling_prediction_type = PredictionTypes.SKIN_FEELING_GREASY
-    if normal_count == total_considerable_consecutive_answers:
-        skin_feeling_prediction_type = PredictionTypes.SKIN_FEELING_NORMAL
-    if dehydrated_count == total_considerable_consecutive_answers:
-        skin_feeling_prediction_type = PredictionTypes.SKIN_FEELING_DEHYDRATED
-    return skin_feeling_prediction_type
-
-
-def get_sleep_hour_prediction(
-    sleep_hour_answers: list[int], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns sleep hours prediction from `DailyQuestionnaire`"""
-    sleep_hour_prediction_type = None
-    less_than_seven_count = 0
-    greater_or_equal_seven_count = 0
-    min_optimal_sleep_hours = 7
-
-    for hours in sleep_hour_answers:
-        if hours < min_optimal_sleep_hours:
-            less_than_seven_count += 1
-        elif hours >= min_optimal_sleep_hours:
-            greater_or_equal_seven_count += 1
-
-    if greater_or_equal_seven_count == total_considerable_consecutive_answers:
-        sleep_hour_prediction_type = PredictionTypes.SLEEP_HOURS_GREATER_EQUAL_SEVEN
-    if less_than_seven_count == total_considerable_consecutive_answers:
-        sleep_hour_prediction_type = PredictionTypes.SLEEP_HOURS_LESS_THAN_SEVEN
-    return sleep_hour_prediction_type
-
-
-def get_sleep_quality_prediction(
-    sleep_quality_answers: list[str], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns sleep quality prediction from `DailyQuestionnaire`"""
-    sleep_quality_prediction_type = None
-    bad_or_mehhh_count = 0
-    well_or_love_it_count = 0
-
-    for quality in sleep_quality_answers:
-        if quality == SleepQuality.BAD or quality == SleepQuality.MEHHH:
-            bad_or_mehhh_count += 1
-        elif quality == SleepQuality.WELL or quality == SleepQuality.LOVE_IT:
-            well_or_love_it_count += 1
-
-    if bad_or_mehhh_count == total_considerable_consecutive_answers:
-        sleep_quality_prediction_type = PredictionTypes.SLEEP_QUALITY_BAD_OR_MEHHH
-    if well_or_love_it_count == total_considerable_consecutive_answers:
-        sleep_quality_prediction_type = PredictionTypes.SLEEP_QUALITY_WELL_OR_LOVE_IT
-    return sleep_quality_prediction_type
-
-
-def get_exercise_hours_prediction(  # noqa: C901
-    exercise_hours_answers: list[str], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns exercise hours prediction from `DailyQuestionnaire`"""
-    exercise_hours_prediction_type = None
-    bad_count = 0
-    good_count = 0
-    perfect_count = 0
-
-    for hours in exercise_hours_answers:
-        if hours == ExerciseHours.ZERO:
-            bad_count += 1
-        elif hours in [
-            ExerciseHours.TWENTY_MIN,
-            ExerciseHours.THIRTY_MIN,
-            ExerciseHours.FORTY_FIVE_MIN,
-        ]:
-            good_count += 1
-        elif hours in [
-            ExerciseHours.ONE_HOUR,
-            ExerciseHours.ONE_AND_A_HALF_HOURS,
-            ExerciseHours.TWO_HOURS,
-            ExerciseHours.TWO_PLUS,
-        ]:
-            perfect_count += 1
-
-    if bad_count == total_considerable_consecutive_answers:
-        exercise_hours_prediction_type = PredictionTypes.EXERCISE_HOURS_BAD
-    if good_count == total_considerable_consecutive_answers:
-        exercise_hours_prediction_type = PredictionTypes.EXERCISE_HOURS_GOOD
-    if perfect_count == total_considerable_consecutive_answers:
-        exercise_hours_prediction_type = PredictionTypes.EXERCISE_HOURS_PERFECT
-    return exercise_hours_prediction_type
-
-
-def get_stress_level_prediction(  # noqa: C901
-    sleep_level_answers: list[str], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns stress level prediction from `DailyQuestionnaire`"""
-    stress_level_prediction_type = None
-    extreme_count = 0
-    moderate_count = 0
-    relaxed_count = 0
-
-    for level in sleep_level_answers:
-        if level == StressLevel.EXTREME:
-            extreme_count += 1
-        elif level == StressLevel.MODERATE:
-            moderate_count += 1
-        elif level == StressLevel.RELAXED:
-            relaxed_count += 1
-
-    if extreme_count == total_considerable_consecutive_answers:
-        stress_level_prediction_type = PredictionTypes.STRESS_EXTREME
-    if moderate_count == total_considerable_consecutive_answers:
-        stress_level_prediction_type = PredictionTypes.STRESS_MODERATE
-    if relaxed_count == total_considerable_consecutive_answers:
-        stress_level_prediction_type = PredictionTypes.STRESS_RELAXED
-    return stress_level_prediction_type
-
-
-def get_diet_prediction(diet_answers: list[str], total_considerable_consecutive_answers: int) -> Optional[str]:
-    """Calculates and returns diet prediction from `DailyQuestionnaire`"""
-    diet_prediction_type = None
-    unbalanced_or_mildly_count = 0
-    balanced_count = 0
-
-    for diet in diet_answers:
-        if diet == DietBalance.UNBALANCED or diet == DietBalance.MILDLY_BALANCED:
-            unbalanced_or_mildly_count += 1
-        elif diet == DietBalance.BALANCED:
-            balanced_count += 1
-
-    if unbalanced_or_mildly_count == total_considerable_consecutive_answers:
-        diet_prediction_type = PredictionTypes.DIET_UNBALANCED_or_MILDLY_BALANCED
-    if balanced_count == total_considerable_consecutive_answers:
-        diet_prediction_type = PredictionTypes.DIET_BALANCED
-    return diet_prediction_type
-
-
-def get_water_intake_prediction(
-    water_intake_answers: list[int], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns water intake prediction from `DailyQuestionnaire`"""
-    water_intake_prediction_type = None
-    zero_or_one_litre_count = 0
-    two_or_three_litre_count = 0
-
-    for litre in water_intake_answers:
-        if litre <= 1:
-            zero_or_one_litre_count += 1
-        elif litre >= 2:
-            two_or_three_litre_count += 1
-
-    if zero_or_one_litre_count == total_considerable_consecutive_answers:
-        water_intake_prediction_type = PredictionTypes.WATER_INTAKE_ZERO_OR_ONE
-    if two_or_three_litre_count == total_considerable_consecutive_answers:
-        water_intake_prediction_type = PredictionTypes.WATER_INTAKE_TWO_OR_THREE
-    return water_intake_prediction_type
-
-
-def get_life_happened_prediction(
-    life_happened_answers: list[list[str]], total_considerable_consecutive_answers: int
-) -> Optional[str]:
-    """Calculates and returns life happened prediction from `DailyQuestionnaire`"""
-    life_happened_prediction_type = None
-    coffee_alcohol_junk_food_count = 0
-
-    for answer in life_happened_answers:
-        if answer in [
-            LifeHappened.COFFEE,
-            LifeHappened.ALCOHOL,
-            LifeHappened.JUNK_FOOD_AND_SWEETS,
-        ]:
-            coffee_alcohol_junk_food_count += 1
-
-    if coffee_alcohol_junk_food_count == total_considerable_consecutive_answers:
-        life_happened_prediction_type = PredictionTypes.LIFE_HAPPENED_COFFEE_OR_ALCOHOL_OR_JUNK_FOOD
-    return life_happened_prediction_type
+    rules = COMPILED_OTHER_PREDICTION_RULES
+    last_considerable_daily_questions = instance.user.daily_questionnaires.all().values_list(*rules.attributes)[
+        : rules.max_streak_length
+    ]
+    return rules.evaluate(list(last_considerable_daily_questions), last_two_prediction_types)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+import hashlib
+import io
+from typing import Any, Callable, Optional
+
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from apps.chat_gpt.interfaces import ChatGptRekognitionInterface
+from apps.routines import RecognitionCacheKind
+from apps.routines.models import RecognitionCacheEntry
+from apps.text_rekognition.script import TextRekognition
+
+RECOGNITION_CACHE_MAX_ENTRIES = 100_000
+# last usage of an entry is refreshed at most once per interval to avoid a write on every hit
+RECOGNITION_CACHE_TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def read_images_text(images: list[FieldFile]) -> list[str]:
+    """
+    Returns OCR texts of the images in their order. Images with the same content are read by Rekognition only once and
+    the uncached images are read concurrently.
+    """
+    contents = []
+    for image in images:
+        with image.open("rb") as file:
+            contents.append(file.read())
+    keys = [hashlib.sha256(content).hexdigest() for content in contents]
+    texts = _get_cached_values(RecognitionCacheKind.OCR, keys)
+
+    missing_contents = {key: content for key, content in zip(keys, contents) if key not in texts}
+    if missing_contents:
+        read_texts = TextRekognition.run_many(io.BytesIO(content) for content in missing_contents.values())
+        texts.update(zip(missing_contents, read_texts))
+        _set_cached_values(RecognitionCacheKind.OCR, {key: texts[key] for key in missing_contents})
+    return [texts[key] for key in keys]
+
+
+def parse_image_text(text: str) -> Optional[dict]:
+    """Returns brand, name, ingredients and size parsed from OCR text, case and spacing of the text are ignored"""
+    normalized_text = " ".join(text.lower().split())
+    key = hashlib.sha256(normalized_text.encode()).hexdigest()
+    return _get_or_compute(
+        RecognitionCacheKind.PARSE, key, lambda: ChatGptRekognitionInterface.parse_rekognition_text(text)
+    )
+
+
+def _get_or_compute(kind: RecognitionCacheKind, key: str, compute: Callable[[], Any]) -> Any:
+    """Returns the cached value or computes and caches it, missing results (`None`) are not cached"""
+    cached_values = _get_cached_values(kind, [key])
+    if key in cached_values:
+        return cached_values[key]
+    value = compute()
+    if value is not None:
+        _set_cached_values(kind, {key: value})
+    return value
+
+
+def _get_cached_values(kind: RecognitionCacheKind, keys: list[str]) -> dict[str, Any]:
+    now = timezone.now()
+    entries = RecognitionCacheEntry.objects.filter(kind=kind, key__in=keys).values("id", "key", "value", "last_used_at")
+    stale_ids = [entry["id"] for entry in entries if entry["last_used_at"] < now - RECOGNITION_CACHE_TOUCH_INTERVAL]
+    if stale_ids:
+        RecognitionCacheEntry.objects.filter(id__in=stale_ids).update(last_used_at=now)
+    return {entry["key"]: entry["value"] for entry in entries}
+
+
+def _set_cached_values(kind: RecognitionCacheKind, values: dict[str, Any]) -> None:
+    now = timezone.now()
+    # the same image or text could be cached concurrently
+    RecognitionCacheEntry.objects.bulk_create(
+        [RecognitionCacheEntry(kind=kind, key=key, value=value, last_used_at=now) for key, value in values.items()],
+        ignore_conflicts=True,
+    )
+
+
+def evict_recognition_cache_entries(max_entries: int = RECOGNITION_CACHE_MAX_ENTRIES) -> int:
+    """Removes least recently used entries above the limit, returns number of removed entries"""
+    last_used_at_values = RecognitionCacheEntry.objects.order_by("-last_used_at").values_list("last_used_at", flat=True)
+    cutoff = list(last_used_at_values[max_entries : max_entries + 1])  # noqa: E203
+    if not cutoff:
+        return 0
+    deleted_count, _ = RecognitionCacheEntry.objects.filter(last_used_at__lte=cutoff[0]).delete()
+    return deleted_count
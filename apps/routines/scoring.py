@@ -0,0 +1,230 @@
+import datetime
+import logging
+from typing import Callable, Iterable, Optional, Sequence, Union
+
+from django.db.models import QuerySet
+from django.db.models.functions import TruncDate
+
+from apps.routines import (
+    DAILY_STATISTICS_SECTIONS,
+    POINTS,
+    POINTS_VERSION,
+    DailyRoutineCountStatus,
+    RoutinePoints,
+    RoutineType,
+)
+from apps.routines.models import DailyQuestionnaire, DailyStatistics, Routine
+
+LOGGER = logging.getLogger("app")
+
+DAILY_STATISTICS_SCORE_FIELDS = ["skin_care", "well_being", "nutrition", "routine_count_status", "points_version"]
+
+
+class ScoringEngine:
+    """
+    `POINTS` table compiled into per-attribute lookup tables. Answers are scored as rows of `DailyQuestionnaire` values
+    in the order of `attributes`, so that many questionnaires can be scored from a single `values_list` query without
+    instantiating models. Answers missing from the `POINTS` table are counted as 0 points and reported once per scoring
+    run instead of once per answer.
+    """
+
+    def __init__(
+        self,
+        points: dict[str, dict[Union[str, int], int]] = None,
+        sections: dict[str, list[str]] = None,
+        version: int = POINTS_VERSION,
+    ) -> None:
+        points = POINTS if points is None else points
+        sections = DAILY_STATISTICS_SECTIONS if sections is None else sections
+        self.version = version
+        self.attributes = [attr for attrs in sections.values() for attr in attrs]
+        self.lookups = [dict(points.get(attr, {})) for attr in self.attributes]
+        # columns of every section in the answer rows
+        self.section_columns = []
+        start = 0
+        for attrs in sections.values():
+            self.section_columns.append(range(start, start + len(attrs)))
+            start += len(attrs)
+        self.missing_answers: set[tuple[str, Union[str, int]]] = set()
+
+    def score(self, answers: Sequence) -> list[int]:
+        """Returns section points (without routine points) for one row of answers"""
+        column_points = [self._get_points(column, answer) for column, answer in enumerate(answers)]
+        return [sum(column_points[column] for column in columns) for columns in self.section_columns]
+
+    def score_questionnaire(self, questionnaire: DailyQuestionnaire) -> list[int]:
+        return self.score([getattr(questionnaire, attr) for attr in self.attributes])
+
+    def score_many(self, rows: Iterable[Sequence]) -> list[list[int]]:
+        scores = [self.score(answers) for answers in rows]
+        self.report_missing_answers()
+        return scores
+
+    def report_missing_answers(self) -> None:
+        if self.missing_answers:
+            LOGGER.error("Answers %s not found in POINTS table.", sorted(self.missing_answers, key=str))
+            self.missing_answers.clear()
+
+    def _get_points(self, column: int, answer: Union[str, int, list]) -> int:
+        lookup = self.lookups[column]
+        if isinstance(answer, list):
+            # Some attrs could contain list of items, the lowest non-zero points are counted
+            values = [points for item in answer if (points := self._get_points(column, item))]
+            return min(values) if values else 0
+        try:
+            return lookup[answer]
+        except KeyError:
+            self.missing_answers.add((self.attributes[column], answer))
+            return 0
+
+
+SCORING_ENGINE = ScoringEngine()
+
+
+def get_routine_points(has_am_routines: bool, has_pm_routines: bool) -> tuple[int, str]:
+    """Returns earned routine points and `routine_count_status` for the day"""
+    # am/pm routine points are set according to
+    # `https://xd.adobe.com/view/d87117ca-cdc4-4b8b-bd53-7a206a39eca8-8d22`
+    if has_am_routines and has_pm_routines:
+        return (
+            RoutinePoints.AM_ROUTINE_POINT + RoutinePoints.PM_ROUTINE_POINT,
+            DailyRoutineCountStatus.COUNTING_COMPLETED,
+        )
+    if has_am_routines:
+        return RoutinePoints.AM_ROUTINE_POINT, DailyRoutineCountStatus.ONLY_AM_COUNTED
+    if has_pm_routines:
+        return RoutinePoints.PM_ROUTINE_POINT, DailyRoutineCountStatus.ONLY_PM_COUNTED
+    return 0, DailyRoutineCountStatus.NOT_COUNTED
+
+
+def update_daily_statistics(instance: DailyQuestionnaire) -> DailyStatistics:
+    """
+    This function calculates and creates daily statistics based on DailyQuestionnaires. While creating the
+    `DailyQuestionnaire` for a user, it calculates and creates `DailyStatistics`. During the calculation of the points,
+    we divided all the attributes of the  `DailyQuestionnaire` to three different sections, and they are-
+        1. skin care:
+            a. skin_feel
+            b. feeling_today
+            c. routines
+        2. well-being:
+            a. hours_of_sleep
+            b. sleep_quality
+            c. exercise_hours
+            d. stress_levels
+        3. nutrition:
+            a. diet_today
+            b. water
+            c. life_happened
+    To calculate total points we're using `POINTS` (compiled into `SCORING_ENGINE`) as the reference for different
+    attributes and their values.
+    While calculating skin care points, we need to consider two things- 1. total routines
+    and 2. Points based on values of skin care attributes.
+    Sometimes user may have one routine, two routines or no routines at all. To track, how many routines were counted,
+    we're using a flag `routine_count_status` which will be considered later if user creates daily routine and
+    skin care points will be updated accordingly.
+    """
+    current_date = instance.created_at.date()
+    today_routines = instance.user.routines.filter(created_at__date=current_date)
+    has_today_am_routines = today_routines.filter(routine_type=RoutineType.AM).exists()
+    has_today_pm_routines = today_routines.filter(routine_type=RoutineType.PM).exists()
+
+    # calculating skin care routine points and setting `routine_count_status` accordingly
+    total_earned_routine_points, routine_count_status = get_routine_points(has_today_am_routines, has_today_pm_routines)
+
+    skin_care_points_without_routines, well_being_points, nutrition_points = SCORING_ENGINE.score_questionnaire(
+        instance
+    )
+    SCORING_ENGINE.report_missing_answers()
+    skin_care_points = skin_care_points_without_routines + total_earned_routine_points
+
+    daily_statistics, _ = DailyStatistics.objects.update_or_create(
+        user=instance.user,
+        date=current_date,
+        defaults={
+            "skin_care": skin_care_points,
+            "well_being": well_being_points,
+            "nutrition": nutrition_points,
+            "routine_count_status": routine_count_status,
+            "points_version": SCORING_ENGINE.version,
+        },
+    )
+    return daily_statistics
+
+
+def recompute_daily_statistics(  # noqa: CFQ002
+    user_ids: Optional[list[int]] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    outdated_only: bool = False,
+    chunk_size: int = 1000,
+    engine: Optional[ScoringEngine] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Recomputes `DailyStatistics` points from the latest `DailyQuestionnaire` and routines of the same day with the
+    current `POINTS` table. Statistics are processed in chunks ordered by id and written with `bulk_update`, so no
+    `post_save` signals (and predictions) are fired. Returns total number of updated statistics.
+    """
+    engine = engine or SCORING_ENGINE
+    statistics = DailyStatistics.objects.all()
+    if user_ids:
+        statistics = statistics.filter(user_id__in=user_ids)
+    if start_date:
+        statistics = statistics.filter(date__gte=start_date)
+    if end_date:
+        statistics = statistics.filter(date__lte=end_date)
+    if outdated_only:
+        statistics = statistics.exclude(points_version=engine.version)
+
+    total = statistics.count()
+    processed = 0
+    updated = 0
+    last_id = 0
+    while chunk := list(statistics.filter(id__gt=last_id).order_by("id")[:chunk_size]):
+        updated += _recompute_chunk(chunk, engine)
+        processed += len(chunk)
+        last_id = chunk[-1].id
+        if progress_callback:
+            progress_callback(processed, total)
+    engine.report_missing_answers()
+    return updated
+
+
+def _recompute_chunk(chunk: list[DailyStatistics], engine: ScoringEngine) -> int:
+    user_ids = {item.user_id for item in chunk}
+    date_range = (min(item.date for item in chunk), max(item.date for item in chunk))
+
+    # the latest saved questionnaire of the day is the one the statistics were calculated from
+    answers_by_day = {}
+    questionnaires = _filter_by_day(DailyQuestionnaire.objects, user_ids, date_range).order_by("updated_at")
+    for user_id, day, *answers in questionnaires.values_list("user_id", "day", *engine.attributes):
+        answers_by_day[(user_id, day)] = answers
+
+    routine_types_by_day: dict[tuple[int, datetime.date], set[str]] = {}
+    routines = _filter_by_day(Routine.objects, user_ids, date_range).values_list("user_id", "day", "routine_type")
+    for user_id, day, routine_type in routines.distinct():
+        routine_types_by_day.setdefault((user_id, day), set()).add(routine_type)
+
+    changed = []
+    for item in chunk:
+        if (answers := answers_by_day.get((item.user_id, item.date))) is None:
+            continue
+        skin_care, well_being, nutrition = engine.score(answers)
+        routine_types = routine_types_by_day.get((item.user_id, item.date), set())
+        routine_points, routine_count_status = get_routine_points(
+            RoutineType.AM in routine_types, RoutineType.PM in routine_types
+        )
+        item.skin_care = skin_care + routine_points
+        item.well_being = well_being
+        item.nutrition = nutrition
+        item.routine_count_status = routine_count_status
+        item.points_version = engine.version
+        changed.append(item)
+    DailyStatistics.objects.bulk_update(changed, DAILY_STATISTICS_SCORE_FIELDS)
+    return len(changed)
+
+
+def _filter_by_day(
+    queryset: QuerySet, user_ids: set[int], date_range: tuple[datetime.date, datetime.date]
+) -> QuerySet:
+    return queryset.annotate(day=TruncDate("created_at")).filter(user_id__in=user_ids, day__range=date_range)
@@ -5,7 +5,7 @@ from django.core.exceptions import ValidationError as CoreValidationError
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from apps.routines import HealthCareEventTypes, ProductType
+from apps.routines import HealthCareEventTypes, ProductType, RecognitionStatus
 from apps.routines.models import (
     FaceScan,
     Routine,
@@ -26,9 +26,9 @@ from apps.routines.models import (
     Recommendation,
     ScrapedProduct,
 )
-from apps.text_rekognition.script import TextRekognition
 from apps.users.models import User
 from apps.utils.error_codes import Errors
+from apps.utils.serializers import PrivateMediaListSerializer
 
 
 class RoutineSerializer(serializers.ModelSerializer):
@@ -220,7 +220,8 @@ class ScrappedProductSerializer(serializers.ModelSerializer):
 class DailyProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = DailyProduct
-        fields = ["id", "name", "image", "brand", "ingredients", "size", "type"]
+        fields = ["id", "name", "image", "brand", "ingredients", "size", "type", "recognition_status"]
+        read_only_fields = ["recognition_status"]
         extra_kwargs = {field: {"read_only": True} for field in DailyProduct.CLEARABLE_FIELDS}
 
     def __init__(self, *args, **kwargs):
@@ -268,12 +269,6 @@ class DailyProductCreateSerializer(DailyProductSerializer):
             data["group"] = user.product_group
         except User.product_group.RelatedObjectDoesNotExist:
             raise ValidationError(Errors.PRODUCT_GROUP_DOESNT_EXIST.value)
-        if data.get("image"):
-            name = TextRekognition.run_bytes(data.get("image"))
-            if not name:
-                data["image"] = None
-            else:
-                data["name"] = name
         return data
 
 
@@ -302,10 +297,17 @@ class DailyProductGroupSerializer(serializers.ModelSerializer):
             key=lambda x: x["type"],
         )
         product_group = super().create(validated_data)
-        for product in all_products:
-            if product.get("image") and not TextRekognition.run_bytes(product.get("image")):
-                product["image"] = None
-        DailyProduct.objects.bulk_create([DailyProduct(group=product_group, **product) for product in all_products])
+        products = DailyProduct.objects.bulk_create(
+            [
+                DailyProduct(
+                    group=product_group,
+                    recognition_status=RecognitionStatus.PENDING if product.get("image") else "",
+                    **product,
+                )
+                for product in all_products
+            ]
+        )
+        DailyProduct.schedule_recognition(products)
         return product_group
 
 
@@ -320,6 +322,7 @@ class FaceScanSerializer(serializers.ModelSerializer):
             "image",
             "created_at",
         ]
+        list_serializer_class = PrivateMediaListSerializer
 
 
 class RecommendationSerializer(serializers.ModelSerializer):
@@ -4,6 +4,7 @@ import logging
 import random
 from typing import Union
 
+from django.db.models import Case, F, Value, When
 from django.db.models.signals import post_save
 from django.utils import timezone
 
@@ -27,6 +28,7 @@ from apps.routines.predictions import (
     get_daily_questionnaire_prediction,
     get_menstruation_prediction,
 )
+from apps.routines.pipeline import mark_daily_questionnaire_changed, mark_routine_created
 
 LOGGER = logging.getLogger("app")
 
@@ -57,74 +59,10 @@ def upload_image_to_haut_ai(sender, instance, created, **kwargs):
 
 def calculate_daily_statistics(sender, instance, created, **kwargs):
     """
-    This function calculates and creates daily statistics based on DailyQuestionnaires. While creating the
-    `DailyQuestionnaire` for a user, it calculates and creates `DailyStatistics`. During the calculation of the points,
-    we divided all the attributes of the  `DailyQuestionnaire` to three different sections, and they are-
-        1. skin care:
-            a. skin_feel
-            b. feeling_today
-            c. routines
-        2. well-being:
-            a. hours_of_sleep
-            b. sleep_quality
-            c. exercise_hours
-            d. stress_levels
-        3. nutrition:
-            a. diet_today
-            b. water
-            c. life_happened
-    To calculate total points we're using `POINTS` as the reference for different attributes and their values.
-    While calculating skin care points, we need to consider two things- 1. total routines
-    and 2. Points based on values of skin care attributes.
-    Sometimes user may have one routine, two routines or no routines at all. To track, how many routines were counted,
-    we're using a flag `routine_count_status` which will be considered later if user creates daily routine and
-    skin care points will be updated accordingly.
+    Calculates `DailyStatistics` for the saved `DailyQuestionnaire`. Inside `coalesce_derived_data_updates` the
+    calculation is deferred to a celery task after the transaction is committed and done once per user and date.
     """
-    # am/pm routine points are set according to
-    # `https://xd.adobe.com/view/d87117ca-cdc4-4b8b-bd53-7a206a39eca8-8d22`
-    total_earned_routine_points = 0
-    current_date = instance.created_at.date()
-    today_routines = instance.user.routines.filter(created_at__date=current_date)
-    has_today_am_routines = today_routines.filter(routine_type=RoutineType.AM).exists()
-    has_today_pm_routines = today_routines.filter(routine_type=RoutineType.PM).exists()
-
-    # calculating skin care routine points and setting `routine_count_status` accordingly
-    if has_today_am_routines and has_today_pm_routines:
-        total_earned_routine_points = RoutinePoints.AM_ROUTINE_POINT + RoutinePoints.PM_ROUTINE_POINT
-        routine_count_status = DailyRoutineCountStatus.COUNTING_COMPLETED
-    elif has_today_am_routines:
-        total_earned_routine_points = RoutinePoints.AM_ROUTINE_POINT
-        routine_count_status = DailyRoutineCountStatus.ONLY_AM_COUNTED
-    elif has_today_pm_routines:
-        total_earned_routine_points = RoutinePoints.PM_ROUTINE_POINT
-        routine_count_status = DailyRoutineCountStatus.ONLY_PM_COUNTED
-    else:
-        routine_count_status = DailyRoutineCountStatus.NOT_COUNTED
-
-    skin_care_attrs = ["skin_feel", "feeling_today"]
-    well_being_attrs = [
-        "stress_levels",
-        "exercise_hours",
-        "hours_of_sleep",
-        "sleep_quality",
-    ]
-    nutrition_attrs = ["diet_today", "water", "life_happened"]
-
-    skin_care_points_without_routines = _calculate_points(instance, skin_care_attrs)
-    skin_care_points = skin_care_points_without_routines + total_earned_routine_points
-    well_being_points = _calculate_points(instance, well_being_attrs)
-    nutrition_points = _calculate_points(instance, nutrition_attrs)
-
-    DailyStatistics.objects.update_or_create(
-        user=instance.user,
-        date=current_date,
-        defaults={
-            "skin_care": skin_care_points,
-            "well_being": well_being_points,
-            "nutrition": nutrition_points,
-            "routine_count_status": routine_count_status,
-        },
-    )
+    mark_daily_questionnaire_changed(instance)
 
 
 def update_daily_statistics_for_routine(sender, instance, created, **kwargs):
@@ -132,52 +70,44 @@ def update_daily_statistics_for_routine(sender, instance, created, **kwargs):
     This function updates already calculated `DailyStatistics` after `Routine` creation. If the `routine_count_status`
     attribute of the `DailyStatistics` is `COUNTING_COMPLETED` then it has no effect otherwise it updates skin care
     points and `routine_count_status` accordingly.
+    The transition is applied with a single conditional UPDATE, so concurrent AM and PM routines can not overwrite
+    each other's points, and `post_save` of the `DailyStatistics` is not fired again.
+    Inside `coalesce_derived_data_updates` the routine is counted by the deferred recalculation of the day instead.
     """
+    if not created or mark_routine_created(instance):
+        return
     # AM/PM routine points are set according to this reference:
     # `https://xd.adobe.com/view/d87117ca-cdc4-4b8b-bd53-7a206a39eca8-8d22`
-    routine_point = RoutinePoints.AM_ROUTINE_POINT
+    if instance.routine_type == RoutineType.AM:
+        routine_point = RoutinePoints.AM_ROUTINE_POINT
+        counted_status, other_counted_status = (
+            DailyRoutineCountStatus.ONLY_AM_COUNTED,
+            DailyRoutineCountStatus.ONLY_PM_COUNTED,
+        )
+    elif instance.routine_type == RoutineType.PM:
+        routine_point = RoutinePoints.PM_ROUTINE_POINT
+        counted_status, other_counted_status = (
+            DailyRoutineCountStatus.ONLY_PM_COUNTED,
+            DailyRoutineCountStatus.ONLY_AM_COUNTED,
+        )
+    else:
+        return
     today = datetime.datetime.now(datetime.timezone.utc)
-    daily_statistics = instance.user.daily_statistics.filter(date=today.date()).first()
-    if daily_statistics and created:
-        if daily_statistics.routine_count_status != DailyRoutineCountStatus.COUNTING_COMPLETED:
-            if instance.routine_type == RoutineType.AM and daily_statistics.routine_count_status in [
-                DailyRoutineCountStatus.NOT_COUNTED,
-                DailyRoutineCountStatus.ONLY_PM_COUNTED,
-            ]:
-                daily_statistics.skin_care += routine_point
-                if daily_statistics.routine_count_status == DailyRoutineCountStatus.ONLY_PM_COUNTED:
-                    daily_statistics.routine_count_status = DailyRoutineCountStatus.COUNTING_COMPLETED
-                else:
-                    daily_statistics.routine_count_status = DailyRoutineCountStatus.ONLY_AM_COUNTED
-
-            if instance.routine_type == RoutineType.PM and daily_statistics.routine_count_status in [
-                DailyRoutineCountStatus.NOT_COUNTED,
-                DailyRoutineCountStatus.ONLY_AM_COUNTED,
-            ]:
-                daily_statistics.skin_care += routine_point
-                if daily_statistics.routine_count_status == DailyRoutineCountStatus.ONLY_AM_COUNTED:
-                    daily_statistics.routine_count_status = DailyRoutineCountStatus.COUNTING_COMPLETED
-                else:
-                    daily_statistics.routine_count_status = DailyRoutineCountStatus.ONLY_PM_COUNTED
-            daily_statistics.save()
-
-
-def _calculate_points(instance: DailyQuestionnaire, attrs: list[str]) -> int:
-    """Calculates total points from an object and the given list of attributes"""
-    total = 0
-    for attr in attrs:
-        value = getattr(instance, attr)
-        if isinstance(value, list):
-            # Some attrs could contain list of items
-            values = []
-            for item in value:
-                if points := get_points(attr, item):
-                    values.append(points)
-            if values:
-                total += min(values)
-        else:
-            total += get_points(attr, value)
-    return total
+    DailyStatistics.objects.filter(
+        user_id=instance.user_id,
+        date=today.date(),
+        routine_count_status__in=[DailyRoutineCountStatus.NOT_COUNTED, other_counted_status],
+    ).update(
+        skin_care=F("skin_care") + routine_point,
+        routine_count_status=Case(
+            When(
+                routine_count_status=other_counted_status,
+                then=Value(DailyRoutineCountStatus.COUNTING_COMPLETED.value),
+            ),
+            default=Value(counted_status.value),
+        ),
+        updated_at=today,
+    )
 
 
 def get_points(attr: str, item: Union[str, int]) -> int:
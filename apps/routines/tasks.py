@@ -1,13 +1,23 @@
 import datetime
 import logging
+import time
 
-from django.db.models import Q, ExpressionWrapper, F, DurationField
+from celery import group
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
 from django.utils import timezone
+from fcm_django.models import FCMDevice
 from firebase_admin.messaging import Message, Notification
+from redis.exceptions import ConnectionError
 
 from apps.celery import app
 from apps.home.models import SiteConfiguration, NotificationTemplateTranslation
-from apps.routines import HealthCareEventTypes, PurchaseStatus
+from apps.routines import HealthCareEventTypes, PurchaseStatus, RecognitionStatus, ReminderCampaign
+from apps.routines.matching import (
+    ScrapedProductTokenIndex,
+    get_unmatched_daily_products,
+    match_daily_products_chunk,
+)
 from apps.routines.models import (
     DailyProduct,
     HealthCareEvent,
@@ -17,89 +27,131 @@ from apps.routines.models import (
     DailyQuestionnaire,
     StatisticsPurchase,
 )
+from apps.routines.pipeline import get_latest_daily_questionnaire, process_derived_data_events
+from apps.routines.recognition import evict_recognition_cache_entries, parse_image_text, read_images_text
 from apps.users.models import User
-from apps.utils.helpers import send_push_notifications
+from apps.utils.helpers import get_redis_client, send_batched_push_notifications
 
 LOGGER = logging.getLogger("app")
 
+REMINDER_CHUNK_SIZE = 500
+DAILY_PRODUCT_MATCHING_CHUNK_SIZE = 2000
+DAILY_PRODUCT_MATCHING_PENDING_KEY = "routines:daily_product_matching_pending_ranges"
+# the pending run is forgotten after the timeout in case some of its tasks are lost
+DAILY_PRODUCT_MATCHING_PENDING_TIMEOUT = 60 * 60
+DUE_REMINDERS_LIMIT = 1000
+
+# daily questionnaire reminders are sent at this local time of the user
+DAILY_QUESTIONNAIRE_REMINDER_LOCAL_TIME = datetime.time(15)
+UTC_OFFSET_BUCKET_MINUTES = 15
+MIN_UTC_OFFSET = -720
+MAX_UTC_OFFSET = 840
+
+# `SiteConfiguration` field of the notification template used by every reminder campaign
+REMINDER_CAMPAIGN_TEMPLATES = {
+    ReminderCampaign.FACE_SCAN: "face_scan_reminder_notification_template",
+    ReminderCampaign.DAILY_QUESTIONNAIRE: "daily_questionnaire_reminder_notification_template",
+    ReminderCampaign.MONTHLY_STATISTICS: "monthly_statistics_notification_template",
+}
+
 
 @app.task
 def send_reminder_notification_for_appointments(  # noqa: C901
     appointment_event_pks: list[int] = None,
 ) -> None:
-    """Sends reminder push notifications for appointment events"""
+    """Sends reminder push notifications for due appointment events or for the specified ones"""
     current_time = timezone.now()
     site_config = SiteConfiguration.get_solo()
     reminder_template = site_config.appointment_reminder_notification_template
-    successful_reminder_pks = []
-    if reminder_template:
-        if appointment_event_pks:
-            appointment_events = HealthCareEvent.objects.filter(
-                event_type=HealthCareEventTypes.APPOINTMENT,
-                remind_me=True,
-                user__questionnaire__isnull=False,
-                id__in=appointment_event_pks,
-            )
+    if not reminder_template:
+        LOGGER.error("No template found for appointment reminder notification.")
+        return
+
+    reminder_filters = {"remind_me": True, "user__questionnaire__isnull": False}
+    is_scheduled_run = not appointment_event_pks
+    if is_scheduled_run:
+        appointment_event_pks = pop_due_health_care_event_reminders(
+            HealthCareEventTypes.APPOINTMENT, current_time, **reminder_filters
+        )
+    appointment_events = HealthCareEvent.objects.filter(
+        event_type=HealthCareEventTypes.APPOINTMENT, id__in=appointment_event_pks, **reminder_filters
+    ).select_related("user")
+
+    successful_reminder_pks = set()
+    device_messages = []
+    # id of the event of every (device, message) pair
+    device_message_event_ids = []
+    for event in appointment_events:
+        if (translation := reminder_template.translations.filter(language_id=event.user.language_id).first()) and (
+            devices := event.user.fcmdevice_set.all()  # type: ignore
+        ):
+            message = generate_appointment_message(translation, event)
+            for device in devices:
+                device_messages.append((device, message))
+                device_message_event_ids.append(event.id)
         else:
-            # filter appointments in next 24 hours
-            filters = Q(
-                time_diff__gte=datetime.timedelta(hours=24),
-                time_diff__lt=datetime.timedelta(hours=25),
-            )
-            # or, filter appointments in next 1 hour if it is less than 24 hours
-            filters |= Q(
-                time_diff__gte=datetime.timedelta(hours=1),
-                time_diff__lt=datetime.timedelta(hours=2),
+            LOGGER.error(
+                "Could not send reminder notifications for event [%s] due to not having translation or devices.",
+                event.id,
             )
 
-            appointment_events = (
-                HealthCareEvent.objects.filter(
-                    event_type=HealthCareEventTypes.APPOINTMENT,
-                    remind_me=True,
-                    is_reminder_sent=False,
-                    user__questionnaire__isnull=False,
-                )
-                .annotate(
-                    time_diff=ExpressionWrapper(
-                        (F("start_date") + F("time")) - current_time,  # type:ignore
-                        output_field=DurationField(),  # type:ignore
-                    )
-                )
-                .filter(filters)
+    results = (
+        send_batched_push_notifications(
+            device_messages, campaign=f"{ReminderCampaign.APPOINTMENT.value}:{current_time:%Y-%m-%dT%H:%M}"
+        )
+        if device_messages
+        else []
+    )
+    for result in results:
+        event_id = device_message_event_ids[result.message_index]
+        if result.success:
+            successful_reminder_pks.add(event_id)
+        else:
+            LOGGER.error(
+                "Reminder notification sending failed for event [%s] due to [%s].",
+                event_id,
+                result.error_code,
             )
+
+    if successful_reminder_pks:
+        appointment_events.filter(id__in=successful_reminder_pks).update(
+            reminder_sent_at=current_time, is_reminder_sent=True, remind_at=None
+        )
+    if is_scheduled_run:
+        # failed reminders are moved to the next reminder time of the event (i.e. 1 hour before the appointment)
+        rescheduled_events = []
         for event in appointment_events:
-            if (translation := reminder_template.translations.filter(language_id=event.user.language.pk).first()) and (
-                devices := event.user.fcmdevice_set.all()  # type: ignore
+            if event.id not in successful_reminder_pks and (
+                remind_at := event.get_remind_at(current_time + datetime.timedelta(minutes=1))
             ):
-                try:
-                    send_push_notifications(
-                        devices,
-                        message=generate_appointment_message(translation, event),
-                    )
-                    LOGGER.debug(
-                        "Successfully sent reminder notification for event [%s].",
-                        event.id,
-                    )
-                except Exception as err:  # noqa: B902
-                    LOGGER.exception(
-                        "Reminder notification sending failed for event [%s] due to [%s].",
-                        event.id,
-                        err,
-                    )
-                else:
-                    successful_reminder_pks.append(event.id)
-            else:
-                LOGGER.error(
-                    "Could not send reminder notifications for event [%s] due to not having translation or devices.",
-                    event.id,
-                )
-
-        if successful_reminder_pks:
-            appointment_events.filter(id__in=successful_reminder_pks).update(
-                reminder_sent_at=current_time, is_reminder_sent=True
-            )
-    else:
-        LOGGER.error("No template found for appointment reminder notification.")
+                event.remind_at = remind_at
+                rescheduled_events.append(event)
+        HealthCareEvent.objects.bulk_update(rescheduled_events, ["remind_at"])
+
+
+def pop_due_health_care_event_reminders(
+    event_type: HealthCareEventTypes,
+    current_time: datetime.datetime,
+    limit: int = DUE_REMINDERS_LIMIT,
+    **filters,
+) -> list[int]:
+    """
+    Returns ids of events of the type matching `filters` with a reminder due at `current_time` and clears `remind_at`
+    of all due events, so every reminder is taken by one run only. Reminders of events which have already started are
+    dropped. Rows locked by a concurrent run are skipped.
+    """
+    today = current_time.date()
+    has_started = Q(start_date__lt=today) | Q(start_date=today, time__lt=current_time.time())
+    with transaction.atomic():
+        due_event_pks = list(
+            HealthCareEvent.objects.select_for_update(skip_locked=True)
+            .filter(event_type=event_type, remind_at__lte=current_time)
+            .order_by("remind_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        HealthCareEvent.objects.filter(id__in=due_event_pks).update(remind_at=None)
+    due_events = HealthCareEvent.objects.filter(id__in=due_event_pks, **filters).exclude(has_started)
+    return list(due_events.values_list("id", flat=True))
 
 
 def generate_appointment_message(
@@ -147,28 +199,7 @@ def send_reminder_for_face_scans(eligible_user_pks: list[int] = None) -> None:
             & ~Q(id__in=active_face_scan_users)
         )
     eligible_reminder_receivers = User.objects.filter(eligible_reminder_receiver_filter)
-    for user in eligible_reminder_receivers:
-        if (translation := reminder_template.translations.filter(language_id=user.language.pk).first()) and (
-            devices := user.fcmdevice_set.all()  # type: ignore
-        ):
-            try:
-                send_push_notifications(devices, message=generate_reminder_message(translation))
-                LOGGER.debug(
-                    "Successfully sent face scan reminder notification to user [%s].",
-                    user.id,
-                )
-            except Exception as err:  # noqa: B902
-                LOGGER.exception(
-                    "Face scan reminder notification sending failed for user [%s] due to [%s].",
-                    user.id,
-                    err,
-                )
-        else:
-            LOGGER.error(
-                "Could not send face scan reminder notifications for user [%s] due to not having translation"
-                " or devices.",
-                user.id,
-            )
+    fan_out_reminders(ReminderCampaign.FACE_SCAN, eligible_reminder_receivers, is_scheduled_run=not eligible_user_pks)
 
 
 @app.task
@@ -190,45 +221,54 @@ def send_reminder_for_daily_questionnaire(eligible_user_pks: list[int] = None) -
             questionnaire__isnull=False,
         )
     else:
-        # fetching  users who are active today and filled up daily questionnaire
-        active_daily_questionnaire_users = DailyQuestionnaire.objects.filter(
-            created_at__date=current_time.date()
-        ).values_list("user_id", flat=True)
+        # users are bucketed by UTC offset, every run reminds users whose local time has just reached the reminder time
+        eligible_reminder_receiver_filter = Q()
+        for min_utc_offset, max_utc_offset in get_utc_offset_buckets(
+            current_time, DAILY_QUESTIONNAIRE_REMINDER_LOCAL_TIME
+        ):
+            # fetching users who filled up daily questionnaire during their local today
+            local_date = (current_time + datetime.timedelta(minutes=min_utc_offset)).date()
+            local_day_start = datetime.datetime.combine(
+                local_date, datetime.time.min, tzinfo=datetime.timezone.utc
+            ) - datetime.timedelta(minutes=min_utc_offset)
+            active_daily_questionnaire_users = DailyQuestionnaire.objects.filter(
+                created_at__gte=local_day_start,
+                created_at__lt=local_day_start + datetime.timedelta(days=1),
+            ).values_list("user_id", flat=True)
+            eligible_reminder_receiver_filter |= Q(
+                utc_offset__gte=min_utc_offset, utc_offset__lt=max_utc_offset
+            ) & ~Q(id__in=active_daily_questionnaire_users)
 
         # getting eligible users for reminders who are active and has no daily questionnaire answer today and has
         # enabled reminder in user settings
-        eligible_reminder_receiver_filter = (
-            Q(
-                is_active=True,
-                user_settings__is_daily_questionnaire_reminder_active=True,
-                questionnaire__isnull=False,
-            )
-            & ~Q(id__in=active_daily_questionnaire_users)
+        eligible_reminder_receiver_filter &= Q(
+            is_active=True,
+            user_settings__is_daily_questionnaire_reminder_active=True,
+            questionnaire__isnull=False,
         )
 
     eligible_reminder_receivers = User.objects.filter(eligible_reminder_receiver_filter)
-    for user in eligible_reminder_receivers:
-        if (translation := reminder_template.translations.filter(language_id=user.language.pk).first()) and (
-            devices := user.fcmdevice_set.all()  # type: ignore
-        ):
-            try:
-                send_push_notifications(devices, message=generate_reminder_message(translation))
-                LOGGER.debug(
-                    "Successfully sent daily questionnaire reminder notification to user [%s].",
-                    user.id,
-                )
-            except Exception as err:  # noqa: B902
-                LOGGER.exception(
-                    "Daily questionnaire reminder notification sending failed for user [%s] due to [%s].",
-                    user.id,
-                    err,
-                )
-        else:
-            LOGGER.error(
-                "Could not send daily questionnaire reminder notifications for user [%s] due to not having translation"
-                " or devices.",
-                user.id,
-            )
+    fan_out_reminders(
+        ReminderCampaign.DAILY_QUESTIONNAIRE, eligible_reminder_receivers, is_scheduled_run=not eligible_user_pks
+    )
+
+
+def get_utc_offset_buckets(
+    current_time: datetime.datetime,
+    local_time: datetime.time,
+    bucket_minutes: int = UTC_OFFSET_BUCKET_MINUTES,
+) -> list[tuple[int, int]]:
+    """
+    Returns [min, max) ranges of UTC offsets (in minutes) of users whose local time is within `bucket_minutes` from
+    `local_time` at the bucket of `current_time`. There are two ranges when `local_time` is reached on different dates.
+    """
+    current_minutes = (current_time.hour * 60 + current_time.minute) // bucket_minutes * bucket_minutes
+    utc_offset = (local_time.hour * 60 + local_time.minute - current_minutes) % (24 * 60)
+    return [
+        (min_utc_offset, min_utc_offset + bucket_minutes)
+        for min_utc_offset in (utc_offset, utc_offset - 24 * 60)
+        if min_utc_offset <= MAX_UTC_OFFSET and min_utc_offset + bucket_minutes > MIN_UTC_OFFSET
+    ]
 
 
 @app.task
@@ -255,55 +295,217 @@ def send_notification_about_monthly_statistics(  # noqa: C901
     )
     if eligible_user_pks:
         eligible_statistics_purchases = eligible_statistics_purchases.filter(user_id__in=eligible_user_pks)
-    for purchase in eligible_statistics_purchases:
-        translation = notification_template.translations.filter(language_id=purchase.user.language.pk).first()
-        devices = purchase.user.fcmdevice_set.all()  # type: ignore
-        if translation and devices:
-            try:
-                send_push_notifications(devices, message=generate_reminder_message(translation))
-                LOGGER.debug(
-                    "Successfully sent notification to user [%s] for statistics purchase [%s].",
-                    purchase.user_id,
-                    purchase.id,
-                )
-            except Exception as err:  # noqa: B902
-                LOGGER.exception(
-                    "Notification sending to user [%s] for statistics purchase [%s] failed due to [%s].",
-                    purchase.user_id,
-                    purchase.id,
-                    err,
-                )
+    eligible_receivers = User.objects.filter(id__in=eligible_statistics_purchases.values("user_id"))
+    fan_out_reminders(ReminderCampaign.MONTHLY_STATISTICS, eligible_receivers, is_scheduled_run=not eligible_user_pks)
+
+
+def fan_out_reminders(
+    campaign: ReminderCampaign,
+    receivers: QuerySet,
+    chunk_size: int = REMINDER_CHUNK_SIZE,
+    is_scheduled_run: bool = True,
+) -> int:
+    """
+    Streams user and language ids of the reminder receivers and splits them into chunks of `chunk_size` users, which
+    are sent in parallel by a celery group of `send_reminder_chunk` tasks. Returns number of chunks. Only scheduled
+    runs use the delivery ledger, so reminders sent manually (e.g. from the admin) don't suppress the scheduled ones.
+    """
+    delivery_campaign = get_delivery_campaign(campaign, timezone.now()) if is_scheduled_run else None
+    chunks = []
+    chunk: list[tuple[int, str]] = []
+    for receiver in receivers.values_list("id", "language_id").distinct().iterator(chunk_size=chunk_size):
+        chunk.append(receiver)
+        if len(chunk) == chunk_size:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    if chunks:
+        group(
+            [send_reminder_chunk.si(campaign.value, user_chunk, delivery_campaign) for user_chunk in chunks]
+        ).apply_async()
+    LOGGER.info("Sending [%s] reminder notifications in [%s] chunks.", campaign.value, len(chunks))
+    return len(chunks)
+
+
+def get_delivery_campaign(campaign: ReminderCampaign, current_time: datetime.datetime) -> str:
+    """Returns the delivery ledger campaign, reminders are delivered once per day and monthly statistics once a month"""
+    if campaign == ReminderCampaign.MONTHLY_STATISTICS:
+        return f"{campaign.value}:{current_time:%Y-%m}"
+    return f"{campaign.value}:{current_time:%Y-%m-%d}"
+
+
+@app.task
+def send_reminder_chunk(campaign: str, receivers: list[tuple[int, str]], delivery_campaign: str = None) -> None:
+    """Sends reminder push notifications of the campaign to a chunk of (user id, language id) pairs"""
+    campaign = ReminderCampaign(campaign)
+    reminder_template = getattr(SiteConfiguration.get_solo(), REMINDER_CAMPAIGN_TEMPLATES[campaign])
+    if not reminder_template:
+        LOGGER.error("No template found for [%s] reminder notification.", campaign.value)
+        return
+
+    # translations and devices of the whole chunk are loaded with two queries
+    messages_by_language = {}
+    language_ids = {language_id for _, language_id in receivers}
+    for translation in reminder_template.translations.filter(language_id__in=language_ids):
+        messages_by_language.setdefault(translation.language_id, generate_reminder_message(translation))
+    devices_by_user: dict[int, list[FCMDevice]] = {}
+    for device in FCMDevice.objects.filter(user_id__in=[user_id for user_id, _ in receivers], active=True):
+        devices_by_user.setdefault(device.user_id, []).append(device)
+
+    device_messages = []
+    for user_id, language_id in receivers:
+        if (message := messages_by_language.get(language_id)) and (devices := devices_by_user.get(user_id)):
+            device_messages.extend((device, message) for device in devices)
         else:
             LOGGER.error(
-                "Could not send reminder notifications to user [%s] for statistics purchase [%s] "
-                "due to not having translation or devices.",
-                purchase.user_id,
-                purchase.id,
+                "Could not send [%s] reminder notifications for user [%s] due to not having translation or devices.",
+                campaign.value,
+                user_id,
             )
+    if device_messages:
+        send_batched_push_notifications(device_messages, campaign=delivery_campaign)
 
 
 @app.task
-def connect_scrapped_product_to_daily_product(
-    eligible_user_pks: list[int] = None,
-) -> None:  # noqa: C901
-    """Iterate through daily products to get names from parsed images using Google Lens"""
-    daily_products_without_scrappped = DailyProduct.objects.filter(product_info=None).exclude(name="")[:20]
-    if not daily_products_without_scrappped:
+def recalculate_derived_data(user_days: list[list]) -> None:
+    """Recalculates derived data (daily statistics and predictions) for pairs of user id and ISO date"""
+    questionnaires = []
+    for user_id, date in user_days:
+        if questionnaire := get_latest_daily_questionnaire(user_id, datetime.date.fromisoformat(date)):
+            questionnaires.append(questionnaire)
+    process_derived_data_events(questionnaires)
+
+
+@app.task
+def recognize_daily_products_text(images: list[list]) -> None:
+    """
+    The first step of the product recognition (see `DailyProduct.schedule_recognition`), reads the text on the images
+    of the products concurrently with OCR. Images without text are removed. Products whose image was changed after
+    scheduling are skipped.
+    """
+    image_names = {product_id: image_name for product_id, image_name in images}
+    products = [
+        product
+        for product in DailyProduct.objects.filter(id__in=image_names, recognition_status=RecognitionStatus.PENDING)
+        if product.image.name == image_names[product.id]
+    ]
+    if not products:
         return
-    for daily_product in daily_products_without_scrappped:
-        scrapped_product = daily_product.get_similar_scrapped_product_by_title(daily_product.name)
-        if not scrapped_product:
-            if daily_product.connect_scrapped_fail >= 5:
-                daily_product.name = ""
-                daily_product.connect_scrapped_fail = 0
-                daily_product.image_parse_fail = 0
-                daily_product.save()
-                continue
-            daily_product.connect_scrapped_fail += 1
-            daily_product.save()
-            continue
-        daily_product.product_info = scrapped_product
-        daily_product.save()
+    try:
+        texts = read_images_text([product.image for product in products])
+    except Exception:  # noqa: B902
+        # products must not be left pending, whatever failed, unless their image was replaced in the meantime
+        LOGGER.exception(
+            "Failed to read text on the images of daily products %s.", [product.id for product in products]
+        )
+        failed_products = Q()
+        for product in products:
+            failed_products |= Q(id=product.id, image=product.image.name)
+        DailyProduct.objects.filter(failed_products).update(recognition_status=RecognitionStatus.FAILED)
+        return
+    for product, text in zip(products, texts):
+        product_queryset = DailyProduct.objects.filter(id=product.id, image=product.image.name)
+        try:
+            if text:
+                product_queryset.update(name=text, image_parse_fail=0, recognition_status=RecognitionStatus.OCR_DONE)
+                parse_daily_product_text.delay(product.id, product.image.name)
+            elif product_queryset.update(
+                image="", image_parse_fail=F("image_parse_fail") + 1, recognition_status=RecognitionStatus.FAILED
+            ):
+                # the image isn't referenced by the product anymore
+                product.image.storage.delete(product.image.name)
+        except Exception:  # noqa: B902
+            LOGGER.exception("Failed to store text read on the image of daily product [%s].", product.id)
+            product_queryset.update(recognition_status=RecognitionStatus.FAILED)
+
+
+@app.task
+def parse_daily_product_text(product_id: int, image_name: str) -> None:
+    """The second step of the product recognition, parses brand, name, ingredients and size from the read text"""
+    products = DailyProduct.objects.filter(id=product_id, image=image_name)
+    product = products.filter(recognition_status=RecognitionStatus.OCR_DONE).first()
+    if not product:
+        return
+    try:
+        parsed_data = parse_image_text(product.name)
+    except Exception:  # noqa: B902
+        # products must not be left with read but unparsed text, whatever failed
+        LOGGER.exception("Failed to parse text of daily product [%s].", product_id)
+        parsed_data = None
+    if not parsed_data:
+        products.update(recognition_status=RecognitionStatus.FAILED)
+        return
+    products.update(
+        parsed_by_chat_gpt_data=parsed_data,
+        brand=parsed_data.get("brand") or "",
+        recognition_status=RecognitionStatus.PARSED,
+    )
+
+
+@app.task
+def evict_recognition_cache() -> None:
+    """Keeps the recognition cache table bounded by removing least recently used entries"""
+    if deleted_count := evict_recognition_cache_entries():
+        LOGGER.info("Evicted %s recognition cache entries.", deleted_count)
+
+
+@app.task
+def connect_scrapped_product_to_daily_product(chunk_size: int = DAILY_PRODUCT_MATCHING_CHUNK_SIZE) -> None:
+    """
+    Splits the unmatched daily products into ranges of `chunk_size` ids, which are matched to scraped products in
+    parallel by a celery group of `match_daily_products_range` tasks. The run is skipped while ranges of the previous
+    run are pending, they are counted in redis.
+    """
+    ranges = []
+    chunk: list[int] = []
+    for product_id in get_unmatched_daily_products().order_by("id").values_list("id", flat=True).iterator():
+        chunk.append(product_id)
+        if len(chunk) == chunk_size:
+            ranges.append((chunk[0], chunk[-1]))
+            chunk = []
+    if chunk:
+        ranges.append((chunk[0], chunk[-1]))
+    if not ranges:
+        return
+    try:
+        with get_redis_client() as redis:
+            if redis and not redis.set(
+                DAILY_PRODUCT_MATCHING_PENDING_KEY, len(ranges), nx=True, ex=DAILY_PRODUCT_MATCHING_PENDING_TIMEOUT
+            ):
+                LOGGER.info("Skipping matching of daily products, the previous run is still in progress.")
+                return
+    except ConnectionError:
+        LOGGER.exception("Failed to connect to Redis to lock matching of daily products.")
+    group([match_daily_products_range.si(first_id, last_id) for first_id, last_id in ranges]).apply_async()
+    LOGGER.info("Matching daily products to scraped products in [%s] chunks.", len(ranges))
+
+
+@app.task
+def match_daily_products_range(first_id: int, last_id: int) -> None:
+    started_at = time.monotonic()
+    try:
+        products = list(get_unmatched_daily_products().filter(id__gte=first_id, id__lte=last_id))
+        result = match_daily_products_chunk(products, ScrapedProductTokenIndex.get_current())
+    finally:
+        _release_daily_product_matching_range()
+    LOGGER.info(
+        "Matched daily products [%s-%s]: %s matched, %s failed, %s reset in %.1fs.",
+        first_id,
+        last_id,
+        *result,
+        time.monotonic() - started_at,
+    )
+
+
+def _release_daily_product_matching_range() -> None:
+    """Counts down the pending ranges of the run, the next run is allowed once all of them are done"""
+    try:
+        with get_redis_client() as redis:
+            if redis and redis.decr(DAILY_PRODUCT_MATCHING_PENDING_KEY) <= 0:
+                redis.delete(DAILY_PRODUCT_MATCHING_PENDING_KEY)
+    except ConnectionError:
+        LOGGER.exception("Failed to connect to Redis to release matching of daily products.")
 
 
 def generate_reminder_message(
@@ -806,8 +806,8 @@ class FaceScanNotificationTest(BaseTestCase):
     def setUp(self):
         super().setUp()
         self.user_settings = make(UserSettings, user=self.user, is_face_scan_reminder_active=True)
-        patcher = patch("apps.routines.tasks.send_push_notifications")
-        self.mocked_send_push_notifications = patcher.start()
+        patcher = patch("apps.routines.tasks.send_batched_push_notifications")
+        self.mocked_send_batched_push_notifications = patcher.start()
         self.addCleanup(patcher.stop)
         self.face_scan_reminder_template = make(NotificationTemplate, name="Face Scan Reminder")
         self.face_scan_reminder_template_translation = make(
@@ -856,16 +856,16 @@ class FaceScanNotificationTest(BaseTestCase):
         generated_message = generate_reminder_message(self.face_scan_reminder_template_translation)
         send_reminder_for_face_scans()
         user_devices = FCMDevice.objects.filter(user=self.user)
-        self.assertTrue(self.mocked_send_push_notifications.called)
+        self.assertTrue(self.mocked_send_batched_push_notifications.called)
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].count(),
+            len(self.mocked_send_batched_push_notifications.call_args.args[0]),
             user_devices.count(),
         )
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].first(),
+            self.mocked_send_batched_push_notifications.call_args.args[0][0][0],
             user_devices.first(),
         )
-        message = self.mocked_send_push_notifications.call_args.kwargs["message"]
+        message = self.mocked_send_batched_push_notifications.call_args.args[0][0][1]
         self.assertEqual(message.notification.title, generated_message.notification.title)
         self.assertEqual(message.notification.body, generated_message.notification.body)
 
@@ -887,7 +887,7 @@ class FaceScanNotificationTest(BaseTestCase):
 
         make(FCMDevice, user=self.user)
         send_reminder_for_face_scans()
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @parameterized.expand(
         [
@@ -908,7 +908,7 @@ class FaceScanNotificationTest(BaseTestCase):
         make(FCMDevice, user=self.user)
         send_reminder_for_face_scans()
         FCMDevice.objects.filter(user=self.user)
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @parameterized.expand(
         [
@@ -931,7 +931,7 @@ class FaceScanNotificationTest(BaseTestCase):
         make(FCMDevice, user=self.user)
         send_reminder_for_face_scans()
         FCMDevice.objects.filter(user=self.user)
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @parameterized.expand(
         [
@@ -954,7 +954,7 @@ class FaceScanNotificationTest(BaseTestCase):
         make(FCMDevice, user=self.user)
         send_reminder_for_face_scans()
         FCMDevice.objects.filter(user=self.user)
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @freeze_time("2022-06-8 06:00:00")
     def test_face_scan_reminder_task_with_valid_timeline_and_specified_users(self):
@@ -963,16 +963,16 @@ class FaceScanNotificationTest(BaseTestCase):
         generated_message = generate_reminder_message(self.face_scan_reminder_template_translation)
         send_reminder_for_face_scans([self.user.id])
         user_devices = FCMDevice.objects.filter(user=self.user)
-        self.assertTrue(self.mocked_send_push_notifications.called)
+        self.assertTrue(self.mocked_send_batched_push_notifications.called)
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].count(),
+            len(self.mocked_send_batched_push_notifications.call_args.args[0]),
             user_devices.count(),
         )
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].first(),
+            self.mocked_send_batched_push_notifications.call_args.args[0][0][0],
             user_devices.first(),
         )
-        message = self.mocked_send_push_notifications.call_args.kwargs["message"]
+        message = self.mocked_send_batched_push_notifications.call_args.args[0][0][1]
         self.assertEqual(message.notification.title, generated_message.notification.title)
         self.assertEqual(message.notification.body, generated_message.notification.body)
 
@@ -982,4 +982,4 @@ class FaceScanNotificationTest(BaseTestCase):
     ):
         make(FCMDevice, user=self.user)
         send_reminder_for_face_scans([self.user.id])
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
@@ -1,10 +1,10 @@
 import datetime
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from django.db import IntegrityError
 from django.urls import reverse
 from fcm_django.models import FCMDevice
-from firebase_admin.messaging import Message
+from firebase_admin.messaging import BatchResponse, Message, SendResponse
 from freezegun import freeze_time
 from model_bakery.baker import make
 from parameterized import parameterized
@@ -25,6 +25,7 @@ from apps.routines.tasks import (
     generate_appointment_message,
     send_reminder_notification_for_appointments,
 )
+from apps.utils.helpers import PushNotificationResult
 from apps.utils.error_codes import Errors
 from apps.utils.tests_utils import BaseTestCase
 
@@ -509,10 +510,10 @@ class AppointmentEventTest(BaseTestCase):
             ["2022-06-02", "06:00:00", False],
         ]
     )
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-06-01 06:00:00")
     def test_appointment_reminder_task_with_valid_events_timeline(
-        self, start_date, time, remind_me, mocked_send_push_notifications
+        self, start_date, time, remind_me, mocked_send_batched_push_notifications
     ):
         make(UserQuestionnaire, user=self.user)
         event = make(
@@ -529,20 +530,20 @@ class AppointmentEventTest(BaseTestCase):
         send_reminder_notification_for_appointments()
         user_devices = FCMDevice.objects.filter(user=self.user)
         if remind_me:
-            self.assertTrue(mocked_send_push_notifications.called)
+            self.assertTrue(mocked_send_batched_push_notifications.called)
             self.assertEqual(
-                mocked_send_push_notifications.call_args.args[0].count(),
+                len(mocked_send_batched_push_notifications.call_args.args[0]),
                 user_devices.count(),
             )
             self.assertEqual(
-                mocked_send_push_notifications.call_args.args[0].first(),
+                mocked_send_batched_push_notifications.call_args.args[0][0][0],
                 user_devices.first(),
             )
-            message = mocked_send_push_notifications.call_args.kwargs["message"]
+            message = mocked_send_batched_push_notifications.call_args.args[0][0][1]
             self.assertEqual(message.notification.title, generated_message.notification.title)
             self.assertEqual(message.notification.body, generated_message.notification.body)
         else:
-            self.assertFalse(mocked_send_push_notifications.called)
+            self.assertFalse(mocked_send_batched_push_notifications.called)
 
     @parameterized.expand(
         [
@@ -552,10 +553,10 @@ class AppointmentEventTest(BaseTestCase):
             ["2022-06-02", "06:00:00", False],
         ]
     )
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-06-01 06:00:00")
     def test_appointment_reminder_task_with_valid_events_timeline_no_questionnaire(
-        self, start_date, time, remind_me, mocked_send_push_notifications
+        self, start_date, time, remind_me, mocked_send_batched_push_notifications
     ):
         make(
             HealthCareEvent,
@@ -568,7 +569,7 @@ class AppointmentEventTest(BaseTestCase):
         )
         make(FCMDevice, user=self.user)
         send_reminder_notification_for_appointments()
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
     @parameterized.expand(
         [
@@ -579,10 +580,10 @@ class AppointmentEventTest(BaseTestCase):
             ["2022-06-03", "06:30:00"],
         ]
     )
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-06-01 6:00:00")
     def test_appointment_reminder_task_with_invalid_event_timeline(
-        self, start_date, time, mocked_send_push_notifications
+        self, start_date, time, mocked_send_batched_push_notifications
     ):
         make(
             HealthCareEvent,
@@ -594,7 +595,7 @@ class AppointmentEventTest(BaseTestCase):
         )
         make(FCMDevice, user=self.user)
         send_reminder_notification_for_appointments()
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
     @parameterized.expand(
         [
@@ -602,10 +603,10 @@ class AppointmentEventTest(BaseTestCase):
             ["2022-06-02", "06:00:00"],
         ]
     )
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-06-01 06:00:00")
     def test_appointment_reminder_task_with_valid_events_timeline_and_no_notification_templates(
-        self, start_date, time, mocked_send_push_notifications
+        self, start_date, time, mocked_send_batched_push_notifications
     ):
         make(
             HealthCareEvent,
@@ -619,10 +620,10 @@ class AppointmentEventTest(BaseTestCase):
         self.site_config.appointment_reminder_notification_template = None
         self.site_config.save()
         send_reminder_notification_for_appointments()
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
-    @patch("apps.routines.tasks.send_push_notifications")
-    def test_appointment_reminder_task_with_specified_appointment_events(self, mocked_send_push_notifications):
+    @patch("apps.routines.tasks.send_batched_push_notifications")
+    def test_appointment_reminder_task_with_specified_appointment_events(self, mocked_send_batched_push_notifications):
         make(UserQuestionnaire, user=self.user)
         event = make(
             HealthCareEvent,
@@ -636,22 +637,22 @@ class AppointmentEventTest(BaseTestCase):
         generated_message = generate_appointment_message(self.appointment_template_translation, event)
         send_reminder_notification_for_appointments([event.id])
         user_devices = FCMDevice.objects.filter(user=self.user)
-        self.assertTrue(mocked_send_push_notifications.called)
+        self.assertTrue(mocked_send_batched_push_notifications.called)
         self.assertEqual(
-            mocked_send_push_notifications.call_args.args[0].count(),
+            len(mocked_send_batched_push_notifications.call_args.args[0]),
             user_devices.count(),
         )
         self.assertEqual(
-            mocked_send_push_notifications.call_args.args[0].first(),
+            mocked_send_batched_push_notifications.call_args.args[0][0][0],
             user_devices.first(),
         )
-        message = mocked_send_push_notifications.call_args.kwargs["message"]
+        message = mocked_send_batched_push_notifications.call_args.args[0][0][1]
         self.assertEqual(message.notification.title, generated_message.notification.title)
         self.assertEqual(message.notification.body, generated_message.notification.body)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     def test_appointment_reminder_task_with_specified_appointment_events_no_questionnaire(
-        self, mocked_send_push_notifications
+        self, mocked_send_batched_push_notifications
     ):
         event = make(
             HealthCareEvent,
@@ -663,11 +664,11 @@ class AppointmentEventTest(BaseTestCase):
         )
         make(FCMDevice, user=self.user)
         send_reminder_notification_for_appointments([event.id])
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     def test_appointment_reminder_task_with_specified_appointment_events_but_negative_reminder_settings(
-        self, mocked_send_push_notifications
+        self, mocked_send_batched_push_notifications
     ):
         make(
             HealthCareEvent,
@@ -679,7 +680,117 @@ class AppointmentEventTest(BaseTestCase):
             remind_me=False,
         )
         make(FCMDevice, user=self.user)
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
+
+    @parameterized.expand(
+        [
+            ["2022-06-02", "07:00:00", datetime.datetime(2022, 6, 1, 7, tzinfo=datetime.timezone.utc)],
+            ["2022-06-01", "12:00:00", datetime.datetime(2022, 6, 1, 11, tzinfo=datetime.timezone.utc)],
+            ["2022-06-01", "06:30:00", None],
+        ]
+    )
+    @freeze_time("2022-06-01 06:00:00")
+    def test_appointment_remind_at_is_scheduled_on_save(self, start_date, time, remind_at):
+        event = make(
+            HealthCareEvent,
+            user=self.user,
+            name="Sample Appointment",
+            event_type=HealthCareEventTypes.APPOINTMENT,
+            start_date=start_date,
+            time=time,
+        )
+        event.refresh_from_db()
+        self.assertEqual(event.remind_at, remind_at)
+
+    @parameterized.expand([[True], [False]])
+    @patch("apps.routines.tasks.send_batched_push_notifications")
+    def test_appointment_reminder_task_pops_due_reminders(self, is_sent, mocked_send_batched_push_notifications):
+        make(UserQuestionnaire, user=self.user)
+        with freeze_time("2022-06-01 05:00:00"):
+            event = make(
+                HealthCareEvent,
+                user=self.user,
+                name="Sample Appointment",
+                event_type=HealthCareEventTypes.APPOINTMENT,
+                start_date="2022-06-02",
+                time="06:00:00",
+            )
+        device = make(FCMDevice, user=self.user, registration_id="token")
+        mocked_send_batched_push_notifications.return_value = [
+            PushNotificationResult(device.pk, device.registration_id, is_sent, message_index=0)
+        ]
+
+        with freeze_time("2022-06-01 05:59:00"):
+            send_reminder_notification_for_appointments()
+        self.assertFalse(mocked_send_batched_push_notifications.called)
+
+        with freeze_time("2022-06-01 06:00:00"):
+            send_reminder_notification_for_appointments()
+            send_reminder_notification_for_appointments()
+        self.assertEqual(mocked_send_batched_push_notifications.call_count, 1)
+        event.refresh_from_db()
+        self.assertEqual(event.is_reminder_sent, is_sent)
+        if is_sent:
+            self.assertIsNone(event.remind_at)
+        else:
+            # the failed reminder is moved to 1 hour before the appointment
+            self.assertEqual(event.remind_at, datetime.datetime(2022, 6, 2, 5, tzinfo=datetime.timezone.utc))
+
+    @parameterized.expand([["2022-06-02 07:00:00", True], ["2022-06-01 06:00:00", False]])
+    @patch("apps.routines.tasks.send_batched_push_notifications")
+    def test_appointment_reminder_task_drops_ineligible_reminders(
+        self, current_time, has_questionnaire, mocked_send_batched_push_notifications
+    ):
+        if has_questionnaire:
+            make(UserQuestionnaire, user=self.user)
+        with freeze_time("2022-06-01 05:00:00"):
+            event = make(
+                HealthCareEvent,
+                user=self.user,
+                name="Sample Appointment",
+                event_type=HealthCareEventTypes.APPOINTMENT,
+                start_date="2022-06-02",
+                time="06:00:00",
+            )
+        make(FCMDevice, user=self.user, registration_id="token")
+
+        with freeze_time(current_time):
+            send_reminder_notification_for_appointments()
+        self.assertFalse(mocked_send_batched_push_notifications.called)
+        event.refresh_from_db()
+        self.assertFalse(event.is_reminder_sent)
+        self.assertIsNone(event.remind_at)
+
+    @patch("apps.utils.helpers._send_each")
+    @freeze_time("2022-06-01 06:00:00")
+    def test_appointment_reminder_task_maps_results_to_events(self, mocked_send_each):
+        make(UserQuestionnaire, user=self.user)
+        failed_event, sent_event = [
+            make(
+                HealthCareEvent,
+                user=self.user,
+                name="Sample Appointment",
+                event_type=HealthCareEventTypes.APPOINTMENT,
+                start_date="2022-06-02",
+                time=time,
+            )
+            for time in ["06:00:00", "07:00:00"]
+        ]
+        make(FCMDevice, user=self.user, registration_id="token")
+        mocked_send_each.side_effect = lambda messages: BatchResponse(
+            [
+                SendResponse({"name": "message-id"}, None)
+                if str(sent_event.time) in message.notification.body
+                else SendResponse(None, MagicMock(code="INTERNAL"))
+                for message in messages
+            ]
+        )
+
+        send_reminder_notification_for_appointments([failed_event.id, sent_event.id])
+        failed_event.refresh_from_db()
+        sent_event.refresh_from_db()
+        self.assertFalse(failed_event.is_reminder_sent)
+        self.assertTrue(sent_event.is_reminder_sent)
 
 
 class MedicationEventTest(BaseTestCase):
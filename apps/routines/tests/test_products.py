@@ -1,5 +1,5 @@
 import io
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 import uuid
 
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -10,8 +10,8 @@ from PIL import Image
 from rest_framework import status
 
 from apps.chat_gpt.interfaces import ChatGptRekognitionInterface
-from apps.routines import ProductType
-from apps.routines.models import DailyProductGroup, DailyProduct, ScrapedProduct
+from apps.routines import ProductType, RecognitionStatus
+from apps.routines.models import DailyProductGroup, DailyProduct, RecognitionCacheEntry, ScrapedProduct
 from apps.text_rekognition.script import TextRekognition
 from apps.users.models import User
 from apps.utils.tests_utils import BaseTestCase
@@ -210,6 +210,7 @@ class DailyProductGroupTest(DailyProductBaseTest):
                     "size",
                     "type",
                     "product_info",
+                    "recognition_status",
                 ]
             }
             product_data["image"] = product.image.url if product.image else ""
@@ -465,7 +466,8 @@ class DailyProductTest(DailyProductBaseTest):
 
     def check_data(self, product, response):
         expected_product = {
-            field: getattr(product, field) for field in ["id", "name", "brand", "ingredients", "size", "type"]
+            field: getattr(product, field)
+            for field in ["id", "name", "brand", "ingredients", "size", "type", "recognition_status"]
         }
         expected_product["product_info"] = {
             "id": product.product_info.id if product.product_info else None,
@@ -556,8 +558,12 @@ class DailyProductTest(DailyProductBaseTest):
             product_info=scrapped_product,
         )
         product.image = SimpleUploadedFile("icon1.png", b"file_content1")
-        product.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        product.refresh_from_db()
         self.assertEqual(product.name, "Garnier SkinActive Acqua micellare Tutto in 1 - INCI Beauty")
+        self.assertEqual(product.brand, "")
+        self.assertEqual(product.recognition_status, RecognitionStatus.PARSED)
 
     def fake_failed_google_lens_request(self):
         return ""
@@ -625,6 +631,18 @@ class DailyProductTest(DailyProductBaseTest):
         result = DailyProduct().get_similar_scrapped_product_by_title(lens_title)
         self.assertEqual(scrapped_product_1.id, result.id)
 
+    @parameterized.expand(
+        [
+            ["Garnier Micellar Water", True],
+            ["Micellar Water by Garnier", True],
+            ["Micellar Water 400ml", False],
+        ]
+    )
+    def test_similar_scrapped_product_has_to_contain_first_word(self, title, is_matched):
+        scrapped_product = make(ScrapedProduct, title=title)
+        result = DailyProduct().get_similar_scrapped_product_by_title("Garnier Micellar Water 400ml")
+        self.assertEqual(result, scrapped_product if is_matched else None)
+
     @patch.object(TextRekognition, "run_bytes", fake_fail_rekognition_request)
     def test_update_daily_products_names_task(self):
         product_group = make(DailyProductGroup, user=self.user)
@@ -637,8 +655,71 @@ class DailyProductTest(DailyProductBaseTest):
             product_info=scrapped_product,
         )
         product.image = SimpleUploadedFile("icon1.png", b"file_content1")
-        product.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        image_name = product.image.name
+        product.refresh_from_db()
         self.assertEqual(product.image_parse_fail, 1)
+        self.assertEqual(product.recognition_status, RecognitionStatus.FAILED)
+        self.assertFalse(product.image)
+        self.assertFalse(product.image.storage.exists(image_name))
+
+    def test_failed_recognition_keeps_replaced_image_pending(self):
+        from apps.routines.tasks import recognize_daily_products_text
+
+        product_group = make(DailyProductGroup, user=self.user)
+        product = make(DailyProduct, group=product_group, type=ProductType.CLEANSER.value, image=self.image)
+        scheduled_image_name = product.image.name
+
+        def replace_image_and_fail(images):
+            DailyProduct.objects.filter(id=product.id).update(image="products/new.png")
+            raise RuntimeError
+
+        with patch("apps.routines.tasks.read_images_text", side_effect=replace_image_and_fail):
+            recognize_daily_products_text([[product.id, scheduled_image_name]])
+        product.refresh_from_db()
+        self.assertEqual(product.recognition_status, RecognitionStatus.PENDING)
+
+    @parameterized.expand([["run_bytes"], ["request_to_open_ai"]])
+    @patch.object(ChatGptRekognitionInterface, "request_to_open_ai", fake_openai_request)
+    @patch.object(TextRekognition, "run_bytes", return_value="Garnier SkinActive Acqua micellare")
+    def test_unexpected_recognition_error_fails_product(self, failing_method, _run_bytes_mock):
+        product_group = make(DailyProductGroup, user=self.user)
+        interface = TextRekognition if failing_method == "run_bytes" else ChatGptRekognitionInterface
+        with patch.object(interface, failing_method, side_effect=RuntimeError):
+            with self.captureOnCommitCallbacks(execute=True):
+                product = make(DailyProduct, group=product_group, type=ProductType.CLEANSER.value, image=self.image)
+        product.refresh_from_db()
+        self.assertEqual(product.recognition_status, RecognitionStatus.FAILED)
+
+    @patch.object(ChatGptRekognitionInterface, "request_to_open_ai")
+    @patch.object(TextRekognition, "run_bytes", return_value="Garnier SkinActive Acqua micellare")
+    def test_recognition_results_are_cached_by_image_content(self, run_bytes_mock, request_to_open_ai_mock):
+        request_to_open_ai_mock.return_value = self.fake_openai_request()
+        product_group = make(DailyProductGroup, user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for product_type in [ProductType.CLEANSER.value, ProductType.TREATMENT.value]:
+                image = SimpleUploadedFile("bottle.png", b"same_content")
+                make(DailyProduct, group=product_group, type=product_type, image=image)
+
+        run_bytes_mock.assert_called_once()
+        request_to_open_ai_mock.assert_called_once()
+        self.assertEqual(RecognitionCacheEntry.objects.count(), 2)
+        for product in DailyProduct.objects.filter(group=product_group):
+            self.assertEqual(product.name, "Garnier SkinActive Acqua micellare")
+            self.assertEqual(product.recognition_status, RecognitionStatus.PARSED)
+
+    def test_text_rekognition_reads_many_images_in_order(self):
+        client = MagicMock()
+        client.detect_text.side_effect = lambda Image: {"TextDetections": [{"DetectedText": Image["Bytes"].decode()}]}
+        stubbed_rekognition = type("StubbedTextRekognition", (TextRekognition,), {"_client": client})
+
+        images = [io.BytesIO(f"image{index}".encode()) for index in range(10)]
+        texts = stubbed_rekognition.run_many(images, max_workers=3)
+
+        self.assertEqual(texts, [f"image{index} " for index in range(10)])
+        self.assertEqual(client.detect_text.call_count, 10)
 
     def make_product_for_test(self, daily_product_params):
         product_group = make(DailyProductGroup, user=self.user)
@@ -669,6 +750,63 @@ class DailyProductTest(DailyProductBaseTest):
         self.assertEqual(updated_product.product_info, None)
         self.assertEqual(updated_product.connect_scrapped_fail, 1)
 
+    def test_match_daily_products_after_id_watermark(self):
+        from apps.routines.matching import MatchingResult, match_daily_products
+
+        product_group = make(DailyProductGroup, user=self.user)
+        skipped_product, unmatched_product, matched_product = [
+            make(DailyProduct, group=product_group, type=ProductType.CLEANSER.value, name=name, connect_scrapped_fail=5)
+            for name in ["Garnier micellar water", "Unknown cream", "Garnier micellar water"]
+        ]
+        scrapped_product = make(ScrapedProduct, title="Garnier Micellar Water 400ml")
+        progress = []
+
+        result = match_daily_products(
+            after_id=skipped_product.id, chunk_size=1, progress_callback=lambda *args: progress.append(args)
+        )
+
+        self.assertEqual(result, MatchingResult(matched=1, failed=0, reset=1))
+        last_ids = [last_id for _processed, _total, last_id, _result in progress]
+        self.assertEqual(last_ids, [unmatched_product.id, matched_product.id])
+        for product in [skipped_product, unmatched_product, matched_product]:
+            product.refresh_from_db()
+        self.assertIsNone(skipped_product.product_info)
+        self.assertEqual(skipped_product.connect_scrapped_fail, 5)
+        self.assertEqual((unmatched_product.name, unmatched_product.connect_scrapped_fail), ("", 0))
+        self.assertEqual(matched_product.product_info, scrapped_product)
+
+    def test_match_daily_products_chunk_skips_products_changed_after_loading(self):
+        from apps.routines.matching import MatchingResult, ScrapedProductTokenIndex, match_daily_products_chunk
+
+        product = self.make_product_for_test(daily_product_params={})
+        make(ScrapedProduct, title="product1")
+        loaded_products = list(DailyProduct.objects.filter(id=product.id))
+        DailyProduct.objects.filter(id=product.id).update(name="product2")
+
+        result = match_daily_products_chunk(loaded_products, ScrapedProductTokenIndex.build())
+
+        self.assertEqual(result, MatchingResult())
+        product.refresh_from_db()
+        self.assertEqual(product.name, "product2")
+        self.assertIsNone(product.product_info)
+
+    @patch("apps.routines.tasks.get_redis_client")
+    def test_connect_daily_products_to_scrapped_task_is_skipped_while_previous_run_is_pending(
+        self, get_redis_client_mock
+    ):
+        from apps.routines.tasks import connect_scrapped_product_to_daily_product
+
+        redis = get_redis_client_mock.return_value.__enter__.return_value
+        redis.set.return_value = False
+        product = self.make_product_for_test(daily_product_params={})
+        make(ScrapedProduct, title="product1")
+
+        connect_scrapped_product_to_daily_product()
+
+        product.refresh_from_db()
+        self.assertIsNone(product.product_info)
+        redis.decr.assert_not_called()
+
     def test_set_satisfaction_score_to_product_without_easy_to_use_score(self):
         product = self.make_product_for_test(daily_product_params={})
         self.authorize().post(
@@ -789,14 +927,18 @@ class DailyProductTest(DailyProductBaseTest):
         self.assertEqual(response.json(), {"product_id": ["This field is required."]})
 
     @patch.object(TextRekognition, "run_bytes", fake_rekognition_request)
+    @patch.object(ChatGptRekognitionInterface, "request_to_open_ai", fake_openai_request)
     def test_daily_product_create(self):
         make(DailyProductGroup, user=self.user)
         data = {"type": "TREATMENT", "image": self.generate_image()}
-        response = self.authorize().post(reverse("daily_product_create-list"), data=data, format="multipart")
-        self.assertEqual(
-            response.data.get("name"),
-            "Garnier SkinActive Acqua micellare Tutto in 1 - INCI Beauty",
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.authorize().post(reverse("daily_product_create-list"), data=data, format="multipart")
+        # the product is recognized after the response
+        self.assertEqual(response.data.get("name"), "")
+        self.assertEqual(response.data.get("recognition_status"), RecognitionStatus.PENDING)
+        product = DailyProduct.objects.get(id=response.data["id"])
+        self.assertEqual(product.name, "Garnier SkinActive Acqua micellare Tutto in 1 - INCI Beauty")
+        self.assertEqual(product.recognition_status, RecognitionStatus.PARSED)
 
     @patch.object(TextRekognition, "run_bytes", fake_rekognition_request)
     def test_daily_product_create_with_no_group(self):
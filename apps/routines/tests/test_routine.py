@@ -23,11 +23,14 @@ from apps.routines.models import (
     DailyQuestionnaire,
     UserTag,
 )
+from apps.routines import ReminderCampaign
 from apps.routines.tasks import (
+    fan_out_reminders,
     generate_reminder_message,
+    get_utc_offset_buckets,
     send_reminder_for_daily_questionnaire,
 )
-from apps.users.models import UserSettings
+from apps.users.models import User, UserSettings
 from apps.utils.tests_utils import BaseTestCase
 
 
@@ -921,8 +924,8 @@ class DailyQuestionNotificationTest(BaseTestCase):
         self.user_questionnaire = make(UserQuestionnaire, user=self.user)
         self.user_questionnaire.created_at = timezone.now() - datetime.timedelta(days=8)
         self.user_questionnaire.save()
-        patcher = patch("apps.routines.tasks.send_push_notifications")
-        self.mocked_send_push_notifications = patcher.start()
+        patcher = patch("apps.routines.tasks.send_batched_push_notifications")
+        self.mocked_send_batched_push_notifications = patcher.start()
         self.addCleanup(patcher.stop)
         self.daily_questionnaire_reminder_template = make(NotificationTemplate, name="Daily Questionnaire Reminder")
         self.daily_questionnaire_reminder_template_translation = make(
@@ -958,16 +961,16 @@ class DailyQuestionNotificationTest(BaseTestCase):
         generated_message = generate_reminder_message(self.daily_questionnaire_reminder_template_translation)
         send_reminder_for_daily_questionnaire()
         user_devices = FCMDevice.objects.filter(user=self.user)
-        self.assertTrue(self.mocked_send_push_notifications.called)
+        self.assertTrue(self.mocked_send_batched_push_notifications.called)
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].count(),
+            len(self.mocked_send_batched_push_notifications.call_args.args[0]),
             user_devices.count(),
         )
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].first(),
+            self.mocked_send_batched_push_notifications.call_args.args[0][0][0],
             user_devices.first(),
         )
-        message = self.mocked_send_push_notifications.call_args.kwargs["message"]
+        message = self.mocked_send_batched_push_notifications.call_args.args[0][0][1]
         self.assertEqual(message.notification.title, generated_message.notification.title)
         self.assertEqual(message.notification.body, generated_message.notification.body)
 
@@ -976,7 +979,7 @@ class DailyQuestionNotificationTest(BaseTestCase):
         make(DailyQuestionnaire, user=self.user)
         make(FCMDevice, user=self.user)
         send_reminder_for_daily_questionnaire()
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @freeze_time("2022-06-01 15:00:00")
     def test_daily_questionnaire_reminder_task_without_notification_template(self):
@@ -984,7 +987,7 @@ class DailyQuestionNotificationTest(BaseTestCase):
         self.site_config.save()
         make(FCMDevice, user=self.user)
         send_reminder_for_daily_questionnaire()
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @freeze_time("2022-06-01 15:00:00")
     def test_daily_questionnaire_reminder_task_with_reminder_turned_off(self):
@@ -992,7 +995,7 @@ class DailyQuestionNotificationTest(BaseTestCase):
         self.user_settings.is_daily_questionnaire_reminder_active = False
         self.user_settings.save()
         send_reminder_for_daily_questionnaire()
-        self.assertFalse(self.mocked_send_push_notifications.called)
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
 
     @freeze_time("2022-06-01 15:00:00")
     def test_daily_questionnaire_reminder_task_with_specified_eligible_users(self):
@@ -1000,15 +1003,76 @@ class DailyQuestionNotificationTest(BaseTestCase):
         generated_message = generate_reminder_message(self.daily_questionnaire_reminder_template_translation)
         user_devices = FCMDevice.objects.filter(user=self.user)
         send_reminder_for_daily_questionnaire([self.user.id])
-        self.assertTrue(self.mocked_send_push_notifications.called)
+        self.assertTrue(self.mocked_send_batched_push_notifications.called)
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].count(),
+            len(self.mocked_send_batched_push_notifications.call_args.args[0]),
             user_devices.count(),
         )
         self.assertEqual(
-            self.mocked_send_push_notifications.call_args.args[0].first(),
+            self.mocked_send_batched_push_notifications.call_args.args[0][0][0],
             user_devices.first(),
         )
-        message = self.mocked_send_push_notifications.call_args.kwargs["message"]
+        message = self.mocked_send_batched_push_notifications.call_args.args[0][0][1]
         self.assertEqual(message.notification.title, generated_message.notification.title)
         self.assertEqual(message.notification.body, generated_message.notification.body)
+
+    def test_daily_questionnaire_reminder_task_uses_local_time_of_user(self):
+        self.user.utc_offset = 120
+        self.user.save()
+        make(FCMDevice, user=self.user)
+        with freeze_time("2022-06-01 15:00:00"):
+            send_reminder_for_daily_questionnaire()
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
+        with freeze_time("2022-06-01 13:00:00"):
+            send_reminder_for_daily_questionnaire()
+        self.assertTrue(self.mocked_send_batched_push_notifications.called)
+
+    def test_daily_questionnaire_reminder_task_uses_local_date_of_user(self):
+        self.user.utc_offset = 540
+        self.user.save()
+        make(FCMDevice, user=self.user)
+        # 2022-06-01 01:00 local time of the user
+        with freeze_time("2022-05-31 16:00:00"):
+            make(DailyQuestionnaire, user=self.user)
+        with freeze_time("2022-06-01 06:00:00"):
+            send_reminder_for_daily_questionnaire()
+        self.assertFalse(self.mocked_send_batched_push_notifications.called)
+
+    @freeze_time("2022-06-01 15:00:00")
+    def test_only_scheduled_daily_questionnaire_reminders_use_delivery_ledger(self):
+        make(FCMDevice, user=self.user)
+        send_reminder_for_daily_questionnaire([self.user.id])
+        self.assertIsNone(self.mocked_send_batched_push_notifications.call_args.kwargs["campaign"])
+
+        send_reminder_for_daily_questionnaire()
+        self.assertEqual(
+            self.mocked_send_batched_push_notifications.call_args.kwargs["campaign"],
+            f"{ReminderCampaign.DAILY_QUESTIONNAIRE.value}:2022-06-01",
+        )
+
+    def test_get_utc_offset_buckets(self):
+        local_time = datetime.time(15)
+        self.assertEqual(get_utc_offset_buckets(datetime.datetime(2022, 6, 1, 15, 5), local_time), [(0, 15)])
+        self.assertEqual(get_utc_offset_buckets(datetime.datetime(2022, 6, 1, 13, 0), local_time), [(120, 135)])
+        self.assertEqual(
+            get_utc_offset_buckets(datetime.datetime(2022, 6, 1, 1, 0), local_time), [(840, 855), (-600, -585)]
+        )
+
+    def test_daily_questionnaire_reminders_are_sent_in_chunks(self):
+        users = [self.user, *make(User, is_active=True, language=self.user.language, _quantity=2)]
+        for user in users:
+            make(FCMDevice, user=user, _quantity=2)
+        make(User, is_active=True, language=self.user.language)
+
+        chunks = fan_out_reminders(
+            ReminderCampaign.DAILY_QUESTIONNAIRE, User.objects.filter(id__in=[user.id for user in users]), chunk_size=2
+        )
+
+        self.assertEqual(chunks, 2)
+        self.assertEqual(self.mocked_send_batched_push_notifications.call_count, 2)
+        sent_devices = [
+            device
+            for call in self.mocked_send_batched_push_notifications.call_args_list
+            for device, _ in call.args[0]
+        ]
+        self.assertCountEqual(sent_devices, FCMDevice.objects.filter(user__in=users))
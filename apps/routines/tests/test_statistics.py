@@ -1,8 +1,10 @@
 import datetime
 import io
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from django.core.files import File
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.http import urlencode
@@ -22,6 +24,7 @@ from apps.routines import (
     SleepQuality,
     PredictionTypes,
     PredictionCategories,
+    POINTS_VERSION,
 )
 from apps.routines.models import (
     Routine,
@@ -30,6 +33,10 @@ from apps.routines.models import (
     Prediction,
     HealthCareEvent,
 )
+from apps.routines.pipeline import coalesce_derived_data_updates
+from apps.routines.predictions import COMPILED_OTHER_PREDICTION_RULES
+from apps.routines.scoring import SCORING_ENGINE, ScoringEngine, recompute_daily_statistics
+from apps.routines.tasks import recalculate_derived_data
 from apps.utils.tests_utils import BaseTestCase
 
 
@@ -215,6 +222,23 @@ class DailyStatisticsTest(BaseTestCase):
         self.assertEqual(updated_statistics_from_db.routine_count_status, "COUNTING_COMPLETED")
         self.assertLess(statistics_from_db.skin_care, response_statistics_2["skin_care"])
 
+    def test_repeated_routine_is_counted_once(self):
+        daily_questionnaire = make(DailyQuestionnaire, user=self.user)
+        statistics = DailyStatistics.objects.get(user=self.user, date=daily_questionnaire.created_at.date())
+
+        statistics_saved = MagicMock()
+        post_save.connect(statistics_saved, sender=DailyStatistics, weak=False)
+        self.addCleanup(post_save.disconnect, statistics_saved, sender=DailyStatistics)
+        make(Routine, user=self.user, routine_type="PM")
+        make(Routine, user=self.user, routine_type="PM")
+        make(Routine, user=self.user, routine_type="AM")
+        make(Routine, user=self.user, routine_type="AM")
+
+        updated_statistics = DailyStatistics.objects.get(id=statistics.id)
+        self.assertEqual(updated_statistics.routine_count_status, "COUNTING_COMPLETED")
+        self.assertEqual(updated_statistics.skin_care, statistics.skin_care + 50)
+        statistics_saved.assert_not_called()
+
     @freeze_time("2022-6-3")
     def test_statistics_overview(self):
         today = datetime.datetime.now()
@@ -296,6 +320,84 @@ class DailyStatisticsTest(BaseTestCase):
         self.assertEqual(daily_statistics.nutrition, nutrition_score)
         self.assertEqual(daily_statistics.date, datetime.datetime.now().date())
 
+    def test_coalesced_daily_questionnaire_updates(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with coalesce_derived_data_updates():
+                daily_questionnaire = make(DailyQuestionnaire, user=self.user, water=0)
+                daily_questionnaire.water = 3
+                daily_questionnaire.save()
+                self.assertFalse(DailyStatistics.objects.filter(user=self.user).exists())
+
+        self.assertEqual(len(callbacks), 1)
+        daily_statistics = DailyStatistics.objects.get(user=self.user)
+        self.assertEqual(
+            [daily_statistics.skin_care, daily_statistics.well_being, daily_statistics.nutrition],
+            SCORING_ENGINE.score_questionnaire(daily_questionnaire),
+        )
+
+    def test_coalesced_routine_and_daily_questionnaire_are_recalculated_once(self):
+        with patch(
+            "apps.routines.tasks.recalculate_derived_data.delay", wraps=recalculate_derived_data.delay
+        ) as recalculate_mock:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with coalesce_derived_data_updates():
+                    daily_questionnaire = make(DailyQuestionnaire, user=self.user)
+                    make(Routine, user=self.user, routine_type="AM")
+                    make(Routine, user=self.user, routine_type="PM")
+                    self.assertFalse(DailyStatistics.objects.filter(user=self.user).exists())
+
+        self.assertEqual(len(callbacks), 1)
+        recalculate_mock.assert_called_once_with([[self.user.id, daily_questionnaire.created_at.date().isoformat()]])
+        daily_statistics = DailyStatistics.objects.get(user=self.user)
+        self.assertEqual(daily_statistics.routine_count_status, "COUNTING_COMPLETED")
+
+    def test_routine_created_through_api_updates_statistics_after_commit(self):
+        daily_questionnaire = make(DailyQuestionnaire, user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.post(reverse("routines-list"), {"routine_type": "AM"})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(callbacks), 1)
+        daily_statistics = DailyStatistics.objects.get(user=self.user, date=daily_questionnaire.created_at.date())
+        self.assertEqual(daily_statistics.routine_count_status, "ONLY_AM_COUNTED")
+
+    @freeze_time("2022-6-3")
+    def test_recompute_daily_statistics(self):
+        make(Routine, user=self.user, routine_type="AM")
+        make(
+            DailyQuestionnaire,
+            user=self.user,
+            skin_feel="NORMAL",
+            diet_today="BALANCED",
+            water=3,
+            stress_levels="RELAXED",
+            exercise_hours="TWO_HOURS",
+            life_happened=["INNOCENT"],
+            feeling_today="LOVE_IT",
+            hours_of_sleep=8,
+            sleep_quality="WELL",
+        )
+        DailyStatistics.objects.filter(user=self.user).update(skin_care=0, well_being=0, nutrition=0, points_version=0)
+
+        self.assertEqual(recompute_daily_statistics(user_ids=[self.user.id], outdated_only=True), 1)
+        daily_statistics = DailyStatistics.objects.get(user=self.user)
+        self.assertEqual(daily_statistics.skin_care, 75)
+        self.assertEqual(daily_statistics.well_being, 95)
+        self.assertEqual(daily_statistics.nutrition, 100)
+        self.assertEqual(daily_statistics.routine_count_status, "ONLY_AM_COUNTED")
+        self.assertEqual(daily_statistics.points_version, POINTS_VERSION)
+        self.assertEqual(recompute_daily_statistics(user_ids=[self.user.id], outdated_only=True), 0)
+
+    def test_scoring_engine_with_changed_points(self):
+        engine = ScoringEngine(
+            points={"skin_feel": {"NORMAL": 30}, "water": {3: 20}, "life_happened": {"COFFEE": 10, "ALCOHOL": 5}},
+            sections={"skin_care": ["skin_feel"], "nutrition": ["water", "life_happened"]},
+            version=2,
+        )
+        scores = engine.score_many([["NORMAL", 3, ["COFFEE", "ALCOHOL"]], ["GREASY", 3, []]])
+        self.assertEqual(scores, [[30, 25], [0, 20]])
+
     @parameterized.expand(
         [
             ["2022-04-01", 0, 0, 0, 0],
@@ -892,3 +994,48 @@ class PredictionTest(BaseTestCase):
             predictions[0]["created_at"],
             prediction.created_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
         )
+
+
+class StreakPredictionRulesTest(SimpleTestCase):
+    answers = ("WELL", "SENSITIVE", 8, "BAD", "ZERO", "RELAXED", "BALANCED", 3, ["COFFEE"])
+
+    def test_all_rules_are_evaluated_in_one_pass(self):
+        prediction_types = COMPILED_OTHER_PREDICTION_RULES.evaluate([self.answers] * 3)
+        self.assertEqual(
+            prediction_types,
+            [
+                PredictionTypes.SKIN_TODAY_WELL,
+                PredictionTypes.SKIN_FEELING_SENSITIVE,
+                PredictionTypes.SLEEP_HOURS_GREATER_EQUAL_SEVEN,
+                PredictionTypes.SLEEP_QUALITY_BAD_OR_MEHHH,
+                PredictionTypes.EXERCISE_HOURS_BAD,
+                PredictionTypes.STRESS_RELAXED,
+                PredictionTypes.DIET_BALANCED,
+                PredictionTypes.WATER_INTAKE_TWO_OR_THREE,
+                PredictionTypes.LIFE_HAPPENED_COFFEE_OR_ALCOHOL_OR_JUNK_FOOD,
+            ],
+        )
+
+    def test_not_enough_consecutive_answers(self):
+        self.assertEqual(COMPILED_OTHER_PREDICTION_RULES.evaluate([self.answers] * 2), [])
+
+    def test_answers_from_different_groups_break_the_streak(self):
+        other_answers = ("LOVE_IT", "NORMAL", 6, "MEHHH", "ONE_HOUR", "RELAXED", "MILDLY_BALANCED", 2, ["INNOCENT"])
+        prediction_types = COMPILED_OTHER_PREDICTION_RULES.evaluate([self.answers, self.answers, other_answers])
+        self.assertEqual(
+            prediction_types,
+            [
+                PredictionTypes.SLEEP_QUALITY_BAD_OR_MEHHH,
+                PredictionTypes.STRESS_RELAXED,
+                PredictionTypes.WATER_INTAKE_TWO_OR_THREE,
+            ],
+        )
+
+    def test_recent_prediction_categories_are_skipped(self):
+        prediction_types = COMPILED_OTHER_PREDICTION_RULES.evaluate(
+            [self.answers] * 3,
+            [PredictionTypes.SKIN_TODAY_LOVE_IT, PredictionTypes.WATER_INTAKE_ZERO_OR_ONE],
+        )
+        self.assertNotIn(PredictionTypes.SKIN_TODAY_WELL, prediction_types)
+        self.assertNotIn(PredictionTypes.WATER_INTAKE_TWO_OR_THREE, prediction_types)
+        self.assertEqual(len(prediction_types), 7)
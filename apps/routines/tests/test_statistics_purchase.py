@@ -282,9 +282,9 @@ class MonthlyStatisticsNotificationTest(BaseStatisticsPurchaseTest):
         )
         self.assertEqual(generated_message.notification.body, notification_body)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-09-30 13:00:00")
-    def test_monthly_statistics_notification_at_the_end_of_month(self, mocked_send_push_notifications):
+    def test_monthly_statistics_notification_at_the_end_of_month(self, mocked_send_batched_push_notifications):
         make(UserQuestionnaire, user=self.user)
         statistics_purchase = make(
             StatisticsPurchase,
@@ -300,21 +300,23 @@ class MonthlyStatisticsNotificationTest(BaseStatisticsPurchaseTest):
         send_notification_about_monthly_statistics()
 
         user_devices = FCMDevice.objects.filter(user=self.user)
-        self.assertTrue(mocked_send_push_notifications.called)
-        self.assertTrue(mocked_send_push_notifications.call_count, 1)
+        self.assertTrue(mocked_send_batched_push_notifications.called)
+        self.assertTrue(mocked_send_batched_push_notifications.call_count, 1)
         self.assertEqual(
-            mocked_send_push_notifications.call_args.args[0].first(),
+            mocked_send_batched_push_notifications.call_args.args[0][0][0],
             user_devices.first(),
         )
 
         generated_message = generate_reminder_message(self.statistics_notification_template_translation)
-        message = mocked_send_push_notifications.call_args.kwargs["message"]
+        message = mocked_send_batched_push_notifications.call_args.args[0][0][1]
         self.assertEqual(message.notification.title, generated_message.notification.title)
         self.assertEqual(message.notification.body, generated_message.notification.body)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-09-30 13:00:00")
-    def test_monthly_statistics_notification_at_the_end_of_month_no_questionnaire(self, mocked_send_push_notifications):
+    def test_monthly_statistics_notification_at_the_end_of_month_no_questionnaire(
+        self, mocked_send_batched_push_notifications
+    ):
         statistics_purchase = make(
             StatisticsPurchase,
             status=PurchaseStatus.STARTED.value,
@@ -328,12 +330,12 @@ class MonthlyStatisticsNotificationTest(BaseStatisticsPurchaseTest):
 
         send_notification_about_monthly_statistics()
 
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-09-30 13:00:00")
     def test_monthly_statistics_notification_at_the_end_of_month_with_eligible_users(
-        self, mocked_send_push_notifications
+        self, mocked_send_batched_push_notifications
     ):
         make(UserQuestionnaire, user=self.user)
         new_user = make(User, is_verified=True, language=self.language)
@@ -361,13 +363,13 @@ class MonthlyStatisticsNotificationTest(BaseStatisticsPurchaseTest):
 
         send_notification_about_monthly_statistics(eligible_user_pks=[self.user.id, new_user.id])
 
-        self.assertTrue(mocked_send_push_notifications.called)
-        self.assertTrue(mocked_send_push_notifications.call_count, 2)
+        self.assertEqual(mocked_send_batched_push_notifications.call_count, 1)
+        self.assertEqual(len(mocked_send_batched_push_notifications.call_args.args[0]), 2)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-09-30 13:00:00")
     def test_monthly_statistics_notification_at_the_end_of_month_with_eligible_users_no_questionnaire(
-        self, mocked_send_push_notifications
+        self, mocked_send_batched_push_notifications
     ):
         new_user = make(User, is_verified=True, language=self.language)
         statistics_purchase_1 = make(
@@ -394,13 +396,13 @@ class MonthlyStatisticsNotificationTest(BaseStatisticsPurchaseTest):
 
         send_notification_about_monthly_statistics(eligible_user_pks=[self.user.id, new_user.id])
 
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
-    @patch("apps.routines.tasks.send_push_notifications")
+    @patch("apps.routines.tasks.send_batched_push_notifications")
     @freeze_time("2022-09-01 6:00:00")
-    def test_monthly_statistics_notification_not_at_the_end_of_month(self, mocked_send_push_notifications):
+    def test_monthly_statistics_notification_not_at_the_end_of_month(self, mocked_send_batched_push_notifications):
         send_notification_about_monthly_statistics()
-        self.assertFalse(mocked_send_push_notifications.called)
+        self.assertFalse(mocked_send_batched_push_notifications.called)
 
 
 class PlayStoreStatisticsPurchaseTest(BaseStatisticsPurchaseTest):
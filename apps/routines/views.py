@@ -73,6 +73,7 @@ from apps.routines.models import (
     UserScrapedProduct,
     ScrapedProduct,
 )
+from apps.routines.pipeline import coalesce_derived_data_updates
 from apps.routines.progresses import generate_monthly_progress
 from apps.routines.purchases import (
     process_statistics_purchase_play_store_notifications,
@@ -143,6 +144,10 @@ class RoutineViewSet(ModelViewSet):
     def get_queryset(self):
         return Routine.objects.filter(user=self.request.user)
 
+    def perform_create(self, serializer):
+        with coalesce_derived_data_updates(), transaction.atomic():
+            serializer.save()
+
     @action(
         methods=["get"],
         detail=False,
@@ -203,6 +208,14 @@ class DailyQuestionnaireViewSet(ModelViewSet):
             skin_care_prefetch, well_being_prefetch, nutrition_prefetch
         ).filter(user=self.request.user)
 
+    def perform_create(self, serializer):
+        with coalesce_derived_data_updates(), transaction.atomic():
+            serializer.save()
+
+    def perform_update(self, serializer):
+        with coalesce_derived_data_updates(), transaction.atomic():
+            serializer.save()
+
     def partial_update(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
@@ -1,51 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import BinaryIO, Iterable
 from urllib.request import urlopen
 
 import boto3
 from django.conf import settings
 
+# Rekognition throttles concurrent DetectText requests of an account, so the number of parallel requests is bounded
+MAX_PARALLEL_DETECTIONS = 8
+
 
 class TextRekognition:
+    _client = None
+    _client_lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls):
+        """Returns the process-wide Rekognition client, clients are expensive to create but thread safe to use"""
+        if cls._client is None:
+            # creation of boto3 clients isn't thread safe
+            with cls._client_lock:
+                if cls._client is None:
+                    cls._client = boto3.client(
+                        "rekognition",
+                        aws_access_key_id=settings.TEXT_REKOGNITION_ACCESS_KEY,
+                        aws_secret_access_key=settings.TEXT_REKOGNITION_SECRET_KEY,
+                        region_name="eu-central-1",
+                    )
+        return cls._client
+
+    @classmethod
+    def detect_text(cls, image_bytes: bytes) -> str:
+        response = cls.get_client().detect_text(Image={"Bytes": image_bytes})
+        return "".join(f"{detection['DetectedText']} " for detection in response["TextDetections"])
+
     @classmethod
     def run(cls, image_url):
-        client = boto3.client(
-            "rekognition",
-            aws_access_key_id=settings.TEXT_REKOGNITION_ACCESS_KEY,
-            aws_secret_access_key=settings.TEXT_REKOGNITION_SECRET_KEY,
-            region_name="eu-central-1",
-        )
-        # load the input image as a raw binary file and make a request to
-        # the Amazon Rekognition OCR API
         image = urlopen(image_url).read()  # noqa S310
-        response = client.detect_text(Image={"Bytes": image})
-        # grab the text detection results from the API and load the input
-        # image again, this time in OpenCV format
-        detections = response["TextDetections"]
-        result = ""
-        for detection in detections:
-            text = detection["DetectedText"]
-            result += f"{text} "
-        return result
+        return cls.detect_text(image)
 
     @classmethod
     def run_bytes(cls, product_image):
-        client = boto3.client(
-            "rekognition",
-            aws_access_key_id=settings.TEXT_REKOGNITION_ACCESS_KEY,
-            aws_secret_access_key=settings.TEXT_REKOGNITION_SECRET_KEY,
-            region_name="eu-central-1",
-        )
-        # load the input image as a raw binary file and make a request to
-        # the Amazon Rekognition OCR API
-        # image = urlopen(image_url).read()  # noqa S310
-        image_bytes = product_image.read()
-        # with open(product_image, "rb") as image:
-        #     image_bytes = image.read()
-        response = client.detect_text(Image={"Bytes": image_bytes})
-        # grab the text detection results from the API and load the input
-        # image again, this time in OpenCV format
-        detections = response["TextDetections"]
-        result = ""
-        for detection in detections:
-            text = detection["DetectedText"]
-            result += f"{text} "
-        return result
+        return cls.detect_text(product_image.read())
+
+    @classmethod
+    def run_many(cls, product_images: Iterable[BinaryIO], max_workers: int = MAX_PARALLEL_DETECTIONS) -> list[str]:
+        """Reads text on the images concurrently in a bounded thread pool, results are in the order of the images"""
+        product_images = list(product_images)
+        if len(product_images) <= 1:
+            return [cls.run_bytes(product_image) for product_image in product_images]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(product_images))) as executor:
+            return list(executor.map(cls.run_bytes, product_images))
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.15 on 2026-10-19 13:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_user_geo_updated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="utc_offset",
+            field=models.SmallIntegerField(
+                db_index=True,
+                default=0,
+                help_text="offset of the user's local time from UTC in minutes",
+                validators=[
+                    django.core.validators.MinValueValidator(-720),
+                    django.core.validators.MaxValueValidator(840),
+                ],
+            ),
+        ),
+    ]
@@ -6,6 +6,7 @@ import uuid
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.contrib.postgres.fields import CIEmailField
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import Subquery, IntegerField, JSONField  # type: ignore
 from django.utils import timezone
@@ -72,6 +73,12 @@ class User(AbstractUser):
         on_delete=models.SET_DEFAULT,
     )
     geolocation = models.CharField(blank=True, max_length=255)
+    utc_offset = models.SmallIntegerField(
+        default=0,
+        db_index=True,
+        validators=[MinValueValidator(-720), MaxValueValidator(840)],
+        help_text="offset of the user's local time from UTC in minutes",
+    )
     device = models.CharField(blank=True, max_length=255)
     operating_system = models.CharField(blank=True, max_length=255)
     password_last_change = models.DateTimeField(null=True, blank=True)
@@ -159,6 +159,7 @@ class UserSerializer(serializers.ModelSerializer):
             "avatar",
             "gender",
             "geolocation",
+            "utc_offset",
             "device",
             "operating_system",
             "questionnaire_id",
@@ -645,6 +645,17 @@ class AuthenticationTestCase(BaseTestCase):
         self.assertEqual(data["device"], self.user.device)
         self.assertEqual(data["operating_system"], self.user.operating_system)
 
+    def test_partial_update_user_utc_offset(self):
+        self.query_limits["ANY PATCH REQUEST"] = 6
+        response = self.patch(reverse("user"), data={"utc_offset": 180})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["utc_offset"], 180)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.utc_offset, 180)
+
+        response = self.patch(reverse("user"), data={"utc_offset": 900})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_user_endpoint_does_not_change_email(self):
         self.query_limits["ANY PUT REQUEST"] = 6
         data = {"first_name": "New", "email": "new@new.com"}
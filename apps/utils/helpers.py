@@ -1,13 +1,16 @@
 import base64
 import binascii
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import copy
 from functools import wraps
 import json
 import logging
-from typing import Callable, Optional
+from typing import Callable, Iterable, NamedTuple, Optional
 
 from django.conf import settings
-from django.db.models import QuerySet
 from fcm_django.models import FCMDevice
+from firebase_admin import messaging
 from firebase_admin.messaging import Message
 import jwt
 from redis import StrictRedis
@@ -15,6 +18,10 @@ from redis.exceptions import ConnectionError
 
 LOGGER = logging.getLogger("app")
 
+# FCM accepts at most 500 messages in one batch request
+FCM_MAX_BATCH_SIZE = 500
+FCM_MAX_PARALLEL_BATCHES = 4
+
 
 def redis_cache(
     func: Callable = None,
@@ -89,11 +96,170 @@ def _get_cached_value_from_redis(  # noqa: CFQ002
     return value
 
 
-def send_push_notifications(devices: QuerySet[FCMDevice], message: Message) -> None:
-    """Sends FCM push notifications to devices"""
-    for device in devices:
-        device.send_message(message=message)
-        LOGGER.debug("Successfully sent push notifications to device [%s].", device.device_id)
+# clients by redis url, every client keeps its own connection pool which is shared by the threads of the process
+_redis_clients: dict[str, StrictRedis] = {}
+
+
+def get_redis_client() -> nullcontext:
+    """
+    Returns redis client to be used as a context manager. If redis is not configured the context value is None.
+    The client is created once per process, leaving the context doesn't close its connections.
+
+    Usage example:
+        with get_redis_client() as redis:
+            if redis:
+                redis.incr("counter")
+    """
+    if not settings.REDIS_URL:
+        return nullcontext()
+    if (client := _redis_clients.get(settings.REDIS_URL)) is None:
+        client = _redis_clients.setdefault(settings.REDIS_URL, StrictRedis.from_url(settings.REDIS_URL))
+    return nullcontext(client)
+
+
+class PushNotificationResult(NamedTuple):
+    device_pk: int
+    registration_id: str
+    success: bool
+    exception: Optional[Exception] = None
+    # position of the (device, message) pair in the sent notifications
+    message_index: Optional[int] = None
+
+    @property
+    def error_code(self) -> str:
+        if self.exception is None:
+            return ""
+        return getattr(self.exception, "code", None) or type(self.exception).__name__
+
+    @property
+    def is_unregistered(self) -> bool:
+        """Token is not valid anymore and should not be used again"""
+        return isinstance(self.exception, (messaging.UnregisteredError, messaging.SenderIdMismatchError))
+
+
+def send_push_notifications(devices: Iterable[FCMDevice], message: Message) -> list[PushNotificationResult]:
+    """Sends the same FCM push notification to devices"""
+    return send_batched_push_notifications((device, message) for device in devices)
+
+
+def send_batched_push_notifications(
+    device_messages: Iterable[tuple[FCMDevice, Message]],
+    campaign: Optional[str] = None,
+    batch_size: int = FCM_MAX_BATCH_SIZE,
+    max_parallel_batches: int = FCM_MAX_PARALLEL_BATCHES,
+) -> list[PushNotificationResult]:
+    """
+    Sends FCM push notifications in batches of up to `batch_size` messages (one request per batch) using at most
+    `max_parallel_batches` concurrent requests. Inactive devices and repeated messages to the same token are skipped.
+    With `campaign`, devices which already received the campaign are skipped and the results are stored in
+    the `PushNotificationDelivery` ledger, devices with failed deliveries are retried. Devices with tokens reported
+    as unregistered by FCM are deactivated.
+    Returns result for every sent token with `message_index` of its (device, message) pair.
+    """
+    device_messages = _filter_device_messages(device_messages, campaign)
+    batches = [device_messages[i : i + batch_size] for i in range(0, len(device_messages), batch_size)]
+    if not batches:
+        return []
+
+    results = []
+    with ThreadPoolExecutor(max_workers=min(max_parallel_batches, len(batches))) as executor:
+        for batch_results in executor.map(_send_push_notification_batch, batches):
+            results.extend(batch_results)
+    LOGGER.info(
+        "Sent [%s] push notifications in [%s] batches, [%s] failed.",
+        len(results),
+        len(batches),
+        sum(not result.success for result in results),
+    )
+    _deactivate_unregistered_devices(results)
+    if campaign:
+        _record_push_notification_deliveries(campaign, results)
+    return results
+
+
+def _record_push_notification_deliveries(campaign: str, results: list[PushNotificationResult]) -> None:
+    """Stores the results in the delivery ledger, failed deliveries of the devices are updated by successful retries"""
+    from apps.home.models import PushNotificationDelivery
+
+    PushNotificationDelivery.objects.bulk_create(
+        [
+            PushNotificationDelivery(
+                campaign=campaign,
+                device_id=result.device_pk,
+                is_successful=result.success,
+                error_code=result.error_code,
+            )
+            for result in results
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    if successful_device_pks := [result.device_pk for result in results if result.success]:
+        PushNotificationDelivery.objects.filter(
+            campaign=campaign, device_id__in=successful_device_pks, is_successful=False
+        ).update(is_successful=True, error_code="")
+
+
+def _filter_device_messages(
+    device_messages: Iterable[tuple[FCMDevice, Message]], campaign: Optional[str]
+) -> list[tuple[int, FCMDevice, Message]]:
+    device_messages = [
+        (index, device, message) for index, (device, message) in enumerate(device_messages) if device.active
+    ]
+    delivered_device_pks = set()
+    if campaign:
+        from apps.home.models import PushNotificationDelivery
+
+        delivered_device_pks = set(
+            PushNotificationDelivery.objects.filter(
+                campaign=campaign,
+                device_id__in=[device.pk for _, device, _ in device_messages],
+                is_successful=True,
+            ).values_list("device_id", flat=True)
+        )
+
+    filtered_device_messages = []
+    sent_messages = set()
+    for index, device, message in device_messages:
+        # duplicate devices share the same token
+        token_message = (device.registration_id, id(message))
+        if device.pk in delivered_device_pks or token_message in sent_messages:
+            continue
+        sent_messages.add(token_message)
+        filtered_device_messages.append((index, device, message))
+    return filtered_device_messages
+
+
+def _deactivate_unregistered_devices(results: list[PushNotificationResult]) -> None:
+    if unregistered_tokens := {result.registration_id for result in results if result.is_unregistered}:
+        deactivated_count = FCMDevice.objects.filter(registration_id__in=unregistered_tokens).update(active=False)
+        LOGGER.info("Deactivated [%s] devices with unregistered tokens.", deactivated_count)
+
+
+def _send_push_notification_batch(batch: list[tuple[int, FCMDevice, Message]]) -> list[PushNotificationResult]:
+    messages = []
+    for _, device, message in batch:
+        device_message = copy.copy(message)
+        device_message.token = device.registration_id
+        messages.append(device_message)
+    try:
+        responses = _send_each(messages).responses
+    except Exception as err:  # noqa: B902
+        # a failed batch must not abort the other batches, its messages are reported as failed
+        LOGGER.exception("Sending batch of [%s] push notifications failed due to [%s].", len(batch), err)
+        return [
+            PushNotificationResult(device.pk, device.registration_id, False, err, index) for index, device, _ in batch
+        ]
+    return [
+        PushNotificationResult(device.pk, device.registration_id, response.success, response.exception, index)
+        for (index, device, _), response in zip(batch, responses)
+    ]
+
+
+def _send_each(messages: list[Message]) -> messaging.BatchResponse:
+    # `send_all` is the predecessor of `send_each` in older firebase admin versions
+    send_each = getattr(messaging, "send_each", None) or messaging.send_all
+    return send_each(messages)
 
 
 def decode_data(encoded_message: str) -> Optional[dict]:
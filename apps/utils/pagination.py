@@ -39,3 +39,12 @@ class CustomPagination(pagination.LimitOffsetPagination):
                 "results": data,
             }
         )
+
+
+class SearchRankCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination of search results ordered by the annotated `rank`, results with the same rank are ordered by id.
+    """
+
+    ordering = ("-rank", "-id")
+    page_size = 20
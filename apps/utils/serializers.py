@@ -0,0 +1,27 @@
+from django.db import models
+from rest_framework import serializers
+
+
+class PrivateMediaListSerializer(serializers.ListSerializer):
+    """
+    List serializer which signs urls of all private files of the items at once before the items are serialized,
+    so the child serializer gets the urls from the cache of the storage (see `PrivateMediaStorage.get_signed_urls`).
+
+    Usage example:
+        class Meta:
+            list_serializer_class = PrivateMediaListSerializer
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        for field in self.child.fields.values():
+            if not isinstance(field, serializers.FileField) or field.write_only:
+                continue
+            files = [getattr(item, field.source, None) for item in items]
+            names_by_storage = {}
+            for file in files:
+                if file and hasattr(file.storage, "get_signed_urls"):
+                    names_by_storage.setdefault(file.storage, []).append(file.name)
+            for storage, names in names_by_storage.items():
+                storage.get_signed_urls(names)
+        return super().to_representation(items)
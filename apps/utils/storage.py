@@ -1,8 +1,14 @@
+import logging
 import os
+import time
+from typing import Iterable
 
 from django.core.files.storage import FileSystemStorage
+from redis.exceptions import ConnectionError
 from storages.backends.s3boto3 import S3Boto3Storage
 
+LOGGER = logging.getLogger("app")
+
 
 class MediaStorage(S3Boto3Storage):
     """Class for public uploaded files that will not have a querystring auth, e.g.
@@ -28,6 +34,75 @@ class PrivateMediaStorage(MediaStorage):
 
     querystring_auth = True
     default_acl = "private"
+    # signed urls are reused within a bucket of time, every returned url is valid for at least `querystring_expire`
+    signed_url_bucket_seconds = 15 * 60
+    signed_url_local_cache_size = 10000
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        self.signed_urls_bucket = None
+        self.signed_urls: dict[str, str] = {}
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire or http_method:
+            return super().url(name, parameters, expire, http_method)
+        return self.get_signed_urls([name])[name]
+
+    def get_signed_urls(self, names: Iterable[str]) -> dict[str, str]:
+        """
+        Returns signed urls of the files by their names. Urls are cached in the process and in Redis per name and
+        bucket of time, so only urls missing in both caches are signed. Without Redis only the in-process cache is used.
+        """
+        # helpers import models, which use the storage
+        from apps.utils.helpers import get_redis_client
+
+        names = list(dict.fromkeys(names))
+        bucket = int(time.time()) // self.signed_url_bucket_seconds
+        # the cache may be replaced by another thread, so the urls are read from and written to a local reference
+        signed_urls = self.signed_urls
+        if bucket != self.signed_urls_bucket or len(signed_urls) > self.signed_url_local_cache_size:
+            signed_urls = {}
+            self.signed_urls_bucket = bucket
+            self.signed_urls = signed_urls
+
+        result = {name: signed_urls[name] for name in names if name in signed_urls}
+        missing_names = [name for name in names if name not in result]
+        if missing_names:
+            try:
+                with get_redis_client() as redis:
+                    missing_urls = self._get_missing_signed_urls(missing_names, bucket, redis)
+            except ConnectionError:
+                LOGGER.exception("Failed to connect to Redis to retrieve signed urls.")
+                missing_urls = self._get_missing_signed_urls(missing_names, bucket, None)
+            signed_urls.update(missing_urls)
+            result.update(missing_urls)
+
+        return {name: result[name] for name in names}
+
+    def _get_missing_signed_urls(self, names: list[str], bucket: int, redis) -> dict[str, str]:
+        urls = {}
+        if redis:
+            keys = [self._get_signed_url_key(name, bucket) for name in names]
+            for name, url in zip(names, redis.mget(keys)):
+                if url is not None:
+                    urls[name] = url.decode() if isinstance(url, bytes) else url
+            names = [name for name in names if name not in urls]
+        if not names:
+            return urls
+
+        # urls signed at the end of the bucket have to be valid for `querystring_expire` as well
+        expire = self.querystring_expire + self.signed_url_bucket_seconds
+        signed_urls = {name: super().url(name, expire=expire) for name in names}
+        if redis:
+            ttl = (bucket + 1) * self.signed_url_bucket_seconds - int(time.time())
+            with redis.pipeline() as pipeline:
+                for name, url in signed_urls.items():
+                    pipeline.setex(self._get_signed_url_key(name, bucket), max(ttl, 1), url)
+                pipeline.execute()
+        return {**urls, **signed_urls}
+
+    def _get_signed_url_key(self, name: str, bucket: int) -> str:
+        return f"signed_url:{self.bucket_name}:{bucket}:{name}"
 
 
 restricted_file_storage = PrivateMediaStorage() if os.getenv("STORAGE_BUCKET_NAME") is not None else FileSystemStorage()
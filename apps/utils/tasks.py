@@ -1,6 +1,9 @@
+import datetime
 import logging
 from typing import List, Optional
 
+from django.db.models import Count, Max
+from django.utils import timezone
 from fcm_django.models import FCMDevice
 from firebase_admin.messaging import Message, Notification
 
@@ -9,6 +12,7 @@ from apps.home.models import (
     EmailTemplateTranslation,
     SiteConfiguration,
     NotificationTemplateTranslation,
+    PushNotificationDelivery,
 )
 from apps.routines import (
     FaceScanNotificationTypes,
@@ -24,6 +28,9 @@ from apps.utils.scrape import AmazonScrapper
 
 LOGGER = logging.getLogger("app")
 
+# campaigns are sent within hours, older deliveries are only kept for troubleshooting
+PUSH_NOTIFICATION_DELIVERY_RETENTION = datetime.timedelta(days=30)
+
 
 @app.task
 def send_email_task(  # noqa: CFQ002
@@ -132,3 +139,30 @@ def _generate_message_from_translation(
 def import_products_from_amazon(amazon_url, pages) -> None:
     LOGGER.info(f"Starting importing {pages} pages of products from amazon link: {amazon_url}")
     AmazonScrapper.run_products_page(amazon_url=amazon_url, pages=pages)
+
+
+@app.task
+def deduplicate_fcm_devices() -> int:
+    """Collapses FCM devices sharing the same registration id into the most recently registered one"""
+    duplicates = (
+        FCMDevice.objects.values("registration_id")
+        .annotate(devices_count=Count("id"), latest_device_id=Max("id"))
+        .filter(devices_count__gt=1)
+    )
+    deleted_count, _ = (
+        FCMDevice.objects.filter(registration_id__in=duplicates.values("registration_id"))
+        .exclude(id__in=duplicates.values("latest_device_id"))
+        .delete()
+    )
+    LOGGER.info("Deleted [%s] duplicate FCM devices.", deleted_count)
+    return deleted_count
+
+
+@app.task
+def prune_push_notification_deliveries() -> int:
+    """Deletes deliveries of push notification campaigns older than the retention period"""
+    deleted_count, _ = PushNotificationDelivery.objects.filter(
+        created_at__lt=timezone.now() - PUSH_NOTIFICATION_DELIVERY_RETENTION
+    ).delete()
+    LOGGER.info("Deleted [%s] push notification deliveries.", deleted_count)
+    return deleted_count
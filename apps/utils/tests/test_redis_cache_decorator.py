@@ -3,9 +3,10 @@ from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
 from django.conf import settings
+from django.test import override_settings
 from redis.exceptions import ConnectionError
 
-from apps.utils.helpers import redis_cache
+from apps.utils.helpers import get_redis_client, redis_cache
 
 
 class RedisCacheTestCase(TestCase):
@@ -109,3 +110,19 @@ class RedisCacheTestCase(TestCase):
 
         self.assertEqual(result, self.EXPECTED_RESULT)
         self.assertEqual(self.func.call_count, 1)
+
+
+class RedisClientTestCase(TestCase):
+    @override_settings(REDIS_URL="redis://test-client")
+    @patch("apps.utils.helpers.StrictRedis.from_url", side_effect=lambda url: MagicMock())
+    def test_redis_client_is_reused(self, from_url_mock):
+        with get_redis_client() as redis:
+            first_client = redis
+        with get_redis_client() as redis:
+            self.assertIs(redis, first_client)
+        first_client.close.assert_not_called()
+
+    @override_settings(REDIS_URL="")
+    def test_redis_client_is_none_without_redis(self):
+        with get_redis_client() as redis:
+            self.assertIsNone(redis)
@@ -1,30 +1,143 @@
-from unittest.mock import patch
+import datetime
+from unittest.mock import MagicMock, patch
 
+from django.utils import timezone
 from fcm_django.models import FCMDevice
-from firebase_admin.messaging import Message, Notification
+from firebase_admin.messaging import BatchResponse, Message, Notification, SendResponse, UnregisteredError
+from freezegun import freeze_time
 from model_bakery.baker import make
 
-from apps.home.models import NotificationTemplate, NotificationTemplateTranslation
+from apps.home.models import NotificationTemplate, NotificationTemplateTranslation, PushNotificationDelivery
 from apps.routines import (
     FaceScanNotificationTypes,
     PUSH_NOTIFICATION_TYPE_TO_CLICK_ACTION_LINK,
 )
-from apps.utils.helpers import send_push_notifications
+from apps.utils.helpers import send_batched_push_notifications, send_push_notifications
 from apps.utils.tasks import (
+    PUSH_NOTIFICATION_DELIVERY_RETENTION,
     _generate_message_from_translation,
+    deduplicate_fcm_devices,
     generate_and_send_notification,
+    prune_push_notification_deliveries,
 )
 from apps.utils.tests_utils import BaseTestCase
 
 
 class TestPushNotification(BaseTestCase):
-    @patch("apps.utils.helpers.FCMDevice", autospec=True)
-    def test_send_push_notification(self, FCMDevice):  # noqa: N803
-        devices = make(FCMDevice, user=self.user, _quantity=2)
+    @patch("apps.utils.helpers._send_each")
+    def test_send_push_notification(self, mocked_send_each):
+        mocked_send_each.side_effect = lambda messages: BatchResponse(
+            [SendResponse({"name": "message-id"}, None) for _ in messages]
+        )
+        devices = make(FCMDevice, user=self.user, _quantity=2, _fill_optional=["registration_id"])
+        message = Message(notification=Notification(title="test title", body="Sample notification message body"))
+        results = send_push_notifications(devices, message)
+        mocked_send_each.assert_called_once()
+        sent_messages = mocked_send_each.call_args.args[0]
+        self.assertEqual([sent.token for sent in sent_messages], [device.registration_id for device in devices])
+        for sent in sent_messages:
+            self.assertEqual(sent.notification, message.notification)
+        self.assertTrue(all(result.success for result in results))
+
+    @patch("apps.utils.helpers._send_each")
+    def test_send_batched_push_notifications(self, mocked_send_each):
+        error = MagicMock(code="UNREGISTERED")
+        mocked_send_each.side_effect = lambda messages: BatchResponse(
+            [
+                SendResponse(None, error) if sent.token == "invalid" else SendResponse({"name": "message-id"}, None)
+                for sent in messages
+            ]
+        )
+        devices = [
+            make(FCMDevice, user=self.user, registration_id="valid-1"),
+            make(FCMDevice, user=self.user, registration_id="invalid"),
+            make(FCMDevice, user=self.user, registration_id="valid-2"),
+            make(FCMDevice, user=self.user, registration_id="inactive", active=False),
+        ]
+        message = Message(notification=Notification(title="test title", body="Sample notification message body"))
+        results = send_batched_push_notifications([(device, message) for device in devices], batch_size=2)
+        self.assertEqual(mocked_send_each.call_count, 2)
+        self.assertEqual(
+            {(result.registration_id, result.success, result.error_code) for result in results},
+            {("valid-1", True, ""), ("invalid", False, "UNREGISTERED"), ("valid-2", True, "")},
+        )
+
+    @patch("apps.utils.helpers._send_each")
+    def test_failed_batch_does_not_abort_other_batches(self, mocked_send_each):
+        def send_each(messages):
+            if messages[0].token == "broken":
+                raise ValueError("Unexpected response")
+            return BatchResponse([SendResponse({"name": "message-id"}, None) for _ in messages])
+
+        mocked_send_each.side_effect = send_each
+        devices = [make(FCMDevice, user=self.user, registration_id=token) for token in ["broken", "valid"]]
+        message = Message(notification=Notification(title="test title", body="Sample notification message body"))
+        results = send_batched_push_notifications([(device, message) for device in devices], batch_size=1)
+        self.assertEqual(
+            {(result.registration_id, result.success, result.error_code, result.message_index) for result in results},
+            {("broken", False, "ValueError", 0), ("valid", True, "", 1)},
+        )
+
+    @patch("apps.utils.helpers._send_each")
+    def test_send_push_notification_campaign_once_per_device(self, mocked_send_each):
+        mocked_send_each.side_effect = lambda messages: BatchResponse(
+            [SendResponse({"name": "message-id"}, None) for _ in messages]
+        )
+        device = make(FCMDevice, user=self.user, registration_id="token")
+        duplicate_device = make(FCMDevice, user=self.user, registration_id="token")
+        message = Message(notification=Notification(title="test title", body="Sample notification message body"))
+
+        results = send_batched_push_notifications([(device, message), (duplicate_device, message)], campaign="test")
+        self.assertEqual([result.device_pk for result in results], [device.pk])
+        self.assertTrue(PushNotificationDelivery.objects.filter(campaign="test", device=device, is_successful=True))
+
+        self.assertEqual(send_batched_push_notifications([(device, message)], campaign="test"), [])
+        mocked_send_each.assert_called_once()
+
+    @patch("apps.utils.helpers._send_each")
+    def test_unregistered_devices_are_deactivated(self, mocked_send_each):
+        mocked_send_each.side_effect = lambda messages: BatchResponse(
+            [SendResponse(None, UnregisteredError("Requested entity was not found.")) for _ in messages]
+        )
+        device = make(FCMDevice, user=self.user, registration_id="token")
+        message = Message(notification=Notification(title="test title", body="Sample notification message body"))
+        results = send_batched_push_notifications([(device, message)], campaign="test")
+        self.assertTrue(results[0].is_unregistered)
+        device.refresh_from_db()
+        self.assertFalse(device.active)
+        self.assertFalse(PushNotificationDelivery.objects.get(campaign="test", device=device).is_successful)
+
+    @patch("apps.utils.helpers._send_each")
+    def test_failed_campaign_delivery_is_retried(self, mocked_send_each):
+        mocked_send_each.side_effect = [
+            BatchResponse([SendResponse(None, MagicMock(code="INTERNAL"))]),
+            BatchResponse([SendResponse({"name": "message-id"}, None)]),
+        ]
+        device = make(FCMDevice, user=self.user, registration_id="token")
         message = Message(notification=Notification(title="test title", body="Sample notification message body"))
-        send_push_notifications(devices, message)
-        for device in devices:
-            device.send_message.assert_called_with(message)
+        self.assertFalse(send_batched_push_notifications([(device, message)], campaign="test")[0].success)
+        delivery = PushNotificationDelivery.objects.get(campaign="test", device=device)
+        self.assertEqual((delivery.is_successful, delivery.error_code), (False, "INTERNAL"))
+
+        self.assertTrue(send_batched_push_notifications([(device, message)], campaign="test")[0].success)
+        self.assertEqual(mocked_send_each.call_count, 2)
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.is_successful, delivery.error_code), (True, ""))
+
+    def test_prune_push_notification_deliveries(self):
+        device = make(FCMDevice, user=self.user)
+        with freeze_time(timezone.now() - PUSH_NOTIFICATION_DELIVERY_RETENTION - datetime.timedelta(days=1)):
+            make(PushNotificationDelivery, campaign="old", device=device, is_successful=True)
+        recent_delivery = make(PushNotificationDelivery, campaign="recent", device=device, is_successful=True)
+        self.assertEqual(prune_push_notification_deliveries(), 1)
+        self.assertCountEqual(PushNotificationDelivery.objects.all(), [recent_delivery])
+
+    def test_deduplicate_fcm_devices(self):
+        make(FCMDevice, user=self.user, registration_id="token", _quantity=3)
+        unique_device = make(FCMDevice, user=self.user, registration_id="another token")
+        latest_device = make(FCMDevice, user=self.user, registration_id="token")
+        self.assertEqual(deduplicate_fcm_devices(), 3)
+        self.assertCountEqual(FCMDevice.objects.all(), [unique_device, latest_device])
 
     def test_generate_message_for_push_notification(self):
         notification_template = make(NotificationTemplate)
@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.utils.storage import PrivateMediaStorage
+
+
+@patch("storages.backends.s3boto3.S3Boto3Storage.url", side_effect=lambda name, expire=None: f"signed/{name}")
+class PrivateMediaStorageTestCase(SimpleTestCase):
+    @override_settings(REDIS_URL="")
+    def test_signed_urls_are_reused_without_redis(self, sign_mock):
+        storage = PrivateMediaStorage()
+
+        self.assertEqual(storage.url("scan.jpg"), "signed/scan.jpg")
+        self.assertEqual(
+            storage.get_signed_urls(["scan.jpg", "avatar.jpg"]),
+            {"scan.jpg": "signed/scan.jpg", "avatar.jpg": "signed/avatar.jpg"},
+        )
+        self.assertEqual(sign_mock.call_count, 2)
+        self.assertEqual(sign_mock.call_args.kwargs["expire"], storage.querystring_expire + 15 * 60)
+
+    def test_only_urls_missing_in_redis_are_signed(self, sign_mock):
+        redis_mock = MagicMock()
+        redis_mock.mget.return_value = [b"cached/scan.jpg", None]
+        storage = PrivateMediaStorage()
+
+        with patch("apps.utils.helpers.get_redis_client") as get_redis_client_mock:
+            get_redis_client_mock.return_value.__enter__.return_value = redis_mock
+            signed_urls = storage.get_signed_urls(["scan.jpg", "avatar.jpg"])
+
+        self.assertEqual(signed_urls, {"scan.jpg": "cached/scan.jpg", "avatar.jpg": "signed/avatar.jpg"})
+        sign_mock.assert_called_once()
+        redis_mock.pipeline.return_value.__enter__.return_value.setex.assert_called_once()
+
+    @override_settings(REDIS_URL="")
+    def test_signed_urls_are_returned_when_cache_is_replaced(self, sign_mock):
+        storage = PrivateMediaStorage()
+
+        def sign(name, expire=None):
+            # another thread starts a new bucket while the urls are signed
+            storage.signed_urls = {}
+            return f"signed/{name}"
+
+        sign_mock.side_effect = sign
+        self.assertEqual(storage.get_signed_urls(["scan.jpg"]), {"scan.jpg": "signed/scan.jpg"})